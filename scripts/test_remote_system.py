@@ -54,7 +54,7 @@ def main():
         run_cmd(client, f"ls -lh {PROJECT_DIR}/data/sofascore_monitor.db", "Checking Database File")
         
         # Check for recent writes (last 1 hour)
-        sql_check = f"""sqlite3 {PROJECT_DIR}/data/sofascore_monitor.db "SELECT count(*) FROM seen_bets WHERE created_at > datetime('now', '-1 hour');" """
+        sql_check = f"""sqlite3 {PROJECT_DIR}/data/sofascore_monitor.db "SELECT count(*) FROM seen_bets WHERE created_at > strftime('%s', 'now', '-1 hour');" """
         bts = run_cmd(client, sql_check, "Checking Recent Bets (Last 1h)")
         
         # 3. Log Analysis
@@ -0,0 +1,150 @@
+"""
+Local admin HTTP server.
+
+A tiny asyncio HTTP/1.0 server bound to localhost so it adds no dependencies
+and no threads. Handlers are plain coroutines registered per (method, path).
+With `socket_path` it also listens on a Unix socket (e.g. for
+`curl --unix-socket data/admin.sock http://localhost/control/state`), which
+file permissions can restrict to the service user.
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024
+
+_REASONS = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class _BodyTooLarge(Exception):
+    """Content-Length above MAX_BODY_BYTES: answered with 413 without reading the body."""
+
+
+@dataclass
+class AdminRequest:
+    method: str
+    path: str
+    query: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+
+@dataclass
+class AdminResponse:
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "text/plain; charset=utf-8"
+
+
+Handler = Callable[[AdminRequest], Awaitable[AdminResponse]]
+
+
+class AdminServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, socket_path: str = ""):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self._routes: Dict[Tuple[str, str], Handler] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._unix_server: Optional[asyncio.AbstractServer] = None
+
+    def route(self, method: str, path: str, handler: Handler):
+        self._routes[(method.upper(), path)] = handler
+
+    async def start(self) -> int:
+        """Start listening. Returns the bound port (useful when port=0)."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Admin server listening on http://{self.host}:{self.port}")
+        return self.port
+
+    async def start_unix(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # Stale socket from an unclean exit
+        self._unix_server = await asyncio.start_unix_server(self._handle, self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Admin server listening on unix:{self.socket_path}")
+
+    async def stop(self):
+        for server in (self._server, self._unix_server):
+            if server:
+                server.close()
+                await server.wait_closed()
+        if self._unix_server and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = self._unix_server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                request = await self._read_request(reader)
+            except _BodyTooLarge:
+                response = AdminResponse(413, f"body exceeds {MAX_BODY_BYTES} bytes\n".encode())
+            else:
+                if request is None:
+                    response = AdminResponse(400, b"bad request\n")
+                else:
+                    response = await self._dispatch(request)
+            await self._write_response(writer, response)
+        except Exception as e:
+            logger.error(f"Admin server error: {e}")
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[AdminRequest]:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        parts = request_line.decode("latin-1").split()
+        if len(parts) < 2:
+            return None
+
+        content_length = 0
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout=5)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                value = value.strip()
+                if not value.isdigit():
+                    return None
+                content_length = int(value)
+                if content_length > MAX_BODY_BYTES:
+                    raise _BodyTooLarge(content_length)
+
+        try:
+            body = await reader.readexactly(content_length) if content_length else b""
+        except asyncio.IncompleteReadError:
+            return None  # Body shorter than its Content-Length
+        url = urlsplit(parts[1])
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        return AdminRequest(method=parts[0].upper(), path=url.path, query=query, body=body)
+
+    async def _dispatch(self, request: AdminRequest) -> AdminResponse:
+        handler = self._routes.get((request.method, request.path))
+        if handler is None:
+            if any(path == request.path for _, path in self._routes):
+                return AdminResponse(405, b"method not allowed\n")
+            return AdminResponse(404, b"not found\n")
+        try:
+            return await handler(request)
+        except Exception as e:
+            logger.error(f"Admin handler {request.method} {request.path} failed: {e}", exc_info=True)
+            return AdminResponse(500, f"{e}\n".encode())
+
+    async def _write_response(self, writer: asyncio.StreamWriter, response: AdminResponse):
+        reason = _REASONS.get(response.status, "OK")
+        head = (
+            f"HTTP/1.0 {response.status} {reason}\r\n"
+            f"Content-Type: {response.content_type}\r\n"
+            f"Content-Length: {len(response.body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + response.body)
+        await writer.drain()
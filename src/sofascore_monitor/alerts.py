@@ -0,0 +1,212 @@
+"""
+Alert aggregation for the Discord webhook.
+
+Instead of one webhook post per alert, alerts are collected for a short window
+and flushed together:
+
+- dedupe:  a newer alert with the same `key` replaces the pending one
+- merge:   alerts on the same event become one embed (highest priority first,
+           the rest listed in an "Also on this match" field)
+- pack:    up to 10 embeds / 6000 characters per message (Discord's limits)
+- digest:  under backpressure (too many pending embeds, or a recent 429) the
+           window is sent as compact text summaries grouped by match
+
+Posting runs off the loop thread and a 429 waits with `asyncio.sleep`, so a
+rate-limited burst never blocks polling. `DiscordSink` (sinks.py) feeds it.
+
+Alerts are persisted in the outbox (outbox.py) as JSON; `idempotency_key` is
+the outbox's unique key, so enqueueing the same alert twice stores it once.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .metrics import ALERTS_SENT_TOTAL, WEBHOOK_POSTS_TOTAL
+from .templates import Payload, dumps, loads
+
+logger = logging.getLogger(__name__)
+
+MAX_EMBEDS = 10            # Embeds per webhook message
+MAX_MESSAGE_CHARS = 6000   # Characters across all embeds of one message
+MAX_FIELD_CHARS = 1024
+MAX_FIELDS = 25
+DIGEST_CHUNK_CHARS = 2000  # Description size of one digest embed (limit is 4096)
+
+# (status_code, retry_after_seconds)
+PostFn = Callable[[dict], Tuple[int, float]]
+
+
+@dataclass
+class Alert:
+    kind: str                   # "bet" | "line_movement" | "consensus" (metric label)
+    key: Hashable               # Dedupe key within a window
+    event_id: Optional[int]     # Alerts on the same event are merged; None never merges
+    match: str                  # Match name, heads the digest group
+    summary: str                # One line for merged fields and digests
+    embed: dict
+    priority: int = 1           # Lower sorts first within an event
+    idem_key: str = ""          # Outbox idempotency key; derived from `key` when empty
+
+    @property
+    def idempotency_key(self) -> str:
+        if self.idem_key:
+            return self.idem_key
+        digest = hashlib.blake2b(json.dumps(self.key, default=str).encode(), digest_size=16).hexdigest()
+        return f"{self.kind}:{digest}"
+
+    def to_json(self) -> str:
+        return dumps({
+            "kind": self.kind, "idem_key": self.idempotency_key, "event_id": self.event_id, "match": self.match,
+            "summary": self.summary, "embed": self.embed, "priority": self.priority,
+        }).decode()
+
+    @classmethod
+    def from_json(cls, payload: str) -> "Alert":
+        data = loads(payload)
+        # The idempotency key doubles as the (hashable) dedupe key after a round-trip
+        return cls(kind=data["kind"], key=data["idem_key"], event_id=data["event_id"], match=data["match"],
+                   summary=data["summary"], embed=data["embed"], priority=data["priority"],
+                   idem_key=data["idem_key"])
+
+
+def embed_size(embed: dict) -> int:
+    size = len(embed.get("title", "")) + len(embed.get("description", ""))
+    size += len(embed.get("footer", {}).get("text", ""))
+    return size + sum(len(f["name"]) + len(f["value"]) for f in embed.get("fields", []))
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def merge_alerts(alerts: List[Alert]) -> List[dict]:
+    """One embed per event (plus one per event-less alert), in first-seen order."""
+    groups: Dict[Hashable, List[Alert]] = {}
+    for i, alert in enumerate(alerts):
+        groups.setdefault(alert.event_id if alert.event_id is not None else ("solo", i), []).append(alert)
+
+    embeds = []
+    for group in groups.values():
+        group = sorted(group, key=lambda a: a.priority)
+        embed = copy.deepcopy(group[0].embed)
+        if len(group) > 1:
+            fields = embed.setdefault("fields", [])[:MAX_FIELDS - 1]
+            fields.append({
+                "name": f"➕ Also on this match ({len(group) - 1})",
+                "value": _truncate("\n".join(a.summary for a in group[1:]), MAX_FIELD_CHARS),
+                "inline": False,
+            })
+            embed["fields"] = fields
+        embeds.append(embed)
+    return embeds
+
+
+def digest_embeds(alerts: List[Alert]) -> List[dict]:
+    """Text summaries grouped by match, chunked into digest embeds."""
+    groups: Dict[str, List[str]] = {}
+    for alert in alerts:
+        groups.setdefault(alert.match, []).append(alert.summary)
+
+    chunks, current = [], ""
+    for match, lines in groups.items():
+        block = _truncate(f"**{match}**\n" + "\n".join(lines), DIGEST_CHUNK_CHARS) + "\n"
+        if current and len(current) + len(block) > DIGEST_CHUNK_CHARS:
+            chunks.append(current)
+            current = ""
+        current += block
+    if current:
+        chunks.append(current)
+
+    return [
+        {
+            "title": f"📬 Alert digest ({len(alerts)} alerts)" + (f" {i + 1}/{len(chunks)}" if len(chunks) > 1 else ""),
+            "description": chunk.rstrip(),
+            "color": 0x95A5A6,
+            "footer": {"text": "Sofascore Monitor • Digest"},
+        }
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def pack_messages(embeds: List[dict]) -> List[Payload]:
+    """Greedily pack embeds into webhook payloads within Discord's per-message limits."""
+    messages, batch, size = [], [], 0
+    for embed in embeds:
+        n = embed_size(embed)
+        if batch and (len(batch) >= MAX_EMBEDS or size + n > MAX_MESSAGE_CHARS):
+            messages.append(Payload(embeds=batch))
+            batch, size = [], 0
+        batch.append(embed)
+        size += n
+    if batch:
+        messages.append(Payload(embeds=batch))
+    return messages
+
+
+class AlertAggregator:
+    def __init__(self, post: PostFn, digest_threshold: int, max_retries: int = 3, limiter: Optional[Any] = None):
+        self.post = post
+        self.digest_threshold = digest_threshold
+        self.max_retries = max_retries
+        self.limiter = limiter              # Anything with `async acquire()`, awaited before each post
+        self.pending: Dict[Hashable, Alert] = {}
+        self.last_flush_ok = True           # Every post of the last flush was accepted
+        self._throttled_until = 0.0
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def add(self, alert: Alert):
+        self.pending.pop(alert.key, None)  # Re-insert so the newest alert keeps its arrival order
+        self.pending[alert.key] = alert
+
+    def build_messages(self, alerts: List[Alert]) -> Tuple[str, List[dict]]:
+        """("embeds" | "digest", payloads) for one window of alerts."""
+        embeds = merge_alerts(alerts)
+        if len(embeds) > self.digest_threshold or time.monotonic() < self._throttled_until:
+            return "digest", pack_messages(digest_embeds(alerts))
+        return "embeds", pack_messages(embeds)
+
+    async def flush(self) -> int:
+        """Send everything pending. Returns the number of webhook posts made."""
+        # Swapping the dict is atomic on the loop: alerts added mid-flush wait for the next one
+        alerts, self.pending = list(self.pending.values()), {}
+        if not alerts:
+            return 0
+        mode, messages = self.build_messages(alerts)
+        delivered = 0
+        for payload in messages:
+            delivered += await self._post(payload, mode)
+        self.last_flush_ok = delivered == len(messages)
+        if self.last_flush_ok:
+            for alert in alerts:
+                ALERTS_SENT_TOTAL.inc(type=alert.kind)
+        logger.info(f"Flushed {len(alerts)} alerts in {len(messages)} webhook posts ({mode}).")
+        return len(messages)
+
+    async def _post(self, payload: dict, mode: str) -> bool:
+        for _ in range(self.max_retries):
+            if self.limiter:
+                await self.limiter.acquire()
+            try:
+                status, retry_after = await asyncio.to_thread(self.post, payload)
+            except Exception as e:
+                logger.error(f"Error posting alerts to Discord: {e}")
+                return False
+            WEBHOOK_POSTS_TOTAL.inc(mode=mode, status=str(status))
+            if 200 <= status < 300:
+                return True
+            if status == 429:
+                # Stay in digest mode for a while after being rate limited
+                self._throttled_until = time.monotonic() + max(retry_after, 1.0) * 10
+                logger.warning(f"Discord Rate Limited. Retrying in {retry_after}s...")
+                await asyncio.sleep(retry_after + 0.1)
+                continue
+            logger.error(f"Failed to send Discord alerts: HTTP {status}")
+            return False
+        return False
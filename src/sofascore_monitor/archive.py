@@ -0,0 +1,362 @@
+"""
+Raw API response archive and replay.
+
+Every successful response body is stored content-addressed in one SQLite
+file (RESPONSE_ARCHIVE_PATH):
+
+    blobs(hash, codec, size, data)     blake2b-128 of the body -> compressed body
+    responses(endpoint, fetched_at, hash)
+
+Most polls return exactly what the previous one did, so a repeat costs one
+index row: the body is hashed, and compressed only when the hash is new.
+Blobs are zstd-compressed when `zstandard` is installed and zlib otherwise;
+the codec is stored per blob, so one archive can hold both.
+
+Replay feeds an archive back through the real `Monitor`, one recorded poll
+cycle at a time, on a virtual clock set to the time of that cycle (lookahead,
+grace period, consensus expiry and circuit breakers all see archive time).
+With speed 0 it runs as fast as the monitor can process the responses.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional, Tuple
+from unittest import mock
+
+from .client import SofascoreClient
+from .models import User
+from .templates import loads
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+    CODEC = "zstd"
+except ImportError:
+    zstandard = None
+    CODEC = "zlib"
+
+RANKING_ENDPOINT = "/user-account/vote-ranking"
+_PREDICTIONS = re.compile(r"^/user(?:-account)?/([^/]+)/predictions\?page=0$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash BLOB PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS responses (
+    endpoint TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    hash BLOB NOT NULL,
+    PRIMARY KEY (endpoint, fetched_at)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_responses_time ON responses(fetched_at);
+CREATE INDEX IF NOT EXISTS idx_responses_hash ON responses(hash);
+"""
+
+
+def compress(body: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=3).compress(body)
+    return "zlib", zlib.compress(body, 6)
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Archive blob is zstd-compressed: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown archive codec {codec!r}")
+
+
+class ResponseArchive:
+    """Content-addressed store of raw response bodies. Safe to call from the client's worker threads."""
+
+    def __init__(self, path: str, retention_days: int = 14):
+        self.path = path
+        self.retention_days = retention_days
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._last_hash: Dict[str, bytes] = {}  # endpoint -> hash of its previous response
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def record(self, endpoint: str, body: bytes, fetched_at: Optional[float] = None):
+        """Archive one response body. Never raises: archiving must not break polling."""
+        try:
+            self._record(endpoint, body, time.time() if fetched_at is None else fetched_at)
+        except Exception as e:
+            logger.error(f"Failed to archive response of {endpoint}: {e}")
+
+    def _record(self, endpoint: str, body: bytes, fetched_at: float):
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        with self._lock:
+            conn = self._connect()
+            known = self._last_hash.get(endpoint) == digest or conn.execute(
+                "SELECT 1 FROM blobs WHERE hash = ?", (digest,)
+            ).fetchone() is not None
+        blob = None if known else compress(body)  # Outside the lock: compression is the slow part
+        with self._lock:
+            if blob is not None:
+                conn.execute(
+                    "INSERT OR IGNORE INTO blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+                    (digest, blob[0], len(body), blob[1]),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (endpoint, fetched_at, hash) VALUES (?, ?, ?)",
+                (endpoint, fetched_at, digest),
+            )
+            conn.commit()
+            self._last_hash[endpoint] = digest
+
+    def latest(self, endpoint: str, at: float) -> Optional[bytes]:
+        """Body of the newest response of `endpoint` recorded at or before `at`."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT b.codec, b.data FROM responses r JOIN blobs b ON b.hash = r.hash "
+                "WHERE r.endpoint = ? AND r.fetched_at <= ? ORDER BY r.fetched_at DESC LIMIT 1",
+                (endpoint, at),
+            ).fetchone()
+        return decompress(*row) if row else None
+
+    def blob(self, digest: bytes) -> bytes:
+        with self._lock:
+            row = self._connect().execute("SELECT codec, data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest.hex())
+        return decompress(*row)
+
+    def index(self, start: Optional[float] = None, end: Optional[float] = None,
+              page_size: int = 5000) -> Iterator[Tuple[str, float, bytes]]:
+        """(endpoint, fetched_at, hash) in time order, read a page at a time."""
+        after = (start if start is not None else float("-inf"), "")
+        end = end if end is not None else float("inf")
+        while True:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT endpoint, fetched_at, hash FROM responses "
+                    "WHERE (fetched_at > ? OR (fetched_at = ? AND endpoint >= ?)) AND fetched_at <= ? "
+                    "ORDER BY fetched_at, endpoint LIMIT ?",
+                    (after[0], after[0], after[1], end, page_size),
+                ).fetchall()
+            yield from rows
+            if len(rows) < page_size:
+                return
+            after = (rows[-1][1], rows[-1][0] + "\0")
+
+    def cycles(self, start: Optional[float] = None, end: Optional[float] = None) -> List[float]:
+        """End times of the recorded poll cycles: a cycle ends before an endpoint is fetched again."""
+        ends, current, last = [], set(), None
+        for endpoint, fetched_at, _ in self.index(start, end):
+            if endpoint in current:
+                ends.append(last)
+                current = set()
+            current.add(endpoint)
+            last = fetched_at
+        if current:
+            ends.append(last)
+        return ends
+
+    def prune(self, cutoff_ts: Optional[float] = None) -> int:
+        """Drop index rows older than the cutoff (default: retention) and blobs nothing refers to."""
+        if cutoff_ts is None:
+            cutoff_ts = time.time() - self.retention_days * 86400
+        with self._lock:
+            conn = self._connect()
+            deleted = conn.execute("DELETE FROM responses WHERE fetched_at < ?", (cutoff_ts,)).rowcount
+            conn.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM responses)")
+            conn.commit()
+            self._last_hash.clear()
+        return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            responses, first, last = conn.execute(
+                "SELECT COUNT(*), MIN(fetched_at), MAX(fetched_at) FROM responses"
+            ).fetchone()
+            blobs, stored, unique = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+            raw = conn.execute(
+                "SELECT COALESCE(SUM(b.size), 0) FROM responses r JOIN blobs b ON b.hash = r.hash"
+            ).fetchone()[0]
+        return {
+            "responses": responses, "blobs": blobs, "first": first, "last": last,
+            "raw_bytes": raw, "unique_bytes": unique, "stored_bytes": stored,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# --- Replay ---
+
+class VirtualClock:
+    """Epoch seconds that only move when set; stands in for `time` and `datetime` in the monitor."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def time_module(self) -> SimpleNamespace:
+        return SimpleNamespace(time=self.time, perf_counter=time.perf_counter, monotonic=time.monotonic,
+                               thread_time=time.thread_time, process_time=time.process_time, sleep=time.sleep)
+
+    def datetime_class(self) -> type:
+        clock = self
+
+        class VirtualDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return cls.fromtimestamp(clock.now, tz)
+
+            @classmethod
+            def utcnow(cls):
+                return cls.utcfromtimestamp(clock.now)
+
+        return VirtualDatetime
+
+
+class ArchiveClient(SofascoreClient):
+    """Serves, per endpoint, the newest archived response at or before the clock; no network."""
+
+    def __init__(self, source: ResponseArchive, clock: VirtualClock):
+        super().__init__(base_url="archive://")
+        self.source = source
+        self.clock = clock
+        self.breaker.clock = clock.time
+        self.requests = 0
+        self.misses = 0
+
+    async def fetch(self, endpoint: str):
+        self.requests += 1
+        body = self.source.latest(endpoint, self.clock.now)
+        if body is None:
+            self.misses += 1
+            return None
+        return loads(body)
+
+
+@dataclass
+class ReplayResult:
+    cycles: int
+    users: int
+    requests: int
+    misses: int                  # Requests with nothing archived yet for that endpoint
+    simulated_seconds: float     # Archive time covered
+    wall_seconds: float
+    speedup: float
+    alerts: List[dict] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def summary(self) -> str:
+        kinds: Dict[str, int] = {}
+        for alert in self.alerts:
+            kinds[alert.get("kind", "?")] = kinds.get(alert.get("kind", "?"), 0) + 1
+        return (
+            f"cycles={self.cycles} users={self.users} requests={self.requests} misses={self.misses}\n"
+            f"replayed {self.simulated_seconds / 3600:.1f}h in {self.wall_seconds:.2f}s ({self.speedup:.0f}x)\n"
+            f"alerts={len(self.alerts)} {kinds}"
+        )
+
+
+def predictions_user(endpoint: str) -> Optional[str]:
+    """User id of a first-page predictions endpoint (the one the monitor polls), else None."""
+    match = _PREDICTIONS.match(endpoint)
+    return match.group(1) if match else None
+
+
+def archived_users(source: ResponseArchive, at: float, start: Optional[float] = None,
+                   end: Optional[float] = None) -> List[User]:
+    """Users whose predictions were archived, named from the newest archived ranking."""
+    ids = []
+    for endpoint, _, _ in source.index(start, end):
+        uid = predictions_user(endpoint)
+        if uid and uid not in ids:
+            ids.append(uid)
+    body = source.latest(RANKING_ENDPOINT, at)
+    rows = {str(row.get("id")): row for row in (loads(body).get("ranking", []) if body else [])}
+    users = []
+    for uid in ids:
+        row = rows.get(uid, {})
+        name = row.get("nickname") or row.get("slug") or uid
+        users.append(User(id=uid, name=name, slug=row.get("slug", name)))
+    return users
+
+
+async def replay(source: ResponseArchive, speed: float = 0.0, start: Optional[float] = None,
+                 end: Optional[float] = None, storage_url: str = "memory://") -> ReplayResult:
+    """Run the monitor over the archived cycles in [start, end]. `speed` > 0 keeps real gaps / speed."""
+    from . import consensus, monitor as monitor_module
+    from .monitor import Monitor
+    from .storage import create_storage
+
+    cycle_ends = source.cycles(start, end)
+    clock = VirtualClock(cycle_ends[0] if cycle_ends else time.time())
+    client = ArchiveClient(source, clock)
+    alerts: List[dict] = []
+
+    with mock.patch.object(monitor_module, "time", clock.time_module()), \
+         mock.patch.object(monitor_module, "datetime", clock.datetime_class()), \
+         mock.patch.object(consensus, "time", clock.time_module()):
+        monitor = Monitor(use_auto_discovery=False, client=client, storage=create_storage(storage_url))
+        monitor.breaker.clock = clock.time
+        monitor.users = archived_users(source, clock.now, start, end)
+        await monitor.storage.open()
+
+        wall_start = time.perf_counter()
+        try:
+            for i, at in enumerate(cycle_ends):
+                if speed > 0 and i:
+                    await asyncio.sleep((at - cycle_ends[i - 1]) / speed)
+                clock.now = at
+                await monitor.check_all_users()
+                # Alerts stay in the outbox (nothing is sent): collect and acknowledge them
+                entries = await monitor.storage.claim_outbox(10_000, 3600)
+                alerts.extend({"replayed_at": at, **loads(e["payload"])} for e in entries)
+                await monitor.storage.ack_outbox([(e["id"], "replay", True, 0) for e in entries])
+            wall = time.perf_counter() - wall_start
+            await asyncio.gather(*monitor._background_tasks, return_exceptions=True)
+        finally:
+            await monitor.storage.close()
+
+    simulated = cycle_ends[-1] - cycle_ends[0] if cycle_ends else 0.0
+    return ReplayResult(
+        cycles=len(cycle_ends),
+        users=len(monitor.users),
+        requests=client.requests,
+        misses=client.misses,
+        simulated_seconds=simulated,
+        wall_seconds=wall,
+        speedup=simulated / wall if wall else 0.0,
+        alerts=alerts,
+    )
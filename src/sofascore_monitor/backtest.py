@@ -0,0 +1,422 @@
+"""
+Backtesting of the discovery filters and alert rules.
+
+A `Dataset` is built once from the response archive (or any time-ordered
+stream of ranking and predictions payloads):
+
+- predictors in ranking order with their all-time stats at discovery,
+- every prediction with its start time, outcome and the polls at which its
+  odds changed,
+- the poll times of every predictor.
+
+A configuration is a `Settings` snapshot; `parse_grid` expands
+`min_roi=0,5,10`-style axes into their product. Configurations that share
+the time window and line-movement threshold share the per-bet work: which
+poll would have alerted each bet, and at what odds, is found with a few
+NumPy searches and summed per predictor. Every configuration in the group
+is then one row of a predictor mask, and the P&L of all of them is a single
+matrix product. Groups are spread over a process pool.
+
+The model follows the monitor's rules (filters.py, line_moves):
+
+- the first `top_predictors_limit` ranked predictors passing the MIN_*
+  filters are followed; polled predictors missing from the ranking (e.g.
+  TARGET_USERS) always are
+- a new-bet alert fires at the first poll inside
+  [start - lookahead, start + grace] before the match shows as finished,
+  staked at that poll's odds
+- a line-movement alert fires on an odds change >= threshold at a poll
+  after the bet entered the window, unless the previous poll's change
+  already crossed it, staked at the new odds
+- 1-unit flat stakes; predictions that never settled in the data are left
+  out. Consensus alerts are not modelled.
+
+`sofascore-monitor replay` runs the real monitor over an archive and is the
+slow, exact reference.
+"""
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .filters import PredictorStats, prediction_key, prediction_odds, predictor_stats, settle
+from .settings import Settings
+from .storage.base import roi_summary
+
+logger = logging.getLogger(__name__)
+
+GRID_FIELDS = (
+    "top_predictors_limit", "min_roi", "min_avg_odds", "min_total_bets", "min_win_rate",
+    "time_lookahead_hours", "match_grace_period_minutes", "line_movement_threshold",
+)
+PENDING, WON, LOST, VOID = 0, 1, 2, 3
+_RESULTS = {"WON": WON, "LOST": LOST, "VOID": VOID}
+
+
+@dataclass
+class Dataset:
+    """Column arrays; times are seconds since `t0`. Users are in ranking order, unranked ones last."""
+    t0: float
+    user_ids: List[str]
+    ranked: np.ndarray          # In the ranking (subject to filters); the rest are always followed
+    roi: np.ndarray
+    total_bets: np.ndarray
+    win_rate: np.ndarray
+    avg_odds: np.ndarray
+    poll_user: np.ndarray       # Polls, sorted by (user, time)
+    poll_time: np.ndarray
+    bet_user: np.ndarray
+    bet_start: np.ndarray       # NaN when unknown (no time filter, like the monitor)
+    bet_first_seen: np.ndarray
+    bet_finished: np.ndarray    # First poll showing it finished; inf if never
+    bet_result: np.ndarray      # PENDING / WON / LOST / VOID
+    change_bet: np.ndarray      # Odds changes, sorted by (bet, time); the first sighting counts as one
+    change_time: np.ndarray
+    change_odds: np.ndarray
+
+    @property
+    def span(self) -> float:
+        """Key stride for (user or bet, time) searches: larger than any relative time."""
+        return float(max(self.poll_time.max(initial=0.0), self.change_time.max(initial=0.0))) + 1.0
+
+    def stats(self, user: int) -> PredictorStats:
+        return PredictorStats(roi=float(self.roi[user]), win_rate=float(self.win_rate[user]),
+                              total_bets=int(self.total_bets[user]), avg_odds=float(self.avg_odds[user]))
+
+    def summary(self) -> dict:
+        polled = np.zeros(len(self.user_ids), dtype=bool)
+        polled[self.poll_user] = True
+        return {
+            "users": len(self.user_ids),
+            "ranked": int(self.ranked.sum()),
+            "ranked_without_predictions": int((self.ranked & ~polled).sum()),
+            "polls": len(self.poll_time),
+            "bets": len(self.bet_user),
+            "settled": int((self.bet_result != PENDING).sum()),
+            "odds_changes": len(self.change_time),
+            "hours": round(self.span / 3600, 1),
+        }
+
+    @classmethod
+    def from_archive(cls, archive, start: Optional[float] = None, end: Optional[float] = None) -> "Dataset":
+        from .archive import RANKING_ENDPOINT, predictions_user
+        from .templates import loads
+
+        builder = DatasetBuilder()
+        if start is not None:
+            ranking = archive.latest(RANKING_ENDPOINT, start)  # What discovery saw when the window opened
+            if ranking:
+                builder.add_ranking(loads(ranking))
+        for endpoint, at, digest in archive.index(start, end):
+            if endpoint == RANKING_ENDPOINT:
+                if not builder.has_ranking:
+                    builder.add_ranking(loads(archive.blob(digest)))
+                continue
+            uid = predictions_user(endpoint)
+            if uid and builder.add_poll(uid, at, digest):
+                builder.add_predictions(uid, at, loads(archive.blob(digest)))
+        return builder.build()
+
+
+class DatasetBuilder:
+    """Accumulates payloads in time order. Unchanged responses only add a poll."""
+
+    def __init__(self):
+        self.has_ranking = False
+        self._users: Dict[str, int] = {}
+        self._rank: List[Optional[int]] = []
+        self._stats: List[PredictorStats] = []
+        self._last: Dict[str, Any] = {}     # user id -> digest of the last predictions payload
+        self._polls: List[Tuple[int, float]] = []
+        self._bets: Dict[Tuple[int, str], int] = {}
+        self._bet_rows: List[list] = []     # [user, start, first_seen, finished, result, last_odds]
+        self._changes: List[Tuple[int, float, float]] = []
+
+    def _user(self, uid: str) -> int:
+        index = self._users.get(uid)
+        if index is None:
+            index = self._users[uid] = len(self._rank)
+            self._rank.append(None)
+            self._stats.append(PredictorStats())
+        return index
+
+    def add_ranking(self, payload: dict):
+        """The ranking discovery ran against; only the first one counts."""
+        if self.has_ranking:
+            return
+        self.has_ranking = True
+        for rank, row in enumerate(payload.get("ranking", [])):
+            uid = str(row.get("id") or "")
+            if not uid:
+                continue
+            index = self._user(uid)
+            if self._rank[index] is None:
+                self._rank[index] = rank
+                self._stats[index] = predictor_stats(row.get("voteStatistics", {}).get("allTime"))
+
+    def add_poll(self, uid: str, at: float, digest: Any = None) -> bool:
+        """Record a poll of `uid`. False when its payload is the same as last time (nothing to parse)."""
+        self._polls.append((self._user(uid), at))
+        if digest is not None and self._last.get(uid) == digest:
+            return False
+        self._last[uid] = digest
+        return True
+
+    def add_predictions(self, uid: str, at: float, payload: dict):
+        user = self._user(uid)
+        for p in payload.get("predictions", []):
+            key = (user, prediction_key(p))
+            bet = self._bets.get(key)
+            if bet is None:
+                bet = self._bets[key] = len(self._bet_rows)
+                self._bet_rows.append([user, np.nan, at, np.inf, PENDING, 0.0])
+            row = self._bet_rows[bet]
+            start = p.get("startDateTimestamp")
+            if start:
+                row[1] = float(start)
+            status_type = (p.get("status") or {}).get("type")
+            if status_type == "finished":
+                row[3] = min(row[3], at)
+            outcome = settle(status_type, p.get("correct"), 2.0)
+            if outcome:
+                row[4] = _RESULTS[outcome[0]]
+            odds = prediction_odds(p)
+            if odds > 1.0 and odds != row[5]:
+                self._changes.append((bet, at, odds))
+                row[5] = odds
+
+    def build(self) -> Dataset:
+        n = len(self._rank)
+        # Ranking order first, then users that were polled but never ranked (in order of appearance)
+        order = sorted(range(n), key=lambda i: (self._rank[i] is None, self._rank[i] or 0, i))
+        new_index = np.empty(n, dtype=np.int64)
+        new_index[order] = np.arange(n)
+        ids = list(self._users)
+        stats = [self._stats[i] for i in order]
+
+        polls = np.array(self._polls, dtype=np.float64).reshape(-1, 2)
+        bets = np.array(self._bet_rows, dtype=np.float64).reshape(-1, 6)
+        changes = np.array(self._changes, dtype=np.float64).reshape(-1, 3)
+        times = [polls[:, 1], bets[:, 2], changes[:, 1]]
+        t0 = float(min((t.min() for t in times if len(t)), default=0.0))
+
+        poll_user = new_index[polls[:, 0].astype(np.int64)]
+        poll_time = polls[:, 1] - t0
+        poll_order = np.lexsort((poll_time, poll_user))
+        change_order = np.lexsort((changes[:, 1], changes[:, 0]))
+        return Dataset(
+            t0=t0,
+            user_ids=[ids[i] for i in order],
+            ranked=np.array([self._rank[i] is not None for i in order], dtype=bool),
+            roi=np.array([s.roi for s in stats], dtype=np.float64),
+            total_bets=np.array([s.total_bets for s in stats], dtype=np.float64),
+            win_rate=np.array([s.win_rate for s in stats], dtype=np.float64),
+            avg_odds=np.array([s.avg_odds for s in stats], dtype=np.float64),
+            poll_user=poll_user[poll_order],
+            poll_time=poll_time[poll_order],
+            bet_user=new_index[bets[:, 0].astype(np.int64)],
+            bet_start=bets[:, 1] - t0,
+            bet_first_seen=bets[:, 2] - t0,
+            bet_finished=bets[:, 3] - t0,
+            bet_result=bets[:, 4].astype(np.int8),
+            change_bet=changes[change_order, 0].astype(np.int64),
+            change_time=changes[change_order, 1] - t0,
+            change_odds=changes[change_order, 2],
+        )
+
+
+# --- Configurations ---
+
+def _axis(name: str, text: str) -> List[str]:
+    """'1,2,5' or an inclusive range 'start:stop:step'."""
+    if ":" in text:
+        parts = [float(v) for v in text.split(":")]
+        if len(parts) != 3 or parts[2] <= 0:
+            raise ValueError(f"{name}: expected start:stop:step, got {text!r}")
+        values = [round(float(v), 10) for v in np.arange(parts[0], parts[1] + parts[2] / 2, parts[2])]
+        return [str(int(v)) if v.is_integer() else repr(v) for v in values]
+    return [v.strip() for v in text.split(",") if v.strip()]
+
+
+def parse_grid(specs: Sequence[str], base: Optional[Settings] = None) -> List[Settings]:
+    """Expand NAME=VALUES axes (see `_axis`) into every combination, applied over `base`."""
+    base = base or Settings()
+    axes = []
+    for spec in specs:
+        name, sep, values = spec.partition("=")
+        name = name.strip().lower()
+        if not sep:
+            raise ValueError(f"expected NAME=VALUES, got {spec!r}")
+        if name not in GRID_FIELDS:
+            raise ValueError(f"{name} is not a backtest parameter (one of: {', '.join(GRID_FIELDS)})")
+        values = _axis(name, values)
+        if not values:
+            raise ValueError(f"{name}: no values")
+        axes.append([(name, v) for v in values])
+    return [base.updated(dict(combo)) for combo in itertools.product(*axes)]
+
+
+# --- Evaluation ---
+
+@dataclass
+class BacktestResult:
+    settings: Dict[str, Any]    # The backtest parameters of this configuration
+    users: int                  # Predictors followed
+    bets: int                   # Settled new-bet alerts
+    wins: int
+    profit: float               # Units at 1-unit stakes
+    roi: float
+    win_rate: float
+    line_alerts: int            # Settled line-movement alerts
+    line_profit: float
+    line_roi: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def summary(self) -> str:
+        params = " ".join(f"{k}={v}" for k, v in self.settings.items())
+        return (
+            f"ROI {self.roi:+7.2f}%  bets {self.bets:>5}  win {self.win_rate:5.1f}%  P&L {self.profit:+8.2f}  "
+            f"line {self.line_alerts:>4} ({self.line_roi:+.1f}%)  users {self.users:>3}  {params}"
+        )
+
+
+def _profit(result: np.ndarray, odds: np.ndarray) -> np.ndarray:
+    return np.where(result == WON, odds - 1.0, np.where(result == LOST, -1.0, 0.0))
+
+
+def window_totals(ds: Dataset, lookahead_hours: float, grace_minutes: float, threshold: float) -> np.ndarray:
+    """Per predictor: [bets, wins, profit, line alerts, line wins, line profit] for one time window/threshold."""
+    n_users, n_bets = len(ds.user_ids), len(ds.bet_user)
+    totals = np.zeros((n_users, 6))
+    if n_bets == 0 or len(ds.poll_time) == 0:
+        return totals
+    span = ds.span
+    has_start = ~np.isnan(ds.bet_start)
+    bet_start = np.where(has_start, ds.bet_start, 0.0)
+    opens = np.where(has_start, np.maximum(ds.bet_first_seen, bet_start - lookahead_hours * 3600),
+                     ds.bet_first_seen)
+    closes = np.where(has_start, bet_start + grace_minutes * 60, np.inf)
+
+    # New-bet alert: the predictor's first poll at or after the window opens
+    poll_key = ds.poll_user * span + ds.poll_time
+    pos = np.searchsorted(poll_key, ds.bet_user * span + opens, side="left")
+    pos_c = np.minimum(pos, len(poll_key) - 1)
+    found = (pos < len(poll_key)) & (ds.poll_user[pos_c] == ds.bet_user)
+    alert_at = np.where(found, ds.poll_time[pos_c], np.inf)
+    in_window = found & (alert_at <= closes) & (alert_at < ds.bet_finished)
+    settled = ds.bet_result != PENDING
+
+    bet_index = np.arange(n_bets)
+    change_key = ds.change_bet * span + ds.change_time
+    odds = np.full(n_bets, np.nan)
+    if len(change_key):
+        last = np.searchsorted(change_key, bet_index * span + np.where(in_window, alert_at, 0.0), side="right") - 1
+        last_c = np.maximum(last, 0)
+        has_odds = (last >= 0) & (ds.change_bet[last_c] == bet_index)
+        odds = np.where(has_odds, ds.change_odds[last_c], np.nan)
+    alerted = in_window & settled & (odds > 1.0)
+    users = ds.bet_user[alerted]
+    profit = _profit(ds.bet_result[alerted], odds[alerted])
+    totals[:, 0] = np.bincount(users, minlength=n_users)
+    totals[:, 1] = np.bincount(users, weights=(ds.bet_result[alerted] == WON), minlength=n_users)
+    totals[:, 2] = np.bincount(users, weights=profit, minlength=n_users)
+
+    # Line movement: a change >= threshold between two polls inside the window
+    if len(change_key) > 1:
+        bet = ds.change_bet
+        same = np.r_[False, bet[1:] == bet[:-1]]
+        previous = np.r_[np.nan, ds.change_odds[:-1]]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            move = np.where(same, np.abs(ds.change_odds - previous) / previous, 0.0)
+        t = ds.change_time
+        moved = same & (move >= threshold) & (t > alert_at[bet]) & (t <= closes[bet]) & (t < ds.bet_finished[bet])
+        # The alert flag is only cleared by a poll without such a move
+        poll_pos = np.searchsorted(poll_key, ds.bet_user[bet] * span + t, side="left")
+        chained = np.r_[False, moved[:-1] & same[1:] & (poll_pos[1:] - poll_pos[:-1] == 1)]
+        line = moved & ~chained & settled[bet]
+        line_users = ds.bet_user[bet[line]]
+        line_profit = _profit(ds.bet_result[bet[line]], ds.change_odds[line])
+        totals[:, 3] = np.bincount(line_users, minlength=n_users)
+        totals[:, 4] = np.bincount(line_users, weights=(ds.bet_result[bet[line]] == WON), minlength=n_users)
+        totals[:, 5] = np.bincount(line_users, weights=line_profit, minlength=n_users)
+    return totals
+
+
+def followed(ds: Dataset, configs: Sequence[Settings]) -> np.ndarray:
+    """(configs x users) mask of the predictors each configuration would follow."""
+    params = np.array([
+        [c.min_roi, c.min_total_bets, c.min_avg_odds, c.min_win_rate, c.top_predictors_limit] for c in configs
+    ], dtype=np.float64).reshape(-1, 5)
+    passes = (
+        ds.ranked
+        & (ds.roi >= params[:, 0:1]) & (ds.total_bets >= params[:, 1:2])
+        & (ds.avg_odds >= params[:, 2:3]) & (ds.win_rate >= params[:, 3:4])
+    )
+    return (passes & (np.cumsum(passes, axis=1) <= params[:, 4:5])) | ~ds.ranked
+
+
+def evaluate(ds: Dataset, configs: Sequence[Settings]) -> List[BacktestResult]:
+    """Configurations sharing time_lookahead_hours, match_grace_period_minutes and line_movement_threshold."""
+    first = configs[0]
+    per_user = window_totals(ds, first.time_lookahead_hours, first.match_grace_period_minutes,
+                             first.line_movement_threshold)
+    mask = followed(ds, configs)
+    totals = mask.astype(np.float64) @ per_user
+    results = []
+    for config, users, row in zip(configs, mask.sum(axis=1), totals):
+        bets, wins, profit, line_alerts, line_wins, line_profit = row
+        summary = roi_summary(int(bets), int(wins), float(profit), float(bets))
+        line = roi_summary(int(line_alerts), int(line_wins), float(line_profit), float(line_alerts))
+        results.append(BacktestResult(
+            settings={name: getattr(config, name) for name in GRID_FIELDS},
+            users=int(users), bets=summary["total_bets"], wins=summary["wins"], profit=round(summary["profit"], 6),
+            roi=summary["roi"], win_rate=summary["win_rate"], line_alerts=line["total_bets"],
+            line_profit=round(line["profit"], 6), line_roi=line["roi"],
+        ))
+    return results
+
+
+_worker_dataset: Optional[Dataset] = None
+
+
+def _init_worker(ds: Dataset):
+    global _worker_dataset
+    _worker_dataset = ds
+
+
+def _evaluate_in_worker(configs: List[Settings]) -> List[BacktestResult]:
+    return evaluate(_worker_dataset, configs)
+
+
+def run_backtest(ds: Dataset, configs: Sequence[Settings], workers: Optional[int] = None) -> List[BacktestResult]:
+    """Results aligned with `configs`. Groups of configurations are evaluated in `workers` processes."""
+    groups: Dict[Tuple, List[int]] = {}
+    for i, config in enumerate(configs):
+        key = (config.time_lookahead_hours, config.match_grace_period_minutes, config.line_movement_threshold)
+        groups.setdefault(key, []).append(i)
+    tasks = [[configs[i] for i in indexes] for indexes in groups.values()]
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        outputs = [evaluate(ds, task) for task in tasks]
+    else:
+        # The dataset is shipped to each worker once, not with every task
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(ds,)) as pool:
+            outputs = list(pool.map(_evaluate_in_worker, tasks))
+
+    results: List[Optional[BacktestResult]] = [None] * len(configs)
+    for indexes, output in zip(groups.values(), outputs):
+        for i, result in zip(indexes, output):
+            results[i] = result
+    return results
+
+
+def best(results: Sequence[BacktestResult], min_bets: int = 1) -> List[BacktestResult]:
+    """Highest ROI first, among configurations with at least `min_bets` settled alerts."""
+    return sorted((r for r in results if r.bets >= min_bets), key=lambda r: (r.roi, r.profit), reverse=True)
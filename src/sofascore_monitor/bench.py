@@ -0,0 +1,458 @@
+"""
+Offline benchmark harness.
+
+Serves recorded `vote-ranking` and `predictions` payloads from a local fake
+Sofascore (plus a fake Discord webhook) and drives the real
+`Monitor.check_all_users`, `Monitor.resolve_pending_bets` and `Storage` code
+against it, so throughput regressions show up without a live box.
+
+    sofascore-monitor bench --users 200 --cycles 5 --latency-ms 80 --rate-429 0.02
+"""
+import asyncio
+import copy
+import gzip
+import json
+import logging
+import random
+import resource
+import statistics
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, asdict, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from unittest import mock
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+logger = logging.getLogger(__name__)
+
+
+def load_fixture(name: str, fixtures_dir: Optional[Path] = None) -> dict:
+    with open((fixtures_dir or FIXTURES_DIR) / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeSofascoreServer:
+    """Threaded HTTP stand-in for the Sofascore API and the Discord webhook.
+
+    Every user gets the recorded predictions page with ids namespaced per user.
+    Each `advance()` adds `new_bets_per_round` fresh predictions per user and
+    moves the odds of the first prediction, so the new-bet, line-movement and
+    storage paths all do real work. `settle()` flips every prediction to
+    finished for `resolve_pending_bets`. Like the real API, JSON is gzipped
+    for clients that accept it (`compress=False` serves it plain).
+    """
+
+    def __init__(self, users: int = 10, latency_ms: float = 0.0, rate_429: float = 0.0,
+                 new_bets_per_round: int = 1, seed: int = 0, fixtures_dir: Optional[Path] = None,
+                 compress: bool = True):
+        self.compress = compress
+        self.latency = latency_ms / 1000.0
+        self.rate_429 = rate_429
+        self.new_bets_per_round = new_bets_per_round
+        self.round = 0
+        self.settled = False
+        self.requests = 0
+        self.status_counts: Dict[int, int] = {}
+        self.webhook_posts = 0
+        self.wire_bytes = 0     # Response bodies as sent
+        self.decoded_bytes = 0  # ... and before compression
+        self.cpu_seconds = 0.0  # Server-side CPU, subtracted from the monitor's figures
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, int, bool], bytes] = {}
+        self._gzip_cache: Dict[int, Tuple[bytes, bytes]] = {}  # id(body) -> (body, gzipped)
+
+        ranking = load_fixture("vote_ranking.json", fixtures_dir)["ranking"]
+        self._predictions = load_fixture("predictions.json", fixtures_dir)["predictions"]
+        self.ranking = []
+        for i in range(users):
+            row = copy.deepcopy(ranking[i % len(ranking)])
+            row["id"] = f"{i:024x}"
+            row["nickname"] = f"{row.get('nickname', 'user')}-{i}"
+            row["slug"] = f"{row.get('slug', 'user')}-{i}"
+            self.ranking.append(row)
+        self._ranking_body = json.dumps({"ranking": self.ranking}).encode()
+
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/api/v1"
+
+    @property
+    def webhook_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/webhook"
+
+    def start(self) -> "FakeSofascoreServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._serve(self)
+
+            def do_POST(self):
+                server._serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-sofascore", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def advance(self):
+        with self._lock:
+            self.round += 1
+
+    def settle(self):
+        with self._lock:
+            self.settled = True
+
+    def _predictions_body(self, user_id: str) -> bytes:
+        key = (user_id, self.round, self.settled)
+        body = self._cache.get(key)
+        if body is not None:
+            return body
+
+        now = int(time.time())
+        items = []
+        for i, p in enumerate(self._predictions):
+            items.append((f"{user_id}-{i}", p))
+        for r in range(1, self.round + 1):
+            for j in range(self.new_bets_per_round):
+                p = self._predictions[(r + j) % len(self._predictions)]
+                items.append((f"{user_id}-r{r}-{j}", p))
+
+        predictions = []
+        for n, (pid, template) in enumerate(items):
+            p = copy.deepcopy(template)
+            p["id"] = pid
+            p["eventId"] = int(template["eventId"]) + n
+            if self.settled:
+                p["status"] = {"code": 100, "description": "Ended", "type": "finished"}
+                p["correct"] = 1 if n % 2 == 0 else -1
+            elif template.get("status", {}).get("type") != "finished":
+                p["startDateTimestamp"] = now + 3600 + 600 * n
+                if n == 0 and self.round % 2 == 1:
+                    # Move the line on the first bet every other round
+                    odds = float(template["odds"]["decimalValue"]) * 1.25
+                    p["odds"] = {"decimalValue": f"{odds:.2f}"}
+            predictions.append(p)
+
+        body = json.dumps({"predictions": predictions}).encode()
+        self._cache[key] = body
+        return body
+
+    def _gzipped(self, body: bytes) -> bytes:
+        cached = self._gzip_cache.get(id(body))
+        if cached is None or cached[0] is not body:
+            cached = (body, gzip.compress(body, compresslevel=6))
+            self._gzip_cache[id(body)] = cached
+        return cached[1]
+
+    def _serve(self, handler: BaseHTTPRequestHandler):
+        cpu_start = time.thread_time()
+        path = handler.path.split("?", 1)[0]
+        with self._lock:
+            self.requests += 1
+            throttled = self._rng.random() < self.rate_429
+
+        if handler.command == "POST":
+            length = int(handler.headers.get("Content-Length") or 0)
+            handler.rfile.read(length)
+            with self._lock:
+                self.webhook_posts += 1
+            status, body = 204, b""
+        elif throttled:
+            status, body = 429, b'{"error": {"code": 429}}'
+        elif path.endswith("/vote-ranking"):
+            status, body = 200, self._ranking_body
+        elif path.endswith("/predictions"):
+            status, body = 200, self._predictions_body(path.rstrip("/").split("/")[-2])
+        else:
+            status, body = 404, b'{"error": {"code": 404}}'
+
+        encoding = None
+        if self.compress and len(body) > 256 and "gzip" in (handler.headers.get("Accept-Encoding") or ""):
+            encoding, wire = "gzip", self._gzipped(body)
+        else:
+            wire = body
+
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            if handler.command == "GET":
+                self.wire_bytes += len(wire)
+                self.decoded_bytes += len(body)
+            self.cpu_seconds += time.thread_time() - cpu_start
+
+        if self.latency and handler.command == "GET":
+            time.sleep(self.latency)
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        if encoding:
+            handler.send_header("Content-Encoding", encoding)
+        handler.send_header("Content-Length", str(len(wire)))
+        handler.end_headers()
+        if wire:
+            handler.wfile.write(wire)
+
+
+@dataclass
+class BenchmarkResult:
+    users: int
+    cycles: int
+    requests: int
+    status_counts: Dict[int, int]
+    webhook_posts: int
+    wall_seconds: float
+    requests_per_second: float
+    cycle_seconds: List[float] = field(default_factory=list)
+    cycle_p50: float = 0.0
+    cycle_max: float = 0.0
+    resolve_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    cpu_percent: float = 0.0
+    rss_mb: float = 0.0
+    peak_rss_mb: float = 0.0
+    wire_bytes: int = 0
+    decoded_bytes: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def summary(self) -> str:
+        return (
+            f"users={self.users} cycles={self.cycles} requests={self.requests} "
+            f"({self.requests_per_second:.1f} req/s) webhook_posts={self.webhook_posts}\n"
+            f"cycle p50={self.cycle_p50:.3f}s max={self.cycle_max:.3f}s resolve={self.resolve_seconds:.3f}s\n"
+            f"cpu={self.cpu_seconds:.2f}s ({self.cpu_percent:.1f}% of one core) "
+            f"rss={self.rss_mb:.1f}MB peak={self.peak_rss_mb:.1f}MB\n"
+            f"api bodies: {self.wire_bytes / 1024:.0f}KB on the wire, {self.decoded_bytes / 1024:.0f}KB decoded "
+            f"({self.wire_bytes / self.decoded_bytes if self.decoded_bytes else 0:.0%})\n"
+            f"status={self.status_counts}"
+        )
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_benchmark(users: int = 10, cycles: int = 3, latency_ms: float = 0.0, rate_429: float = 0.0,
+                        new_bets_per_round: int = 1, db_path: Optional[str] = None, seed: int = 0,
+                        fixtures_dir: Optional[Path] = None, storage_url: Optional[str] = None,
+                        compress: bool = True) -> BenchmarkResult:
+    """Run `cycles` monitor cycles plus one resolution pass against the fake server.
+
+    `storage_url` selects another backend (e.g. "memory://"); default is SQLite at `db_path`.
+    """
+    from . import notifications
+    from .client import SofascoreClient
+    from .monitor import Monitor
+    from .storage import create_storage
+
+    server = FakeSofascoreServer(users, latency_ms, rate_429, new_bets_per_round, seed, fixtures_dir,
+                                 compress).start()
+    tmp_dir = None
+    if db_path is None and storage_url is None:
+        tmp_dir = tempfile.TemporaryDirectory(prefix="sofascore-bench-")
+        db_path = str(Path(tmp_dir.name) / "bench.db")
+
+    try:
+        # Alerts go to the fake webhook, never to the configured Discord channel
+        with mock.patch.multiple(notifications, DISCORD_WEBHOOK_URL=server.webhook_url,
+                                 DISCORD_HEALTH_WEBHOOK_URL="", TELEGRAM_BOT_TOKEN="", ALERT_WEBHOOK_URLS=[],
+                                 ALERT_LOG_PATH="", ENABLE_CONSOLE_LOGS=False, ENABLE_DESKTOP_NOTIFICATIONS=False,
+                                 ALERT_WINDOW_SECONDS=0):
+            monitor = Monitor(
+                use_auto_discovery=False,
+                client=SofascoreClient(base_url=server.base_url),
+                storage=create_storage(storage_url or db_path),
+            )
+            await monitor.storage.open()
+            monitor.start_notifier()
+            await asyncio.sleep(0)  # Let the sink workers start
+            monitor.users = []
+            await monitor.discover_users(limit=users)
+
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            cycle_times = []
+            for _ in range(cycles):
+                start = time.perf_counter()
+                await monitor.check_all_users()
+                cycle_times.append(time.perf_counter() - start)
+                server.advance()
+
+            server.settle()
+            start = time.perf_counter()
+            await monitor.resolve_pending_bets()
+            resolve_seconds = time.perf_counter() - start
+
+            await monitor.outbox.drain()
+            wall = time.perf_counter() - wall_start
+            cpu = max(time.process_time() - cpu_start - server.cpu_seconds, 0.0)
+            monitor.request_shutdown()
+            await asyncio.gather(*monitor._background_tasks, return_exceptions=True)
+            await monitor.storage.close()
+    finally:
+        server.stop()
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+    return BenchmarkResult(
+        users=len(monitor.users),
+        cycles=cycles,
+        requests=server.requests,
+        status_counts=dict(sorted(server.status_counts.items())),
+        webhook_posts=server.webhook_posts,
+        wall_seconds=wall,
+        requests_per_second=server.requests / wall if wall else 0.0,
+        cycle_seconds=cycle_times,
+        cycle_p50=statistics.median(cycle_times) if cycle_times else 0.0,
+        cycle_max=max(cycle_times) if cycle_times else 0.0,
+        resolve_seconds=resolve_seconds,
+        cpu_seconds=cpu,
+        cpu_percent=(cpu / wall * 100) if wall else 0.0,
+        rss_mb=current_rss_mb(),
+        peak_rss_mb=peak_rss_mb(),
+        wire_bytes=server.wire_bytes,
+        decoded_bytes=server.decoded_bytes,
+    )
+
+
+SEEN_LAYOUTS = {
+    # Pre-v4 schema: TEXT key + rowid + two secondary indexes
+    "text_rowid": (
+        "CREATE TABLE seen_bets (id TEXT PRIMARY KEY, user_id TEXT, created_at INTEGER)",
+        ["CREATE INDEX idx_seen_bets_user ON seen_bets(user_id)",
+         "CREATE INDEX idx_seen_bets_created ON seen_bets(created_at)"],
+    ),
+    # Current schema (migration v4)
+    "int_without_rowid": (
+        "CREATE TABLE seen_bets (key INTEGER PRIMARY KEY, created_at INTEGER NOT NULL) WITHOUT ROWID",
+        ["CREATE INDEX idx_seen_bets_created ON seen_bets(created_at)"],
+    ),
+}
+
+
+def compare_seen_layouts(rows: int = 200_000, batch: int = 1000, lookups: int = 50_000,
+                         workdir: Optional[str] = None) -> Dict[str, dict]:
+    """Insert `rows` synthetic bet ids into each seen_bets layout; report file size and timings."""
+    import os
+    import sqlite3
+    from .keys import seen_key
+
+    rng = random.Random(0)
+    ids = [f"{rng.randrange(10**7, 10**8)}_{rng.choice('1X2')}{i}" for i in range(rows)]
+    user = "5dadb1036996486450251cb6"
+    start_ts = int(time.time())
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="sofascore-seen-", dir=workdir) as tmp:
+        for name, (ddl, indexes) in SEEN_LAYOUTS.items():
+            path = os.path.join(tmp, f"{name}.db")
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(ddl)
+            for sql in indexes:
+                conn.execute(sql)
+            compact = name != "text_rowid"
+
+            t0 = time.perf_counter()
+            for i in range(0, rows, batch):
+                ts = start_ts + i // batch  # ~one batch per second, like a live poll loop
+                chunk = ids[i:i + batch]
+                if compact:
+                    conn.executemany("INSERT OR IGNORE INTO seen_bets VALUES (?, ?)",
+                                     [(seen_key(b), ts) for b in chunk])
+                else:
+                    conn.executemany("INSERT OR IGNORE INTO seen_bets VALUES (?, ?, ?)",
+                                     [(b, user, ts) for b in chunk])
+                conn.commit()
+            insert_seconds = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            for b in ids[:lookups]:
+                if compact:
+                    conn.execute("SELECT 1 FROM seen_bets WHERE key = ?", (seen_key(b),)).fetchone()
+                else:
+                    conn.execute("SELECT 1 FROM seen_bets WHERE id = ?", (b,)).fetchone()
+            lookup_seconds = time.perf_counter() - t0
+
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            pages = conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            conn.close()
+            results[name] = {
+                "size_mb": round(pages * page_size / (1024 * 1024), 2),
+                "insert_seconds": round(insert_seconds, 3),
+                "lookup_us": round(lookup_seconds / max(min(lookups, rows), 1) * 1e6, 2),
+            }
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline Sofascore Monitor benchmark")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Per-request latency of the fake API")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of API requests answered with 429")
+    parser.add_argument("--new-bets", type=int, default=1, help="New predictions per user per cycle")
+    parser.add_argument("--db", default=None, help="SQLite path (default: temporary file)")
+    parser.add_argument("--storage", default=None, help="Storage URL instead of --db, e.g. memory://")
+    parser.add_argument("--fixtures", type=Path, default=None, help="Directory with recorded payloads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-compression", action="store_true", help="Serve API responses uncompressed")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    parser.add_argument("--seen-layouts", type=int, metavar="ROWS", default=0,
+                        help="Only compare seen_bets storage layouts with ROWS synthetic ids")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.seen_layouts:
+        layouts = compare_seen_layouts(rows=args.seen_layouts)
+        if args.json:
+            print(json.dumps(layouts, indent=2))
+        else:
+            for name, row in layouts.items():
+                print(f"{name:>18}: {row['size_mb']:8.2f}MB insert={row['insert_seconds']:.2f}s "
+                      f"lookup={row['lookup_us']:.1f}us")
+        return layouts
+    result = asyncio.run(run_benchmark(
+        users=args.users, cycles=args.cycles, latency_ms=args.latency_ms, rate_429=args.rate_429,
+        new_bets_per_round=args.new_bets, db_path=args.db, seed=args.seed, fixtures_dir=args.fixtures,
+        storage_url=args.storage, compress=not args.no_compression,
+    ))
+    print(json.dumps(result.to_dict(), indent=2) if args.json else result.summary())
+    return result
+
+
+if __name__ == "__main__":
+    main()
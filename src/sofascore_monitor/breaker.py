@@ -0,0 +1,125 @@
+"""
+Circuit breakers for API polling.
+
+One circuit per key (a user id, or an endpoint label for the client):
+
+- closed:    requests flow; consecutive failures are counted
+- open:      `threshold` consecutive failures trip it; requests are skipped
+             until the backoff expires (base * 2^(failures - threshold),
+             capped, with jitter so circuits opened together don't retry
+             together)
+- half-open: the backoff expired; exactly one trial request is let through.
+             Success closes the circuit, failure re-opens it for longer.
+
+All decisions are in memory on the event loop, so the hot path does no I/O.
+`on_change` fires on state transitions only (trip, re-open, close); the
+monitor uses it to persist user circuits to `user_status` in the background.
+"""
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+@dataclass
+class Circuit:
+    failures: int = 0                   # Consecutive
+    open_until: Optional[float] = None  # Epoch seconds; None while closed
+    probing: bool = False               # Half-open trial request in flight
+
+    def state(self, now: float) -> str:
+        if self.open_until is None:
+            return CLOSED
+        return OPEN if now < self.open_until else HALF_OPEN
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, base_seconds: float, max_seconds: float, jitter: float = 0.2,
+                 on_change: Optional[Callable[[str, Circuit], None]] = None,
+                 clock: Callable[[], float] = time.time):
+        self.threshold = max(threshold, 1)
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.jitter = jitter
+        self.on_change = on_change
+        self.clock = clock
+        self.circuits: Dict[str, Circuit] = {}
+
+    def state(self, key: str) -> str:
+        circuit = self.circuits.get(key)
+        return circuit.state(self.clock()) if circuit else CLOSED
+
+    def ready(self, key: str) -> bool:
+        """Would a request be let through now? Unlike `allow`, does not take the half-open trial slot."""
+        circuit = self.circuits.get(key)
+        if circuit is None:
+            return True
+        state = circuit.state(self.clock())
+        return state == CLOSED or (state == HALF_OPEN and not circuit.probing)
+
+    def allow(self, key: str) -> bool:
+        """Take permission for one request. Pair it with `success`, `failure` or `release`."""
+        circuit = self.circuits.get(key)
+        if circuit is None:
+            return True
+        state = circuit.state(self.clock())
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not circuit.probing:
+            circuit.probing = True
+            return True
+        return False
+
+    def release(self, key: str):
+        """The permitted request was not made after all: free the half-open trial slot."""
+        circuit = self.circuits.get(key)
+        if circuit:
+            circuit.probing = False
+
+    def success(self, key: str):
+        circuit = self.circuits.get(key)
+        if circuit is None:
+            return
+        was_open = circuit.open_until is not None
+        del self.circuits[key]
+        if was_open:
+            logger.info(f"Circuit {key} closed.")
+            self._changed(key, Circuit())
+
+    def failure(self, key: str, min_seconds: float = 0.0):
+        """Count a failure; trips (or re-opens) the circuit at the threshold for at least `min_seconds`."""
+        circuit = self.circuits.setdefault(key, Circuit())
+        circuit.failures += 1
+        circuit.probing = False
+        if circuit.failures < self.threshold:
+            return
+        seconds = max(self.backoff(circuit.failures), min_seconds)
+        circuit.open_until = self.clock() + seconds
+        logger.warning(f"Circuit {key} open for {seconds:.0f}s after {circuit.failures} consecutive failures.")
+        self._changed(key, circuit)
+
+    def backoff(self, failures: int) -> float:
+        exponent = min(failures - self.threshold, 32)  # 2**32 * base is past any sane cap
+        seconds = min(self.base_seconds * 2 ** exponent, self.max_seconds)
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def restore(self, key: str, failures: int, open_until: Optional[float]):
+        """Seed a circuit from persisted state (no `on_change`)."""
+        if failures > 0 or open_until is not None:
+            self.circuits[key] = Circuit(failures=failures, open_until=open_until)
+
+    def open_keys(self):
+        now = self.clock()
+        return sorted(k for k, c in self.circuits.items() if c.state(now) == OPEN)
+
+    def _changed(self, key: str, circuit: Circuit):
+        if self.on_change:
+            try:
+                self.on_change(key, circuit)
+            except Exception as e:
+                logger.error(f"Circuit change callback failed for {key}: {e}")
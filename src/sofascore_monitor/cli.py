@@ -0,0 +1,386 @@
+"""
+Command-line interface.
+
+    sofascore-monitor [run]                 the monitor (default command)
+    sofascore-monitor discover --limit 20   top predictors that pass the discovery filters
+    sofascore-monitor inspect-user ID ...   predictions, rank and pause state of users
+    sofascore-monitor search QUERY ...      Sofascore search (user, team and player ids)
+    sofascore-monitor resolve               settle pending alerted bets once
+    sofascore-monitor stats                 ROI of the alerted bets
+    sofascore-monitor bench --users 50      offline benchmark (see bench.py)
+    sofascore-monitor compact               one retention/archival pass
+    sofascore-monitor replay --speed 0      archived API responses through the monitor
+    sofascore-monitor backtest --grid min_roi=0:20:5   filter/alert settings against the archive
+
+`python -m sofascore_monitor` and `python -m sofascore_monitor.main` are the
+same entry point. The one-shot commands share one client and one storage
+connection (`Session`) and issue their API requests concurrently. Modules
+are imported per command, so `--help` and the quick commands start fast.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Awaitable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+MAX_CONCURRENT_REQUESTS = 5  # Same bound as the monitor's http_semaphore
+
+
+def configure_logging(level: int, log_file: Optional[str] = None):
+    # Force UTF-8 for Windows console
+    if sys.platform == "win32":
+        sys.stdout.reconfigure(encoding="utf-8")
+        sys.stderr.reconfigure(encoding="utf-8")
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+    logging.basicConfig(level=level, format=LOG_FORMAT, handlers=handlers)
+
+
+class Session:
+    """The client and storage shared by one command."""
+
+    def __init__(self, storage_url: Optional[str] = None):
+        from .client import SofascoreClient
+        from .config import DB_PATH, STORAGE_URL
+        from .storage import create_storage
+
+        self.client = SofascoreClient()
+        self.storage = create_storage(storage_url or STORAGE_URL or DB_PATH)
+        self._semaphore = asyncio.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+    async def __aenter__(self) -> "Session":
+        await self.storage.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.storage.close()
+
+    def monitor(self, **kwargs):
+        from .monitor import Monitor
+        return Monitor(client=self.client, storage=self.storage, **kwargs)
+
+    async def fetch_all(self, requests: List[Awaitable]) -> List[Any]:
+        """Await API requests concurrently (at most MAX_CONCURRENT_REQUESTS in flight), in order."""
+        async def bounded(request):
+            async with self._semaphore:
+                return await request
+        return await asyncio.gather(*(bounded(r) for r in requests))
+
+
+def _print(data, as_json: bool, lines: List[str]):
+    print(json.dumps(data, indent=2, default=str) if as_json else "\n".join(lines))
+
+
+def _parse_assignments(pairs: List[str]) -> Dict[str, str]:
+    changes = {}
+    for pair in pairs:
+        name, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"expected NAME=VALUE, got {pair!r}")
+        changes[name.strip().lower()] = value.strip()
+    return changes
+
+
+# --- Commands ---
+
+def cmd_run(args) -> int:
+    from .config import DB_PATH, STORAGE_URL
+    from .monitor import Monitor
+    from .storage import create_storage
+
+    try:
+        monitor = Monitor(use_auto_discovery=not args.no_discovery,
+                          storage=create_storage(args.storage or STORAGE_URL or DB_PATH))
+        asyncio.run(monitor.run())  # Returns after a graceful SIGTERM/SIGINT shutdown
+    except KeyboardInterrupt:
+        print("\nStopping monitor...")
+    except Exception as e:
+        logger.error(f"Fatal error: {e}", exc_info=True)
+        return 1  # Non-zero so systemd's Restart=on-failure kicks in
+    return 0
+
+
+async def cmd_discover(session: Session, args) -> int:
+    monitor = session.monitor(use_auto_discovery=True)
+    monitor.users = []  # List everyone who qualifies, configured TARGET_USERS included
+    try:
+        monitor.apply_settings(monitor.settings.updated(_parse_assignments(args.set)))
+    except ValueError as e:
+        print(f"Invalid setting: {e}", file=sys.stderr)
+        return 2
+    await monitor.discover_users(args.limit)
+    users = [asdict(u) for u in monitor.users]
+    _print(users, args.json, [
+        f"{i + 1:>3}. {u['name']:<24} {u['id']:<26} ROI {u['roi'] or 0:6.1f}%  "
+        f"Win {u['win_rate'] or 0:4.0f}%  P&L {u['profit'] or 0:+7.1f}  Current ROI {u['current_roi'] or 0:6.1f}%"
+        for i, u in enumerate(users)
+    ] or ["No predictors passed the filters."])
+    return 0 if users else 1
+
+
+async def cmd_inspect_user(session: Session, args) -> int:
+    client, storage = session.client, session.storage
+    ranking, predictions, statuses, seen = await asyncio.gather(
+        client.get_top_predictors(),
+        session.fetch_all([client.get_user_predictions(uid) for uid in args.user_ids]),
+        storage.load_user_statuses(),
+        asyncio.gather(*(storage.is_seen(bet_id) for bet_id in args.bet)),
+    )
+    ranks = {str(row.get("id")): (i + 1, row.get("nickname")) for i, row in enumerate((ranking or {}).get("ranking", []))}
+
+    now = time.time()
+    report, lines = {"users": [], "bets": dict(zip(args.bet, seen))}, []
+    for uid, data in zip(args.user_ids, predictions):
+        failures, paused_until = statuses.get(uid, (0, None))
+        rank, name = ranks.get(uid, (None, None))
+        preds = (data or {}).get("predictions", [])
+        user = {
+            "id": uid, "name": name, "rank": rank, "fetched": data is not None, "predictions": len(preds),
+            "upcoming": sum(1 for p in preds if (p.get("startDateTimestamp") or 0) > now),
+            "failures": failures, "paused_until": paused_until,
+        }
+        if args.raw:
+            user["raw"] = preds
+        report["users"].append(user)
+
+        lines.append(f"{name or uid} ({uid})")
+        lines.append(f"  Leaderboard rank: {f'#{rank}' if rank else 'not in the fetched ranking'}")
+        lines.append(f"  Predictions: {len(preds)} ({user['upcoming']} upcoming)" if data is not None
+                     else "  Predictions: request failed")
+        lines.append(f"  Failures: {failures}" + (f", paused until {paused_until}" if paused_until else ""))
+        if args.raw and preds:
+            lines.append(json.dumps(preds[0], indent=2))
+    for bet_id, is_seen in report["bets"].items():
+        lines.append(f"Bet {bet_id}: {'seen' if is_seen else 'NOT seen'}")
+    _print(report, args.json, lines)
+    return 0 if all(u["fetched"] for u in report["users"]) else 1
+
+
+async def cmd_search(session: Session, args) -> int:
+    results = await session.fetch_all([session.client.search(q) for q in args.queries])
+    report = {
+        q: [{"type": r.get("type", ""), "id": (r.get("entity") or {}).get("id"),
+             "name": (r.get("entity") or {}).get("name")} for r in (data or {}).get("results", [])]
+        for q, data in zip(args.queries, results)
+    }
+    lines = []
+    for q, found in report.items():
+        lines.append(f"{q}: {len(found)} results")
+        lines.extend(f"  {r['type']:<12} {r['name']} ({r['id']})" for r in found)
+    _print(report, args.json, lines)
+    return 0 if all(data is not None for data in results) else 1
+
+
+async def cmd_resolve(session: Session, args) -> int:
+    await session.monitor(use_auto_discovery=False).resolve_pending_bets()
+    return await cmd_stats(session, args)
+
+
+async def cmd_stats(session: Session, args) -> int:
+    roi, pending = await asyncio.gather(session.storage.get_roi_stats(), session.storage.get_pending_bets())
+    stats = {**roi, "pending": len(pending)}
+    _print(stats, args.json, [
+        f"Settled bets: {stats['total_bets']} ({stats['wins']} won, {stats['win_rate']:.1f}%)",
+        f"Profit: {stats['profit']:+.2f} units (ROI {stats['roi']:+.2f}%)",
+        f"Pending: {stats['pending']}",
+    ])
+    return 0
+
+
+async def cmd_compact(session: Session, args) -> int:
+    from .compaction import Compactor
+    from .config import ARCHIVE_AFTER_DAYS, COMPACTION_BATCH_SIZE, RETENTION_DAYS
+
+    compactor = Compactor(session.storage, args.retention_days or RETENTION_DAYS,
+                          args.archive_after_days or ARCHIVE_AFTER_DAYS, COMPACTION_BATCH_SIZE)
+    stats = await compactor.run_once()
+    _print(stats, args.json, [f"{name}: {count}" for name, count in stats.items()])
+    return 0
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _archive_path(args) -> Optional[str]:
+    from .config import RESPONSE_ARCHIVE_PATH
+
+    path = args.archive or RESPONSE_ARCHIVE_PATH
+    if not path or not os.path.exists(path):
+        print(f"No response archive at {path or '(RESPONSE_ARCHIVE_PATH is not set)'}", file=sys.stderr)
+        return None
+    return path
+
+
+def cmd_replay(args) -> int:
+    from .archive import ResponseArchive, replay
+
+    path = _archive_path(args)
+    if not path:
+        return 2
+    archive = ResponseArchive(path)
+    try:
+        if args.stats:
+            stats = archive.stats()
+            _print(stats, args.json, [f"{name}: {value}" for name, value in stats.items()])
+            return 0
+        # Alerts are collected, never sent; state goes to memory unless --storage says otherwise
+        result = asyncio.run(replay(archive, args.speed, _timestamp(args.since), _timestamp(args.until),
+                                    args.storage or "memory://"))
+    finally:
+        archive.close()
+    if args.alerts:
+        with open(args.alerts, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(alert, default=str) + "\n" for alert in result.alerts)
+    print(json.dumps(result.to_dict(), indent=2, default=str) if args.json else result.summary())
+    return 0
+
+
+def cmd_backtest(args) -> int:
+    from .archive import ResponseArchive
+    from .backtest import Dataset, best, parse_grid, run_backtest
+    from .settings import Settings
+
+    path = _archive_path(args)
+    if not path:
+        return 2
+    try:
+        configs = parse_grid(args.grid, Settings.load())  # Parameters not on the grid keep their current values
+    except ValueError as e:
+        print(f"Invalid grid: {e}", file=sys.stderr)
+        return 2
+    archive = ResponseArchive(path)
+    try:
+        dataset = Dataset.from_archive(archive, _timestamp(args.since), _timestamp(args.until))
+    finally:
+        archive.close()
+
+    start = time.perf_counter()
+    results = best(run_backtest(dataset, configs, args.workers), args.min_bets)
+    elapsed = time.perf_counter() - start
+    summary = dataset.summary()
+    _print({"dataset": summary, "configs": len(configs), "seconds": elapsed, "results": [r.to_dict() for r in results]},
+           args.json, [
+               " ".join(f"{name}={value}" for name, value in summary.items()),
+               f"{len(configs)} configurations in {elapsed:.2f}s; {len(results)} with >= {args.min_bets} settled alerts",
+               *(r.summary() for r in results[:args.top]),
+           ])
+    return 0
+
+
+def cmd_bench(args) -> int:
+    from . import bench
+    bench.main(args.bench_args)
+    return 0
+
+
+ASYNC_COMMANDS = {
+    "discover": cmd_discover,
+    "inspect-user": cmd_inspect_user,
+    "search": cmd_search,
+    "resolve": cmd_resolve,
+    "stats": cmd_stats,
+    "compact": cmd_compact,
+}
+
+
+async def run_command(args) -> int:
+    async with Session(args.storage) as session:
+        return await ASYNC_COMMANDS[args.command](session, args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="sofascore-monitor", description="Sofascore leaderboard monitor")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log at INFO (DEBUG for run)")
+    parser.add_argument("--storage", default=None, help="Storage URL or SQLite path (default: STORAGE_URL / DB_PATH)")
+    parser.add_argument("--log-file", default=None, help="Also write the log to this file")
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    run = sub.add_parser("run", help="Run the monitor (default)")
+    run.add_argument("--no-discovery", action="store_true", help="Only poll TARGET_USERS")
+
+    discover = sub.add_parser("discover", help="List top predictors that pass the discovery filters")
+    discover.add_argument("--limit", type=int, default=None, help="Default: TOP_PREDICTORS_LIMIT")
+    discover.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                          help="Override a runtime setting for this run, e.g. --set min_roi=5")
+
+    inspect = sub.add_parser("inspect-user", help="Predictions, leaderboard rank and pause state of users")
+    inspect.add_argument("user_ids", nargs="+", metavar="USER_ID")
+    inspect.add_argument("--bet", action="append", default=[], metavar="BET_ID", help="Also check if a bet was seen")
+    inspect.add_argument("--raw", action="store_true", help="Include the raw predictions")
+
+    search = sub.add_parser("search", help="Sofascore search, e.g. to find a user's id")
+    search.add_argument("queries", nargs="+", metavar="QUERY")
+
+    sub.add_parser("resolve", help="Settle pending alerted bets once and print the ROI")
+    sub.add_parser("stats", help="ROI of the alerted bets")
+
+    compact = sub.add_parser("compact", help="Run one retention and archival pass")
+    compact.add_argument("--retention-days", type=int, default=None)
+    compact.add_argument("--archive-after-days", type=int, default=None)
+
+    replay_cmd = sub.add_parser("replay", help="Feed archived API responses through the monitor")
+    replay_cmd.add_argument("archive", nargs="?", default=None, help="Default: RESPONSE_ARCHIVE_PATH")
+    replay_cmd.add_argument("--speed", type=float, default=0.0,
+                            help="Times real time, e.g. 60 (default 0: as fast as possible)")
+    replay_cmd.add_argument("--since", default=None, help="ISO time or epoch seconds")
+    replay_cmd.add_argument("--until", default=None, help="ISO time or epoch seconds")
+    replay_cmd.add_argument("--alerts", default=None, metavar="FILE", help="Write the replayed alerts as JSON Lines")
+    replay_cmd.add_argument("--stats", action="store_true", help="Only print archive size and dedup figures")
+    replay_cmd.add_argument("--json", action="store_true", help="Print JSON")
+
+    backtest = sub.add_parser("backtest", help="ROI of filter/alert settings over the response archive")
+    backtest.add_argument("archive", nargs="?", default=None, help="Default: RESPONSE_ARCHIVE_PATH")
+    backtest.add_argument("--grid", action="append", default=[], metavar="NAME=VALUES",
+                          help="Values to try, e.g. min_roi=0,5,10 or min_avg_odds=1.5:2.0:0.1 (repeatable)")
+    backtest.add_argument("--since", default=None, help="ISO time or epoch seconds")
+    backtest.add_argument("--until", default=None, help="ISO time or epoch seconds")
+    backtest.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count)")
+    backtest.add_argument("--min-bets", type=int, default=1, help="Skip configurations with fewer settled alerts")
+    backtest.add_argument("--top", type=int, default=20, help="Configurations to print")
+    backtest.add_argument("--json", action="store_true", help="Print JSON (all configurations)")
+
+    # Its options are passed through to bench.main unparsed
+    sub.add_parser("bench", help="Offline benchmark (options as `python -m sofascore_monitor.bench`)", add_help=False)
+
+    for name in ASYNC_COMMANDS:
+        sub.choices[name].add_argument("--json", action="store_true", help="Print JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command is None:
+        args, extra = parser.parse_known_args([*argv, "run"])
+    if args.command == "bench":
+        args.bench_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    if args.command == "run":
+        configure_logging(logging.DEBUG if args.verbose else logging.INFO, args.log_file)
+        return cmd_run(args)
+    configure_logging(logging.INFO if args.verbose else logging.WARNING, args.log_file)
+    if args.command == "bench":
+        return cmd_bench(args)
+    if args.command == "replay":
+        return cmd_replay(args)
+    if args.command == "backtest":
+        return cmd_backtest(args)
+    return asyncio.run(run_command(args))
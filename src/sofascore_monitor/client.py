@@ -1,69 +1,190 @@
 import asyncio
 import logging
+import threading
+import time
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
-try:
-    from curl_cffi import requests as curl_requests
-    HAS_CURL = True
-except ImportError:
-    import requests
-    HAS_CURL = False
-
-from .config import PROXY_URL, USER_AGENT
+from .breaker import CLOSED, OPEN, Circuit, CircuitBreaker
+from .config import (
+    PROXY_URL, USER_AGENT, SOFASCORE_BASE_URL, BREAKER_BASE_SECONDS, BREAKER_MAX_SECONDS, ENDPOINT_BREAKER_THRESHOLD
+)
+from .metrics import (
+    CIRCUIT_REJECTIONS_TOTAL, CIRCUIT_TRANSITIONS_TOTAL, HTTP_DECODED_BYTES_TOTAL, HTTP_PARSE_SECONDS,
+    HTTP_REQUEST_SECONDS, HTTP_RESPONSES_TOTAL, HTTP_WIRE_BYTES_TOTAL, endpoint_label
+)
+from .templates import loads
+from .tracing import tracer
 
 logger = logging.getLogger(__name__)
 
 class UserNotFoundError(Exception):
     pass
 
+
+@lru_cache(maxsize=None)
+def _transport():
+    """(requests-compatible module, is_curl). Imported on first use: curl_cffi alone costs ~100ms at startup."""
+    try:
+        from curl_cffi import requests as curl_requests
+        return curl_requests, True
+    except ImportError:
+        import requests
+        return requests, False
+
+
+# Chrome 120 sends exactly "gzip, deflate, br" (zstd arrived in Chrome 123). curl_cffi's impersonation
+# already does, and libcurl decodes all three; the requests fallback advertises the same list minus
+# br when no brotli decoder is installed, so neither transport asks for something off-fingerprint.
+CHROME_ENCODINGS = ("gzip", "deflate", "br")
+
+
+@lru_cache(maxsize=None)
+def accept_encoding() -> str:
+    """Accept-Encoding for the requests fallback."""
+    encodings = list(CHROME_ENCODINGS)
+    try:
+        import brotli  # noqa: F401  (urllib3 decodes br with brotli or brotlicffi)
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            encodings.remove("br")
+    return ", ".join(encodings)
+
+
+def wire_size(response, is_curl: bool) -> int:
+    """Body bytes as transferred, before content decoding."""
+    if is_curl:
+        return int(response.download_size)
+    try:
+        return response.raw.tell()  # urllib3 counts raw bytes read off the socket
+    except (AttributeError, ValueError):
+        return int(response.headers.get("Content-Length") or len(response.content))
+
+
+def predictions_endpoint(user_id: str, page: int = 0) -> str:
+    if isinstance(user_id, str) and len(str(user_id)) > 15:
+         return f"/user-account/{user_id}/predictions?page={page}"
+    return f"/user/{user_id}/predictions?page={page}"
+
+
+def _count_transition(label: str, circuit: Circuit):
+    CIRCUIT_TRANSITIONS_TOTAL.inc(scope="endpoint", state=OPEN if circuit.open_until is not None else CLOSED)
+
+
 class SofascoreClient:
-    def __init__(self):
-        self.base_url = "https://www.sofascore.com/api/v1"
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url or SOFASCORE_BASE_URL
+        self.archive = None  # ResponseArchive: successful bodies are recorded there (see archive.py)
         self.headers = {
             "Accept": "application/json",
             "Referer": "https://www.sofascore.com/",
             # UA is handled by impersonate, but we can set a fallback or specific one if needed
         }
-        
+        self._session = None  # Created on the first request
+        self._session_lock = threading.Lock()  # Fetches run on worker threads
+
+        # One circuit per endpoint class: a failing endpoint is not hammered by every user in the cycle
+        self.breaker = CircuitBreaker(
+            ENDPOINT_BREAKER_THRESHOLD, BREAKER_BASE_SECONDS, BREAKER_MAX_SECONDS, on_change=_count_transition
+        )
+
         # Proxy Configuration
         self.proxy = None
-        if PROXY_URL:
-             self.proxy = PROXY_URL
-             logger.info(f"Using Proxy: {PROXY_URL.split('@')[-1]}")
-
-        if HAS_CURL:
-            # Use chrome120 impersonation
-            self.session = curl_requests.Session(impersonate="chrome120")
-            if self.proxy:
-                self.session.proxies = {"http": self.proxy, "https": self.proxy}
-        else:
-             self.session = requests.Session()
-             self.session.headers.update(self.headers)
-             self.session.headers["User-Agent"] = USER_AGENT
-             if self.proxy:
-                 self.session.proxies = {"http": self.proxy, "https": self.proxy}
+        self.set_proxy(PROXY_URL)
+
+    @property
+    def session(self):
+        with self._session_lock:
+            if self._session is None:
+                module, is_curl = _transport()
+                if is_curl:
+                    # Use chrome120 impersonation
+                    session = module.Session(impersonate="chrome120")
+                else:
+                    session = module.Session()
+                    session.headers.update(self.headers)
+                    session.headers["User-Agent"] = USER_AGENT
+                    session.headers["Accept-Encoding"] = accept_encoding()
+                self._session = session
+                self._apply_proxy()
+            return self._session
+
+    def set_proxy(self, proxy_url: str):
+        """Route requests through `proxy_url` ("" for direct). Takes effect on the next request."""
+        if proxy_url == (self.proxy or ""):
+            return
+        self.proxy = proxy_url or None
+        if self._session is not None:
+            self._apply_proxy()
+        if proxy_url:
+            logger.info(f"Using Proxy: {proxy_url.split('@')[-1]}")
+
+    def _apply_proxy(self):
+        self._session.proxies = {"http": self.proxy, "https": self.proxy} if self.proxy else {}
+
+    def available(self, endpoint: str) -> bool:
+        """False while the endpoint's circuit is open (a fetch would return None without a request)."""
+        return self.breaker.ready(endpoint_label(endpoint))
 
     async def fetch(self, endpoint: str) -> Optional[Dict[str, Any]]:
         """
         Fetch data asynchronously using asyncio.to_thread for blocking IO.
+        Returns None on failure, and without a request while the endpoint's circuit is open.
         """
-        return await asyncio.to_thread(self._fetch_sync, endpoint)
+        label = endpoint_label(endpoint)
+        if not self.breaker.allow(label):
+            CIRCUIT_REJECTIONS_TOTAL.inc(endpoint=label)
+            return None
+        ok = False
+        try:
+            with tracer.child_span("http.fetch", endpoint=label):
+                data = await asyncio.to_thread(self._fetch_sync, endpoint)
+            ok = data is not None
+            return data
+        except UserNotFoundError:
+            ok = True  # The endpoint answered; the user is what's missing
+            raise
+        finally:
+            if ok:
+                self.breaker.success(label)
+            else:
+                self.breaker.failure(label)
 
     def _fetch_sync(self, endpoint: str) -> Optional[Dict[str, Any]]:
         url = f"{self.base_url}{endpoint}"
+        label = endpoint_label(endpoint)
+        start = time.perf_counter()
+        status = "error"
         try:
-            if HAS_CURL:
+            session = self.session
+            is_curl = _transport()[1]
+            if is_curl:
                 # curl_cffi session
-                response = self.session.get(
+                response = session.get(
                     url, 
                     headers=self.headers, 
                     timeout=15
                 )
             else:
-                response = self.session.get(url, timeout=10)
+                response = session.get(url, timeout=10)
+            status = str(response.status_code)
+            body = response.content
+            HTTP_WIRE_BYTES_TOTAL.inc(
+                wire_size(response, is_curl), endpoint=label,
+                encoding=(response.headers.get("Content-Encoding") or "identity").lower(),
+            )
+            HTTP_DECODED_BYTES_TOTAL.inc(len(body), endpoint=label)
             
             if response.status_code == 200:
-                return response.json()
+                if self.archive is not None:
+                    self.archive.record(endpoint, body)
+                parse_start = time.perf_counter()
+                with tracer.span("parse_json", bytes=len(body)):
+                    data = loads(body)
+                HTTP_PARSE_SECONDS.observe(time.perf_counter() - parse_start, endpoint=label)
+                return data
             elif response.status_code == 404:
                 raise UserNotFoundError(f"User not found at {endpoint}")
             elif response.status_code == 429:
@@ -80,17 +201,16 @@ class SofascoreClient:
         except Exception as e:
             logger.error(f"Exception fetching {endpoint}: {e}")
             return None
+        finally:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=label)
+            HTTP_RESPONSES_TOTAL.inc(endpoint=label, status=status)
 
     async def search(self, query: str) -> Optional[Dict[str, Any]]:
         endpoint = f"/search/all?q={query}"
         return await self.fetch(endpoint)
 
     async def get_user_predictions(self, user_id: str, page: int = 0) -> Optional[Dict[str, Any]]:
-        if isinstance(user_id, str) and len(str(user_id)) > 15:
-             endpoint = f"/user-account/{user_id}/predictions?page={page}"
-        else:
-             endpoint = f"/user/{user_id}/predictions?page={page}"
-        return await self.fetch(endpoint)
+        return await self.fetch(predictions_endpoint(user_id, page))
 
     async def get_top_predictors(self):
         return await self.fetch("/user-account/vote-ranking")
@@ -0,0 +1,119 @@
+"""
+Cross-user consensus: several monitored predictors backing the same selection.
+
+`ConsensusIndex` is an inverted index (event_id, vote) -> {user_id: weight}
+fed with every active bet as users are polled. Each `add` is a couple of dict
+operations, so the cost per bet does not grow with the number of users. Keys
+that reach `min_users` during a cycle are collected and handed out once by
+`drain()` after the cycle, when every user's picks for it have been counted.
+
+Weight is 1 + ROI/100 of the user's all-time ROI (floored at 0), so a 25% ROI
+predictor counts 1.25. Confidence is the weighted support for the selection
+over the weighted support for every selection on the same event.
+"""
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .models import Bet, User
+
+Key = Tuple[int, str]  # (event_id, vote)
+
+
+def user_weight(user: User) -> float:
+    return 1.0 + max(user.roi or 0.0, 0.0) / 100.0
+
+
+@dataclass
+class Consensus:
+    bet: Bet                    # Latest bet on the selection (match details for the alert)
+    users: List[User]
+    support: float              # Sum of weights backing the selection
+    opposition: float           # Sum of weights on other selections of the same event
+
+    @property
+    def confidence(self) -> float:
+        total = self.support + self.opposition
+        return self.support / total if total > 0 else 0.0
+
+
+class ConsensusIndex:
+    def __init__(self, min_users: int, ttl_seconds: int = 24 * 3600):
+        self.min_users = min_users
+        self.ttl = ttl_seconds
+        self.picks: Dict[Key, Dict[str, float]] = {}        # key -> user_id -> weight
+        self.support: Dict[Key, float] = {}                 # key -> sum of weights
+        self.event_votes: Dict[int, Set[str]] = {}          # event_id -> votes seen
+        self.latest: Dict[Key, Bet] = {}
+        self.users: Dict[str, User] = {}
+        self.expires: Dict[int, float] = {}                 # event_id -> epoch after which it is dropped
+        self.alerted: Set[Key] = set()
+        self._crossed: Set[Key] = set()
+
+    def __len__(self) -> int:
+        return len(self.picks)
+
+    def add(self, bet: Bet, user: User):
+        """Record that `user` backs `bet`'s selection. Idempotent per (event, vote, user)."""
+        if not self.min_users:
+            return
+        key = (bet.event_id, bet.choice_name)
+        uid = str(user.id)
+        self.users[uid] = user
+        self.latest[key] = bet
+        holders = self.picks.setdefault(key, {})
+        if uid not in holders:
+            weight = user_weight(user)
+            holders[uid] = weight
+            self.support[key] = self.support.get(key, 0.0) + weight
+            self.event_votes.setdefault(bet.event_id, set()).add(bet.choice_name)
+            if len(holders) >= self.min_users and key not in self.alerted:
+                self._crossed.add(key)
+        start = bet.start_time.timestamp() if bet.start_time else time.time()
+        self.expires[bet.event_id] = max(self.expires.get(bet.event_id, 0.0), start + self.ttl)
+
+    def _consensus(self, key: Key) -> Consensus:
+        event_id = key[0]
+        opposition = sum(self.support.get((event_id, v), 0.0) for v in self.event_votes[event_id] if v != key[1])
+        users = sorted((self.users[uid] for uid in self.picks[key]), key=user_weight, reverse=True)
+        return Consensus(self.latest[key], users, self.support[key], opposition)
+
+    def drain(self) -> List[Consensus]:
+        """Keys that crossed the threshold since the last drain (each is reported once)."""
+        crossed, self._crossed = self._crossed, set()
+        self.alerted.update(crossed)
+        found = [self._consensus(key) for key in crossed if key in self.picks]
+        return sorted(found, key=lambda c: c.confidence * c.support, reverse=True)
+
+    def top(self, n: int = 20) -> List[Consensus]:
+        keys = sorted(self.picks, key=lambda k: self.support[k], reverse=True)[:n]
+        return [self._consensus(k) for k in keys]
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop events whose match started more than `ttl` ago. Returns the number dropped."""
+        now = time.time() if now is None else now
+        expired = {eid for eid, ts in self.expires.items() if ts < now}
+        if not expired:
+            return 0
+        for event_id in expired:
+            del self.expires[event_id]
+            for vote in self.event_votes.pop(event_id, ()):
+                key = (event_id, vote)
+                self.picks.pop(key, None)
+                self.support.pop(key, None)
+                self.latest.pop(key, None)
+                self._crossed.discard(key)
+        self.alerted = {key for key in self.alerted if key[0] not in expired}
+        live = {uid for holders in self.picks.values() for uid in holders}
+        self.users = {uid: u for uid, u in self.users.items() if uid in live}
+        return len(expired)
+
+    def alerted_state(self) -> List[list]:
+        return [[event_id, vote] for event_id, vote in sorted(self.alerted)]
+
+    def restore_alerted(self, keys: Iterable[Iterable]):
+        """Reload already-alerted keys from a snapshot; they age out like live events."""
+        horizon = time.time() + self.ttl
+        for event_id, vote in keys:
+            self.alerted.add((int(event_id), str(vote)))
+            self.expires.setdefault(int(event_id), horizon)
@@ -0,0 +1,85 @@
+"""
+Predictor filters and bet settlement.
+
+The rules the monitor applies at discovery (which predictors to follow), to
+each prediction (its bet id and odds) and at resolution (what a finished
+prediction paid), kept free of I/O so the backtest evaluates exactly the
+same ones.
+"""
+from typing import NamedTuple, Optional, Tuple
+
+SETTLED_TYPES = ("finished", "canceled", "interrupted", "aborted")
+VOID_TYPES = ("canceled", "interrupted", "aborted")
+
+
+class PredictorStats(NamedTuple):
+    roi: float = 0.0       # Yield %: profit / total bets * 100 (flat stakes)
+    profit: float = 0.0    # Units (the API calls this 'roi')
+    win_rate: float = 0.0  # %
+    total_bets: int = 0
+    avg_odds: float = 0.0  # avgCorrectOdds: the API has no average over all bets
+
+
+def _number(value: str) -> bool:
+    return value.isdigit() or value.replace('.', '', 1).isdigit()
+
+
+def predictor_stats(block: Optional[dict]) -> PredictorStats:
+    """Parse one `voteStatistics` block ('allTime' or 'current') of a vote-ranking row."""
+    if not block:
+        return PredictorStats()
+    profit = float(block.get('roi', 0.0) or 0.0)
+    win_rate = str(block.get('percentage', '0')).replace('%', '')
+    total = str(block.get('total', '0'))
+    total_bets = int(total) if total.isdigit() else 0
+    avg_odds = 0.0
+    try:
+        avg_odds = float((block.get('avgCorrectOdds') or {}).get('decimalValue') or 0.0)
+    except (TypeError, ValueError):
+        pass
+    return PredictorStats(
+        roi=(profit / total_bets) * 100 if total_bets > 0 else 0.0,
+        profit=profit,
+        win_rate=float(win_rate) if _number(win_rate) else 0.0,
+        total_bets=total_bets,
+        avg_odds=avg_odds,
+    )
+
+
+def passes_filters(stats: PredictorStats, settings) -> bool:
+    """The MIN_* discovery filters; a predictor must meet all of them."""
+    return (
+        stats.roi >= settings.min_roi
+        and stats.total_bets >= settings.min_total_bets
+        and stats.avg_odds >= settings.min_avg_odds
+        and stats.win_rate >= settings.min_win_rate
+    )
+
+
+def prediction_key(p: dict) -> str:
+    """The bet id the monitor tracks a prediction under (seen-marks, odds cache, alerts)."""
+    return str(p.get('id') or f"{p.get('eventId')}_{p.get('vote')}")
+
+
+def prediction_odds(p: dict) -> float:
+    """Decimal odds of a prediction; 0.0 when missing or malformed."""
+    try:
+        value = (p.get('odds') or {}).get('decimalValue')
+        if value and str(value).replace('.', '', 1).isdigit():
+            return float(value)
+    except (AttributeError, TypeError, ValueError):
+        pass
+    return 0.0
+
+
+def settle(status_type: Optional[str], correct, odds: float, stake: float = 1.0) -> Optional[Tuple[str, float]]:
+    """(status, profit) of a prediction, or None while it is not settled. `correct`: 1 won, -1 lost, 0 void."""
+    if status_type not in SETTLED_TYPES:
+        return None
+    if status_type in VOID_TYPES or correct == 0:
+        return 'VOID', 0.0
+    if correct == 1:
+        return 'WON', (odds * stake) - stake
+    if correct == -1:
+        return 'LOST', -stake
+    return None
@@ -0,0 +1,16 @@
+"""
+Compact integer keys for high-volume ID sets.
+
+Prediction ids (`"{eventId}_{vote}"`, 24-char ObjectIds) are hashed to a
+signed 64-bit int so `seen_bets` can be a WITHOUT ROWID table keyed by an
+8-byte integer instead of a variable-length string. With blake2b the chance
+of any collision among 10M ids is about 3e-6; a collision only means one bet
+is treated as already seen.
+"""
+import hashlib
+
+
+def seen_key(bet_id: str) -> int:
+    """Stable signed 64-bit key for a bet id (fits SQLite INTEGER)."""
+    digest = hashlib.blake2b(bet_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
@@ -0,0 +1,7 @@
+"""`python -m sofascore_monitor.main`: the entry point used by the systemd unit (runs the monitor by default)."""
+import sys
+
+from .cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
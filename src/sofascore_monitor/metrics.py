@@ -0,0 +1,237 @@
+"""
+Minimal Prometheus-style metrics registry.
+
+Stdlib only (the deployment box runs with a tight memory budget), rendered in the
+Prometheus text exposition format and served by the local admin server.
+Metrics are updated from both the event loop and `asyncio.to_thread` workers,
+so every metric guards its samples with a lock.
+"""
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+# Seconds. Covers fast SQLite hops (ms) up to slow API calls behind a proxy.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{24})$")
+
+
+def endpoint_label(endpoint: str) -> str:
+    """Collapse an API path into a low-cardinality label.
+
+    '/user-account/5dadb1036996486450251cb6/predictions?page=0' -> '/user-account/{id}/predictions'
+    """
+    path = endpoint.split("?", 1)[0]
+    parts = [("{id}" if _ID_SEGMENT.match(p) else p) for p in path.split("/")]
+    return "/".join(parts)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{k}="{v}"' for k, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def total(self) -> float:
+        """Sum over every label set."""
+        with self._lock:
+            return sum(self._values.values())
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            row = self._values.get(self._key(labels))
+            return int(row[-1]) if row else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, row in items:
+            for bound, cumulative in zip(self.buckets, row):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(row[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(row[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Hot Path Metrics ---
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "sofascore_http_request_seconds", "Sofascore API request latency.", ("endpoint",)
+)
+HTTP_RESPONSES_TOTAL = REGISTRY.counter(
+    "sofascore_http_responses_total", "Sofascore API responses by status code.", ("endpoint", "status")
+)
+HTTP_WIRE_BYTES_TOTAL = REGISTRY.counter(
+    "sofascore_http_wire_bytes_total", "Sofascore response bodies as received (compressed).", ("endpoint", "encoding")
+)
+HTTP_DECODED_BYTES_TOTAL = REGISTRY.counter(
+    "sofascore_http_decoded_bytes_total", "Sofascore response bodies after content decoding.", ("endpoint",)
+)
+HTTP_PARSE_SECONDS = REGISTRY.histogram(
+    "sofascore_http_parse_seconds", "JSON parsing time of Sofascore responses.", ("endpoint",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+SEMAPHORE_WAIT_SECONDS = REGISTRY.histogram(
+    "sofascore_http_semaphore_wait_seconds", "Time spent waiting for the HTTP concurrency semaphore."
+)
+DB_OP_SECONDS = REGISTRY.histogram(
+    "sofascore_db_op_seconds", "Storage operation latency, including the thread hop.", ("op",)
+)
+CYCLE_SECONDS = REGISTRY.histogram(
+    "sofascore_cycle_seconds", "Duration of one check_all_users cycle.",
+    buckets=(1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0),
+)
+USERS_MONITORED = REGISTRY.gauge("sofascore_users_monitored", "Users currently on the monitoring list.")
+USERS_PAUSED = REGISTRY.gauge("sofascore_users_paused", "Users skipped last cycle because they are paused.")
+CIRCUIT_TRANSITIONS_TOTAL = REGISTRY.counter(
+    "sofascore_circuit_transitions_total", "Circuit breaker transitions (scope user|endpoint).", ("scope", "state")
+)
+CIRCUIT_REJECTIONS_TOTAL = REGISTRY.counter(
+    "sofascore_circuit_rejections_total", "API requests not made because the endpoint circuit was open.", ("endpoint",)
+)
+ALERTS_SENT_TOTAL = REGISTRY.counter("sofascore_alerts_sent_total", "Alerts delivered to Discord.", ("type",))
+WEBHOOK_POSTS_TOTAL = REGISTRY.counter(
+    "sofascore_webhook_posts_total", "Discord webhook posts by delivery mode and status.", ("mode", "status")
+)
+SINK_QUEUE_DEPTH = REGISTRY.gauge("sofascore_sink_queue_depth", "Alerts waiting in each sink's queue.", ("sink",))
+SINK_DELIVERIES_TOTAL = REGISTRY.counter(
+    "sofascore_sink_deliveries_total", "Sink delivery batches by outcome.", ("sink", "result")
+)
+SINK_DROPPED_TOTAL = REGISTRY.counter("sofascore_sink_dropped_total", "Alerts dropped from a full sink queue.", ("sink",))
+OUTBOX_ENTRIES_TOTAL = REGISTRY.counter(
+    "sofascore_outbox_entries_total", "Outbox entries processed by outcome (delivered, retry, dead).", ("result",)
+)
+NOTIFICATION_QUEUE_DEPTH = REGISTRY.gauge(
+    "sofascore_notification_queue_depth", "Notifications waiting to be delivered."
+)
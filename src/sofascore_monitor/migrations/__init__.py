@@ -0,0 +1,284 @@
+"""
+Versioned schema migrations.
+
+The schema version lives in `PRAGMA user_version`. `run_migrations` applies
+every migration newer than that version, in order, each in its own
+transaction together with the version bump, so a crash mid-upgrade leaves the
+DB at the last completed version. `Storage` runs this on every start-up;
+`python -m sofascore_monitor.migrations <db>` does the same by hand.
+
+Rules for new migrations: append only, never edit a released one, and keep
+them idempotent-safe against a DB that was created by the pre-versioning
+`_init_db` (user_version 0 with tables already present).
+"""
+import logging
+import sqlite3
+from typing import Callable, List, Tuple
+
+from ..keys import seen_key
+
+logger = logging.getLogger(__name__)
+
+NOW_EPOCH = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+
+def _to_epoch(column: str) -> str:
+    """SQL expression turning a TEXT `CURRENT_TIMESTAMP`/isoformat value into epoch seconds."""
+    return (
+        f"CASE WHEN typeof({column}) = 'integer' THEN {column} "
+        f"ELSE COALESCE(CAST(strftime('%s', {column}) AS INTEGER), {NOW_EPOCH}) END"
+    )
+
+
+def _baseline(conn: sqlite3.Connection):
+    """v1: the schema `_init_db` created before versioning."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS seen_bets (
+            id TEXT PRIMARY KEY,
+            user_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_bets_user ON seen_bets(user_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_bets_created ON seen_bets(created_at)")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_status (
+            user_id TEXT PRIMARY KEY,
+            failures INTEGER DEFAULT 0,
+            paused_until TIMESTAMP,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS latest_odds (
+            bet_id TEXT PRIMARY KEY,
+            odds REAL NOT NULL,
+            previous_odds REAL,
+            updated_at INTEGER NOT NULL,
+            alert_sent INTEGER DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS alerted_bets (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            event_id INTEGER,
+            market TEXT,
+            selection TEXT,
+            odds REAL,
+            stake REAL DEFAULT 1.0,
+            status TEXT DEFAULT 'PENDING',
+            profit REAL DEFAULT 0.0,
+            alerted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alerted_bets_user ON alerted_bets(user_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alerted_bets_status ON alerted_bets(status)")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS alerted_bets_archive (
+            id INTEGER PRIMARY KEY,
+            archived_at INTEGER NOT NULL,
+            first_alerted_at TEXT,
+            last_alerted_at TEXT,
+            bet_count INTEGER NOT NULL,
+            wins INTEGER NOT NULL,
+            profit REAL NOT NULL,
+            stake REAL NOT NULL,
+            payload BLOB NOT NULL
+        )
+    """)
+
+
+def _epoch_timestamps(conn: sqlite3.Connection):
+    """v2: seen_bets/alerted_bets timestamps become INTEGER epoch seconds, like latest_odds.
+
+    user_status is left as TIMESTAMP on purpose, as in the Postgres schema: `paused_until` is a
+    circuit deadline that the storage protocol passes as a datetime, and nothing compares it in
+    SQL or prunes by it. `last_updated` is informational only.
+    """
+    conn.execute(f"""
+        CREATE TABLE seen_bets_v2 (
+            id TEXT PRIMARY KEY,
+            user_id TEXT,
+            created_at INTEGER NOT NULL DEFAULT ({NOW_EPOCH})
+        )
+    """)
+    conn.execute(f"INSERT INTO seen_bets_v2 SELECT id, user_id, {_to_epoch('created_at')} FROM seen_bets")
+    conn.execute("DROP TABLE seen_bets")
+    conn.execute("ALTER TABLE seen_bets_v2 RENAME TO seen_bets")
+    conn.execute("CREATE INDEX idx_seen_bets_created ON seen_bets(created_at)")
+
+    conn.execute(f"""
+        CREATE TABLE alerted_bets_v2 (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            event_id INTEGER,
+            market TEXT,
+            selection TEXT,
+            odds REAL,
+            stake REAL DEFAULT 1.0,
+            status TEXT DEFAULT 'PENDING',
+            profit REAL DEFAULT 0.0,
+            alerted_at INTEGER NOT NULL DEFAULT ({NOW_EPOCH})
+        )
+    """)
+    conn.execute(f"""
+        INSERT INTO alerted_bets_v2
+        SELECT id, user_id, event_id, market, selection, odds, stake, status, profit, {_to_epoch('alerted_at')}
+        FROM alerted_bets
+    """)
+    conn.execute("DROP TABLE alerted_bets")
+    conn.execute("ALTER TABLE alerted_bets_v2 RENAME TO alerted_bets")
+
+    conn.execute("""
+        CREATE TABLE alerted_bets_archive_v2 (
+            id INTEGER PRIMARY KEY,
+            archived_at INTEGER NOT NULL,
+            first_alerted_at INTEGER,
+            last_alerted_at INTEGER,
+            bet_count INTEGER NOT NULL,
+            wins INTEGER NOT NULL,
+            profit REAL NOT NULL,
+            stake REAL NOT NULL,
+            payload BLOB NOT NULL
+        )
+    """)
+    conn.execute(f"""
+        INSERT INTO alerted_bets_archive_v2
+        SELECT id, archived_at, {_to_epoch('first_alerted_at')}, {_to_epoch('last_alerted_at')},
+               bet_count, wins, profit, stake, payload
+        FROM alerted_bets_archive
+    """)
+    conn.execute("DROP TABLE alerted_bets_archive")
+    conn.execute("ALTER TABLE alerted_bets_archive_v2 RENAME TO alerted_bets_archive")
+
+
+def _hot_query_indexes(conn: sqlite3.Connection):
+    """v3: indexes matched to the queries the service actually runs.
+
+    - latest_odds(updated_at): retention prune walks it oldest-first
+      (the old add_odds_tracking script created it, _init_db never did).
+    - alerted_bets partial index on PENDING rows: resolution only ever reads
+      pending bets, and settled rows (the vast majority) stay out of it.
+    - alerted_bets partial index on settled rows by alerted_at: the archiver.
+    - seen_bets(user_id) is dropped: no hot query filters by user, and it
+      was a second B-tree write on every new bet.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_odds_updated ON latest_odds(updated_at)")
+    conn.execute("DROP INDEX IF EXISTS idx_seen_bets_user")
+    conn.execute("DROP INDEX IF EXISTS idx_alerted_bets_user")
+    conn.execute("DROP INDEX IF EXISTS idx_alerted_bets_status")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_alerted_bets_pending
+        ON alerted_bets(user_id) WHERE status = 'PENDING'
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_alerted_bets_settled
+        ON alerted_bets(alerted_at) WHERE status != 'PENDING'
+    """)
+
+
+def _compact_seen_bets(conn: sqlite3.Connection):
+    """v4: seen_bets keyed by a 64-bit hash of the bet id, WITHOUT ROWID.
+
+    The string id and user_id are dropped: nothing reads them back, and they
+    were most of the table and both of its extra indexes.
+    """
+    conn.create_function("seen_key", 1, seen_key, deterministic=True)
+    conn.execute(f"""
+        CREATE TABLE seen_bets_v4 (
+            key INTEGER PRIMARY KEY,
+            created_at INTEGER NOT NULL DEFAULT ({NOW_EPOCH})
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO seen_bets_v4 (key, created_at)
+        SELECT seen_key(id), created_at FROM seen_bets
+    """)
+    conn.execute("DROP TABLE seen_bets")
+    conn.execute("ALTER TABLE seen_bets_v4 RENAME TO seen_bets")
+    conn.execute("CREATE INDEX idx_seen_bets_created ON seen_bets(created_at)")
+
+
+def _odds_history(conn: sqlite3.Connection):
+    """v5: append-only, delta-encoded odds history (see odds_history.py for the block format)."""
+    conn.execute("""
+        CREATE TABLE odds_history (
+            bet_id TEXT NOT NULL,
+            block_start INTEGER NOT NULL,
+            base_odds INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            last_ts INTEGER NOT NULL,
+            last_odds INTEGER NOT NULL,
+            ts_deltas BLOB NOT NULL,
+            odds_deltas BLOB NOT NULL,
+            PRIMARY KEY (bet_id, block_start)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX idx_odds_history_last ON odds_history(last_ts)")
+
+
+def _alert_outbox(conn: sqlite3.Connection):
+    """v6: transactional outbox of alerts, drained by outbox.OutboxRelay."""
+    conn.execute("""
+        CREATE TABLE alert_outbox (
+            id INTEGER PRIMARY KEY,
+            idem_key TEXT NOT NULL UNIQUE,
+            payload TEXT NOT NULL,
+            delivered_sinks TEXT NOT NULL DEFAULT '',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at INTEGER NOT NULL,
+            available_at INTEGER NOT NULL,
+            delivered_at INTEGER
+        )
+    """)
+    conn.execute("CREATE INDEX idx_outbox_due ON alert_outbox(available_at) WHERE delivered_at IS NULL")
+    conn.execute("CREATE INDEX idx_outbox_delivered ON alert_outbox(delivered_at) WHERE delivered_at IS NOT NULL")
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "baseline schema", _baseline),
+    (2, "integer epoch timestamps", _epoch_timestamps),
+    (3, "hot query indexes", _hot_query_indexes),
+    (4, "compact seen_bets", _compact_seen_bets),
+    (5, "odds history", _odds_history),
+    (6, "alert outbox", _alert_outbox),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations in order. Returns the resulting schema version."""
+    current = schema_version(conn)
+    if current > LATEST_VERSION:
+        logger.warning(f"DB schema v{current} is newer than this build (v{LATEST_VERSION}); not migrating.")
+        return current
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # explicit BEGIN/COMMIT so DDL and user_version commit together
+    try:
+        for version, description, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                migrate(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            logger.info(f"Applied DB migration v{version}: {description}")
+            current = version
+    finally:
+        conn.isolation_level = isolation_level
+    return current
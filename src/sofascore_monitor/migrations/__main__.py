@@ -0,0 +1,26 @@
+import logging
+import sqlite3
+import sys
+from pathlib import Path
+
+from ..config import DB_PATH
+from . import run_migrations, schema_version
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    path = argv[0] if argv else DB_PATH
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    conn = sqlite3.connect(path, timeout=30.0)
+    try:
+        before = schema_version(conn)
+        after = run_migrations(conn)
+        print(f"{path}: schema v{before} -> v{after}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,82 @@
 import asyncio
 import logging
+import json
 import random
-import pytz
-from typing import List, Set, Dict
-from datetime import datetime, timedelta
+import signal
+import time
+from dataclasses import asdict
+from typing import List, Set, Dict, Optional
+from datetime import datetime, timedelta, timezone
 
 # Import local modules
 from .models import User, Bet
-from .client import SofascoreClient, UserNotFoundError
+from .client import SofascoreClient, UserNotFoundError, predictions_endpoint
 from .config import (
     TARGET_USERS, 
-    POLL_INTERVAL_SECONDS,
-    SCAN_INTERVAL_MINUTES, 
     DB_PATH, 
+    STORAGE_URL,
     MAX_RETRIES, 
     PAUSE_DURATION_MINUTES, 
     RETENTION_DAYS, 
-    TOP_PREDICTORS_LIMIT,
-    MIN_ROI,
-    MIN_AVG_ODDS,
-    MIN_TOTAL_BETS,
-    MIN_WIN_RATE,
-    TIME_LOOKAHEAD_HOURS,
-    MATCH_GRACE_PERIOD_MINUTES
+    COMPACTION_INTERVAL_MINUTES,
+    COMPACTION_BATCH_SIZE,
+    ARCHIVE_AFTER_DAYS,
+    RESPONSE_ARCHIVE_PATH,
+    RESPONSE_ARCHIVE_RETENTION_DAYS,
+    ADMIN_HOST,
+    ADMIN_PORT,
+    ADMIN_SOCKET,
+    DATA_DIR,
+    PROFILE_INTERVAL_MS,
+    PROFILE_CYCLES,
+    STATE_PATH,
+    SHUTDOWN_GRACE_SECONDS,
+    ODDS_CACHE_TTL_HOURS,
+    ODDS_SIGNAL_WINDOW_MINUTES,
+    CONSENSUS_MIN_USERS,
+    ENV_FILE,
+    SETTINGS_RELOAD_SECONDS,
+    OUTBOX_LEASE_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    BREAKER_BASE_SECONDS,
+    BREAKER_MAX_SECONDS
+)
+from .storage import StorageBackend, create_storage
+from .admin import AdminServer, AdminRequest, AdminResponse
+from .metrics import (
+    REGISTRY, CYCLE_SECONDS, SEMAPHORE_WAIT_SECONDS, USERS_MONITORED, USERS_PAUSED, CIRCUIT_TRANSITIONS_TOTAL
+)
+from .breaker import CLOSED, OPEN, Circuit, CircuitBreaker
+from .tracing import tracer
+from .profiler import ProfilerHook
+from .snapshot import save_snapshot, load_snapshot
+from .compaction import Compactor
+from .odds_history import OddsHistory, MovementSignals, decode_blocks, line_moves
+from .consensus import ConsensusIndex
+from .filters import passes_filters, prediction_key, prediction_odds, predictor_stats, settle
+from .settings import Settings, SettingsWatcher
+from .outbox import OutboxRelay, outbox_rows
+from .notifications import (
+    configure_sinks, sinks, bet_alert, line_movement_alert, consensus_alert, send_health_alert, send_roi_report
 )
-from .storage import Storage
-from .notifications import send_discord_alert, send_line_movement_alert, send_health_alert, send_roi_report
 
 logger = logging.getLogger(__name__)
 
 class Monitor:
-    def __init__(self, use_auto_discovery=True):
-        self.client = SofascoreClient()
-        self.storage = Storage(DB_PATH)
+    def __init__(self, use_auto_discovery=True, client: Optional[SofascoreClient] = None, storage: Optional[StorageBackend] = None):
+        self.client = client or SofascoreClient()
+        self.storage = storage or create_storage(STORAGE_URL or DB_PATH)
+        # Raw responses for `sofascore-monitor replay` (created on the first recorded response)
+        self.response_archive = None
+        if RESPONSE_ARCHIVE_PATH:
+            from .archive import ResponseArchive
+            self.response_archive = ResponseArchive(RESPONSE_ARCHIVE_PATH, RESPONSE_ARCHIVE_RETENTION_DAYS)
+            self.client.archive = self.response_archive
         self.use_auto_discovery = use_auto_discovery
+        self.settings = Settings.load()  # Swapped whole by apply_settings; never mutated
         self.users: List[User] = []
+        # Ids that discovery manages; everything else (TARGET_USERS, control API adds) is pinned
+        self.discovered: Set[str] = set()
         self.last_activity = datetime.now()
         
         # Load static users from config
@@ -44,9 +86,66 @@ class Monitor:
         # Resource Bounding
         self.http_semaphore = asyncio.BoundedSemaphore(5)
 
+        # Observability
+        self.admin = AdminServer(ADMIN_HOST, ADMIN_PORT, ADMIN_SOCKET)
+        self.admin.route("GET", "/metrics", self._handle_metrics)
+        self.paused_users: Set[str] = set()
+
+        # Per-user circuit breakers (the client has one per endpoint). Decided in memory; state
+        # changes are written to user_status in the background and read back once at start-up.
+        self.breaker = CircuitBreaker(
+            MAX_RETRIES, BREAKER_BASE_SECONDS, BREAKER_MAX_SECONDS, on_change=self._circuit_changed
+        )
+        self._dirty_circuits: Dict[str, Circuit] = {}
+
+        # On-demand profiling
+        self.profiler = ProfilerHook(DATA_DIR, PROFILE_INTERVAL_MS / 1000.0, PROFILE_CYCLES)
+        self.admin.route("GET", "/debug/profile", self._handle_profile_status)
+        self.admin.route("POST", "/debug/profile", self._handle_profile_request)
+
         # ROI Resolution
         self.last_resolution_check = datetime.now() - timedelta(hours=1) # Run immediately on startup
 
+        # Lifecycle
+        self.cycles = 0
+        self.state_path = STATE_PATH
+        self._stop_event = asyncio.Event()
+        self._reschedule = asyncio.Event()  # Set when the scan interval changes mid-sleep
+        self._background_tasks: Set[asyncio.Task] = set()
+
+        # Warm-start caches (persisted in the state snapshot)
+        self.last_poll: Dict[str, float] = {}          # user_id -> epoch of last successful poll
+        self.seen_cache: Dict[str, Set[str]] = {}      # user_id -> bet ids already handled (high-water mark)
+        self.odds_cache: Dict[str, list] = {}          # bet_id -> [odds, alert_sent, last_seen_epoch]
+
+        # Line movement: active bets collected per cycle and checked in one batch after it
+        self._line_batch: List[Bet] = []
+
+        # Odds history: price changes buffered per cycle, signals recomputed in one pass after it
+        self.odds_history = OddsHistory(ODDS_SIGNAL_WINDOW_MINUTES * 60)
+        self.odds_signals: Optional[MovementSignals] = None
+        self._odds_observations: List[tuple] = []
+        self.admin.route("GET", "/odds/movers", self._handle_odds_movers)
+
+        # Consensus: (event_id, vote) -> users backing it, across all monitored users
+        self.consensus = ConsensusIndex(CONSENSUS_MIN_USERS, self.settings.match_grace_period_minutes * 60)
+        self.admin.route("GET", "/consensus", self._handle_consensus)
+
+        # Runtime control: users, settings and one-off tasks without a restart
+        self.admin.route("GET", "/control/users", self._handle_list_users)
+        self.admin.route("POST", "/control/users", self._handle_add_user)
+        self.admin.route("DELETE", "/control/users", self._handle_remove_user)
+        self.admin.route("GET", "/control/settings", self._handle_get_settings)
+        self.admin.route("POST", "/control/settings", self._handle_update_settings)
+        self.admin.route("POST", "/control/discover", self._handle_discover)
+        self.admin.route("POST", "/control/resolve", self._handle_resolve)
+        self.admin.route("GET", "/control/state", self._handle_state)
+
+        # Alerts: committed to the outbox with their seen-marks, delivered by the relay
+        self.outbox = OutboxRelay(
+            self.storage, sinks, lease_seconds=OUTBOX_LEASE_SECONDS, max_attempts=OUTBOX_MAX_ATTEMPTS
+        )
+
             
     def calculate_adaptive_interval(self, base_minutes):
         """
@@ -59,7 +158,7 @@ class Monitor:
 
         try:
             # Use UTC as global standard
-            now = datetime.now(pytz.utc)
+            now = datetime.now(timezone.utc)
         except Exception:
             now = datetime.utcnow()
             
@@ -95,253 +194,671 @@ class Monitor:
         interval = int(base_minutes * 60 * multiplier * jitter)
         return max(interval, MIN_INTERVAL)
 
+    async def _handle_metrics(self, request: AdminRequest) -> AdminResponse:
+        return AdminResponse(
+            body=REGISTRY.render().encode(),
+            content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    async def _handle_profile_status(self, request: AdminRequest) -> AdminResponse:
+        return AdminResponse(body=json.dumps(self.profiler.status()).encode(), content_type="application/json")
+
+    async def _handle_profile_request(self, request: AdminRequest) -> AdminResponse:
+        try:
+            cycles = int(request.query["cycles"]) if "cycles" in request.query else None
+            status = self.profiler.request(request.query.get("mode", "sample"), cycles)
+        except ValueError as e:
+            return AdminResponse(400, f"{e}\n".encode())
+        return AdminResponse(body=json.dumps(status).encode(), content_type="application/json")
+
+    async def _handle_odds_movers(self, request: AdminRequest) -> AdminResponse:
+        by = request.query.get("by", "velocity")
+        if by not in ("velocity", "drift", "move_pct"):
+            return AdminResponse(400, b"by must be velocity, drift or move_pct\n")
+        try:
+            top = int(request.query.get("top", "20"))
+        except ValueError:
+            return AdminResponse(400, b"top must be an integer\n")
+        rows = self.odds_signals.top(top, by) if self.odds_signals else []
+        return AdminResponse(body=json.dumps(rows).encode(), content_type="application/json")
+
+    async def _handle_consensus(self, request: AdminRequest) -> AdminResponse:
+        try:
+            top = int(request.query.get("top", "20"))
+        except ValueError:
+            return AdminResponse(400, b"top must be an integer\n")
+        rows = [
+            {
+                "event_id": c.bet.event_id, "match": c.bet.match_name, "selection": c.bet.choice_name,
+                "users": [u.id for u in c.users], "support": c.support, "opposition": c.opposition,
+                "confidence": c.confidence,
+            }
+            for c in self.consensus.top(top)
+        ]
+        return AdminResponse(body=json.dumps(rows).encode(), content_type="application/json")
+
+    # --- Runtime control ---
+
+    def apply_settings(self, settings: Settings):
+        """Swap in a validated snapshot. Readers pick it up on their next access; no restart needed."""
+        previous, self.settings = self.settings, settings
+        if settings.proxy_url != previous.proxy_url:
+            self.client.set_proxy(settings.proxy_url)
+        self.consensus.ttl = settings.match_grace_period_minutes * 60
+        if settings.scan_interval_minutes != previous.scan_interval_minutes:
+            self._reschedule.set()
+        changed = {k: v for k, v in settings.to_dict().items() if v != previous.to_dict()[k]}
+        if changed:
+            logger.info(f"Settings updated: {changed}")
+
+    def add_user(self, user: User) -> bool:
+        if any(u.id == user.id for u in self.users):
+            return False
+        self.users = self.users + [user]  # New list: a running cycle keeps iterating the old one
+        return True
+
+    def remove_user(self, user_id: str) -> bool:
+        remaining = [u for u in self.users if u.id != user_id]
+        if len(remaining) == len(self.users):
+            return False
+        self.users = remaining
+        self._forget(user_id)
+        return True
+
+    def _forget(self, user_id: str):
+        self.discovered.discard(user_id)
+        for cache in (self.seen_cache, self.last_poll):
+            cache.pop(user_id, None)
+        self.paused_users.discard(user_id)
+        self.breaker.circuits.pop(user_id, None)
+
+    # --- Circuit breaker persistence ---
+
+    def _circuit_changed(self, user_id: str, circuit: Circuit):
+        self._dirty_circuits[user_id] = Circuit(circuit.failures, circuit.open_until)
+        CIRCUIT_TRANSITIONS_TOTAL.inc(scope="user", state=OPEN if circuit.open_until is not None else CLOSED)
+
+    async def persist_circuits(self):
+        """Write circuits that changed state since the last call to user_status."""
+        dirty, self._dirty_circuits = self._dirty_circuits, {}
+        rows = [
+            (uid, c.failures, datetime.fromtimestamp(c.open_until) if c.open_until is not None else None)
+            for uid, c in dirty.items()
+        ]
+        await self.storage.save_user_statuses(rows)
+
+    async def restore_circuits(self):
+        statuses = await self.storage.load_user_statuses()
+        for uid, (failures, paused_until) in statuses.items():
+            self.breaker.restore(uid, failures, paused_until.timestamp() if paused_until else None)
+        if statuses:
+            logger.info(f"Restored {len(statuses)} circuit breaker states.")
+
+    @staticmethod
+    def _json(data, status: int = 200) -> AdminResponse:
+        return AdminResponse(status, json.dumps(data, default=str).encode(), "application/json")
+
+    @staticmethod
+    def _json_body(request: AdminRequest) -> dict:
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            raise ValueError("body must be JSON") from None
+        if not isinstance(data, dict):
+            raise ValueError("body must be a JSON object")
+        return data
+
+    async def _handle_list_users(self, request: AdminRequest) -> AdminResponse:
+        return self._json([
+            {**asdict(u), "paused": u.id in self.paused_users, "last_poll": self.last_poll.get(u.id)}
+            for u in self.users
+        ])
+
+    async def _handle_add_user(self, request: AdminRequest) -> AdminResponse:
+        try:
+            data = self._json_body(request)
+            user = User(**{"name": str(data.get("id", "")), "slug": str(data.get("id", "")), **data})
+            user.id = str(user.id)
+        except (TypeError, ValueError) as e:
+            return AdminResponse(400, f"{e}\n".encode())
+        if not user.id:
+            return AdminResponse(400, b"id is required\n")
+        if not self.add_user(user):
+            return AdminResponse(400, f"user {user.id} is already monitored\n".encode())
+        logger.info(f"Control: now monitoring {user.name} ({user.id}).")
+        return self._json(asdict(user))
+
+    async def _handle_remove_user(self, request: AdminRequest) -> AdminResponse:
+        user_id = request.query.get("id", "")
+        if not self.remove_user(user_id):
+            return AdminResponse(404, f"user {user_id} is not monitored\n".encode())
+        logger.info(f"Control: stopped monitoring {user_id}.")
+        return self._json({"removed": user_id})
+
+    async def _handle_get_settings(self, request: AdminRequest) -> AdminResponse:
+        return self._json(self.settings.to_dict())
+
+    async def _handle_update_settings(self, request: AdminRequest) -> AdminResponse:
+        try:
+            settings = self.settings.updated(self._json_body(request))
+        except ValueError as e:
+            return AdminResponse(400, f"{e}\n".encode())
+        self.apply_settings(settings)
+        return self._json(settings.to_dict())
+
+    async def _handle_discover(self, request: AdminRequest) -> AdminResponse:
+        try:
+            limit = int(request.query["limit"]) if "limit" in request.query else None
+        except ValueError:
+            return AdminResponse(400, b"limit must be an integer\n")
+        if limit is not None and limit < 1:
+            return AdminResponse(400, b"limit must be positive\n")
+        self.spawn(self.discover_users(limit))
+        return self._json({"started": "discover"}, 202)
+
+    async def _handle_resolve(self, request: AdminRequest) -> AdminResponse:
+        self.spawn(self.resolve_pending_bets())
+        self.last_resolution_check = datetime.now()
+        return self._json({"started": "resolve"}, 202)
+
+    async def _handle_state(self, request: AdminRequest) -> AdminResponse:
+        return self._json({
+            "cycles": self.cycles,
+            "last_activity": self.last_activity.isoformat(),
+            "users": len(self.users),
+            "paused_users": sorted(self.paused_users),
+            "open_circuits": self.breaker.open_keys(),
+            "seen_cache": sum(len(ids) for ids in self.seen_cache.values()),
+            "odds_cache": len(self.odds_cache),
+            "odds_history": len(self.odds_history),
+            "consensus_keys": len(self.consensus),
+            "sink_queues": {s.name: s.queue.qsize() for s in sinks.sinks},
+            "background_tasks": len(self._background_tasks),
+            "settings": self.settings.to_dict(),
+        })
+
+    def install_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        handlers = [("SIGTERM", self.request_shutdown), ("SIGINT", self.request_shutdown), ("SIGUSR1", self.profiler.request)]
+        for name, handler in handlers:
+            if not hasattr(signal, name):
+                continue
+            try:
+                loop.add_signal_handler(getattr(signal, name), handler)
+            except (NotImplementedError, RuntimeError):
+                pass # Not supported on this platform/loop (e.g. Windows)
+
+    # --- Lifecycle ---
+
+    def request_shutdown(self):
+        """Stop scheduling new cycles. The run loop drains and checkpoints before returning."""
+        if not self._stop_event.is_set():
+            logger.info("Shutdown requested. Finishing in-flight work...")
+            self._stop_event.set()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop_event.is_set()
+
+    def spawn(self, coro) -> asyncio.Task:
+        """Start a tracked background task that shutdown will drain."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _sleep(self, seconds: float, wake: Optional[asyncio.Event] = None) -> bool:
+        """Sleep that returns early when shutdown is requested. True if `wake` cut it short."""
+        waiters = {asyncio.ensure_future(self._stop_event.wait())}
+        if wake is not None:
+            waiters.add(asyncio.ensure_future(wake.wait()))
+        await asyncio.wait(waiters, timeout=seconds, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in waiters:
+            waiter.cancel()
+        return wake is not None and wake.is_set() and not self._stop_event.is_set()
+
+    async def _drain(self, tasks, what: str):
+        pending = [t for t in tasks if not t.done()]
+        if not pending:
+            return
+        logger.info(f"Draining {len(pending)} {what}...")
+        _, still_pending = await asyncio.wait(pending, timeout=SHUTDOWN_GRACE_SECONDS)
+        for task in still_pending:
+            task.cancel()
+        if still_pending:
+            logger.warning(f"Cancelled {len(still_pending)} {what} after {SHUTDOWN_GRACE_SECONDS}s grace period.")
+            await asyncio.gather(*still_pending, return_exceptions=True)
+
+    def _state_snapshot(self) -> dict:
+        # Only odds observed recently are worth carrying over
+        horizon = time.time() - ODDS_CACHE_TTL_HOURS * 3600
+        self.odds_cache = {k: v for k, v in self.odds_cache.items() if v[2] >= horizon}
+        return {
+            "saved_at": datetime.now().isoformat(),
+            "last_activity": self.last_activity.isoformat(),
+            "last_resolution_check": self.last_resolution_check.isoformat(),
+            "cycles": self.cycles,
+            "users": [asdict(u) for u in self.users],
+            "discovered": sorted(self.discovered),
+            "last_poll": dict(self.last_poll),
+            "seen": {uid: sorted(ids) for uid, ids in self.seen_cache.items()},
+            "odds": dict(self.odds_cache),
+            "consensus_alerted": self.consensus.alerted_state(),
+        }
+
+    def checkpoint_state(self):
+        save_snapshot(self.state_path, self._state_snapshot())
+
+    async def checkpoint_state_async(self):
+        """Snapshot on the loop thread, write the file off it."""
+        state = self._state_snapshot()
+        try:
+            await asyncio.to_thread(save_snapshot, self.state_path, state)
+        except OSError as e:
+            logger.error(f"Failed to write state snapshot: {e}")
+
+    def restore_state(self) -> bool:
+        """Load the last snapshot. Returns True if it carried a user list (warm start)."""
+        state = load_snapshot(self.state_path)
+        if not state:
+            return False
+        try:
+            self.last_resolution_check = datetime.fromisoformat(state["last_resolution_check"])
+            self.cycles = int(state.get("cycles", 0))
+
+            pinned = {u.id for u in self.users}
+            known = set(pinned)
+            for row in state.get("users", []):
+                user = User(**row)
+                if user.id not in known:
+                    self.users.append(user)
+                    known.add(user.id)
+            # Older snapshots did not record which users came from discovery: assume all but TARGET_USERS
+            discovered = state.get("discovered", [u.id for u in self.users if u.id not in pinned])
+            self.discovered = {str(uid) for uid in discovered} & (known - pinned)
+            self.last_poll = {uid: float(ts) for uid, ts in state.get("last_poll", {}).items()}
+            self.seen_cache = {uid: set(ids) for uid, ids in state.get("seen", {}).items()}
+            self.odds_cache = {bid: list(v) for bid, v in state.get("odds", {}).items()}
+            self.consensus.restore_alerted(state.get("consensus_alerted", []))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring invalid state snapshot: {e}")
+            return False
+
+        logger.info(
+            f"Warm start from {state.get('saved_at')}: {len(self.users)} users, "
+            f"{len(self.odds_cache)} cached odds (cycle {self.cycles})."
+        )
+        return bool(self.users)
+
+    async def shutdown(self):
+        """Drain background work, flush the DB and checkpoint scheduler state."""
+        await self._drain(list(self._background_tasks), "background tasks")
+        await self.persist_circuits()
+        await self.storage.checkpoint()
+        await self.storage.close()
+        if self.response_archive is not None:
+            self.response_archive.close()
+        try:
+            self.checkpoint_state()
+        except OSError as e:
+            logger.error(f"Failed to write state snapshot: {e}")
+        self.profiler.finish()
+        if tracer.exporter:
+            await asyncio.to_thread(tracer.exporter.flush)
+        await self.admin.stop()
+        send_health_alert("Service Stopped", f"Clean shutdown after {self.cycles} cycles.", color=0xFFA500)
+        logger.info("Shutdown complete.")
+
+    async def start_admin_server(self):
+        try:
+            if ADMIN_PORT:
+                await self.admin.start()
+            if ADMIN_SOCKET:
+                await self.admin.start_unix()
+        except OSError as e:
+            # Never let observability take the monitor down
+            logger.warning(f"Admin server disabled: {e}")
+
     async def run(self):
         logger.info("Starting Async Sofascore Monitor (Hardened)...")
+        await self.storage.open()
+        await self.restore_circuits()
+        await self.start_admin_server()
+        self.install_signal_handlers()
+        warm = self.restore_state()
         
-        # Maintenance on startup
-        self.storage.cleanup_old_data(RETENTION_DAYS)
+        # Maintenance runs in the background; polling must not wait on it
+        compactor = Compactor(self.storage, RETENTION_DAYS, ARCHIVE_AFTER_DAYS, COMPACTION_BATCH_SIZE,
+                              response_archive=self.response_archive)
+        self.spawn(compactor.run_forever(COMPACTION_INTERVAL_MINUTES * 60, self._stop_event))
+
+        self.start_notifier()
 
-        # Initial Discovery
+        # Hot reload: edits to .env push a new settings snapshot to this monitor (and its client)
+        if SETTINGS_RELOAD_SECONDS > 0 and ENV_FILE:
+            watcher = SettingsWatcher(ENV_FILE, self.settings, SETTINGS_RELOAD_SECONDS)
+            watcher.subscribe(self.apply_settings)
+            self.spawn(watcher.run_forever(self._stop_event))
+
+        # Discovery: blocking only on a cold start with nothing to poll
         if self.use_auto_discovery:
-            await self.discover_users()
+            if warm:
+                self.spawn(self.discover_users())
+            else:
+                await self.discover_users()
+
+        self.spawn(self._announce_startup(warm))
+        
+        try:
+            while not self.stopping:
+                await self._run_cycle()
+        finally:
+            await self.shutdown()
 
-        msg = f"Monitoring {len(self.users)} users with {SCAN_INTERVAL_MINUTES}m base interval (UTC/Burst Mode Active)."
+    def start_notifier(self):
+        """Alert fan-out: one worker per sink plus the outbox relay feeding them; polling never waits on either."""
+        configure_sinks()
+        self.spawn(sinks.run_forever(self._stop_event))
+        self.spawn(self.outbox.run_forever(self._stop_event))
+
+    async def _announce_startup(self, warm: bool):
+        start = "warm" if warm else "cold"
+        msg = f"Monitoring {len(self.users)} users with {self.settings.scan_interval_minutes}m base interval (UTC/Burst Mode Active, {start} start)."
         logger.info(msg)
-        send_health_alert("Service Started", msg, color=0x00FF00)
+        await asyncio.to_thread(send_health_alert, "Service Started", msg, 0x00FF00)
         
         # Send Initial ROI Report
         roi_stats = await self.storage.get_roi_stats()
         if roi_stats and roi_stats.get('total_bets', 0) > 0:
-             send_roi_report(roi_stats)
-        
-        while True:
-            try:
-                start_time = datetime.now()
-                await self.check_all_users()
-                self.last_activity = datetime.now()
-                
-                elapsed = (datetime.now() - start_time).total_seconds()
-                
-                # Check Health (Dead Man's Switch logic could go here or external)
-                
-                # ROI Resolution (Every 1 hour)
-                if (datetime.now() - self.last_resolution_check).total_seconds() > 3600:
-                    asyncio.create_task(self.resolve_pending_bets())
-                    self.last_resolution_check = datetime.now()
+             await asyncio.to_thread(send_roi_report, roi_stats)
+
+    async def _run_cycle(self):
+        try:
+            start_time = datetime.now()
+            with self.profiler.phase("check_all_users"):
+                cycle = asyncio.create_task(self.check_all_users())  # Inherits the phase
+                stop_waiter = asyncio.create_task(self._stop_event.wait())
+                await asyncio.wait({cycle, stop_waiter}, return_when=asyncio.FIRST_COMPLETED)
+                stop_waiter.cancel()
+                if not cycle.done():
+                    # Shutdown mid-cycle: let in-flight fetches/alerts finish
+                    await self._drain([cycle], "in-flight user checks")
+            if cycle.cancelled():
+                return
+            cycle.result()
+            self.cycles += 1
+            self.last_activity = datetime.now()
+            
+            elapsed = (datetime.now() - start_time).total_seconds()
+            CYCLE_SECONDS.observe(elapsed)
+            if self.stopping:
+                return
+            await self.checkpoint_state_async()
+            
+            # Check Health (Dead Man's Switch logic could go here or external)
+            
+            # ROI Resolution (Every 1 hour)
+            if (datetime.now() - self.last_resolution_check).total_seconds() > 3600:
+                self.spawn(self.resolve_pending_bets())
+                self.last_resolution_check = datetime.now()
 
-                # Adaptive Interval
-                sleep_time = self.calculate_adaptive_interval(SCAN_INTERVAL_MINUTES) - elapsed
+            # Adaptive Interval (recomputed when the scan interval is changed mid-sleep)
+            self._reschedule.clear()
+            sleep_time = self.calculate_adaptive_interval(self.settings.scan_interval_minutes) - elapsed
+            
+            if sleep_time > 0:
+                mode = "Burst" if sleep_time == 60 else "Adaptive"
+                logger.info(f"Sleeping for {sleep_time:.2f}s ({mode})...")
+                while sleep_time > 0 and await self._sleep(sleep_time, self._reschedule):
+                    self._reschedule.clear()
+                    elapsed = (datetime.now() - start_time).total_seconds()
+                    sleep_time = self.calculate_adaptive_interval(self.settings.scan_interval_minutes) - elapsed
+                    logger.info(f"Scan interval changed, next cycle in {max(sleep_time, 0):.2f}s.")
+            else:
+                logger.warning(f"Loop took longer than interval ({elapsed:.2f}s)!")
+
+            self.profiler.cycle_done()
                 
-                if sleep_time > 0:
-                    mode = "Burst" if sleep_time == 60 else "Adaptive"
-                    logger.info(f"Sleeping for {sleep_time:.2f}s ({mode})...")
-                    await asyncio.sleep(sleep_time)
-                else:
-                    logger.warning(f"Loop took longer than interval ({elapsed:.2f}s)!")
-                    
-            except Exception as e:
-                logger.error(f"Error in monitor loop: {e}", exc_info=True)
-                send_health_alert("Service Error", f"Exception in monitor loop: {str(e)}", color=0xFF0000)
-                await asyncio.sleep(60) # Backoff on crash
-
-    async def discover_users(self):
-        """Fetch top predictors and add them to the monitoring list."""
-        logger.info(f"Auto-discovering Top {TOP_PREDICTORS_LIMIT} Predictors...")
-        data = await self.client.get_top_predictors()
+        except Exception as e:
+            logger.error(f"Error in monitor loop: {e}", exc_info=True)
+            send_health_alert("Service Error", f"Exception in monitor loop: {str(e)}", color=0xFF0000)
+            await self._sleep(60) # Backoff on crash
+
+    async def discover_users(self, limit: Optional[int] = None):
+        """Refresh the discovered users: the top `limit` predictors of the ranking that pass the filters.
+
+        Pinned users (TARGET_USERS and control API adds) are kept and never count toward the limit.
+        Discovered users that dropped out of the top are no longer polled.
+        """
+        settings = self.settings
+        limit = limit or settings.top_predictors_limit
+        logger.info(f"Auto-discovering Top {limit} Predictors...")
+        with tracer.span("discover_users", limit=limit):
+            data = await self.client.get_top_predictors()
         if not data or 'ranking' not in data:
             logger.warning("Failed to fetch top predictors.")
             return
 
-        count = 0
+        pinned = {u.id for u in self.users if u.id not in self.discovered}
+        picked: Dict[str, User] = {}
         for row in data['ranking']:
-            if count >= TOP_PREDICTORS_LIMIT:
+            if len(picked) >= limit:
                 break
 
-            uid = str(row.get('id'))
+            uid = str(row.get('id', ''))
             name = row.get('nickname') or row.get('slug') or "Unknown"
             
-            if not uid:
-                continue
-                
-            if any(u.id == uid for u in self.users):
-                continue
-                
-            # Extract Stats
-            # JSON 'roi' = Profit (Units). 'percentage' = Win Rate. Real ROI must be calculated.
-            roi_percent = 0.0
-            profit_units = 0.0
-            win_rate_val = 0.0
-            
-            stats = row.get('voteStatistics', {}).get('allTime', {})
-            if stats:
-                # Profit
-                profit_units = float(stats.get('roi', 0.0) or 0.0)
-                
-                # Win Rate
-                wr_str = stats.get('percentage', '0').replace('%', '')
-                if wr_str.isdigit() or wr_str.replace('.', '', 1).isdigit():
-                    win_rate_val = float(wr_str)
-                
-                # ROI (Yield) = Profit / Total Bets * 100 (assuming flat stakes)
-                total_bets = 0
-                total_str = str(stats.get('total', '0'))
-                if total_str.isdigit():
-                    total_bets = int(total_str)
-                
-                if total_bets > 0:
-                    roi_percent = (profit_units / total_bets) * 100
-
-            # --- User Filtering ---
-            # 1. Min ROI
-            if roi_percent < MIN_ROI:
-                # logger.debug(f"Skipping {name}: ROI {roi_percent:.1f}% < {MIN_ROI}%")
+            if not uid or uid in pinned or uid in picked:
                 continue
                 
-            # 2. Min Total Bets
-            if total_bets < MIN_TOTAL_BETS:
-                # logger.debug(f"Skipping {name}: Bets {total_bets} < {MIN_TOTAL_BETS}")
+            stats = row.get('voteStatistics', {})
+            all_time = predictor_stats(stats.get('allTime'))
+            if not passes_filters(all_time, settings):
                 continue
-                
-            # 3. Min Avg Odds (Check if available in stats?)
-            # stats['avgCorrectOdds'] exists but strictly avg odds for ALL bets might not be there directly
-            # We can use avgCorrectOdds as a proxy or skip if strictly needed.
-            # But the requirement was "Avg Odds". 
-            # Often 'voteStatistics' has 'avgOdds'. Let's check previous inspection?
-            # It had "avgCorrectOdds": {"decimalValue": "2.11"...}
-            # Iterate and check? 
-            # For now, let's use avgCorrectOdds if available or just proceed. 
-            # API inspection showed: 
-            # "avgCorrectOdds": {...}
-            # It didn't show "avgOdds" for all bets.
-            # Use avgCorrectOdds for filtering? Or skip for now?
-            # User asked for "filters for... avg odds". 
-            # Let's try to parse 'avgCorrectOdds'
-            avg_odds = 0.0
-            aco = stats.get('avgCorrectOdds', {})
-            if aco:
-                 val = aco.get('decimalValue')
-                 if val:
-                     try:
-                         avg_odds = float(val)
-                     except: pass
-            
-            if avg_odds < MIN_AVG_ODDS:
-                 # logger.debug(f"Skipping {name}: AvgOdds {avg_odds} < {MIN_AVG_ODDS}")
-                 continue
-
-            # --- User Filtering End ---
+            current = predictor_stats(stats.get('current'))
 
-            # Extract Current Stats
-            cur_roi = 0.0
-            cur_profit = 0.0
-            cur_wr = 0.0
-            
-            cur_stats = row.get('voteStatistics', {}).get('current', {})
-            if cur_stats:
-                cur_profit = float(cur_stats.get('roi', 0.0) or 0.0)
-                
-                cwr_str = cur_stats.get('percentage', '0').replace('%', '')
-                if cwr_str.isdigit() or cwr_str.replace('.', '', 1).isdigit():
-                    cur_wr = float(cwr_str)
-                    
-                cur_total = 0
-                ct_str = str(cur_stats.get('total', '0'))
-                if ct_str.isdigit():
-                    cur_total = int(ct_str)
-                    
-                if cur_total > 0:
-                    cur_roi = (cur_profit / cur_total) * 100
-
-            new_user = User(
+            picked[uid] = User(
                 id=uid, 
                 name=name, 
                 slug=row.get('slug', name),
-                roi=roi_percent,
-                profit=profit_units,
-                win_rate=win_rate_val,
-                current_roi=cur_roi,
-                current_profit=cur_profit,
-                current_win_rate=cur_wr
+                roi=all_time.roi,
+                profit=all_time.profit,
+                win_rate=all_time.win_rate,
+                current_roi=current.roi,
+                current_profit=current.profit,
+                current_win_rate=current.win_rate
             )
-            self.users.append(new_user)
-            count += 1
-            
-        logger.info(f"Discovered {count} new top predictors.")
 
+        previous = self.discovered
+        # New list: a running cycle keeps iterating the old one
+        self.users = [u for u in self.users if u.id in pinned] + list(picked.values())
+        self.discovered = set(picked)
+        for uid in previous - self.discovered:
+            self._forget(uid)
+        logger.info(
+            f"Discovered {len(self.discovered - previous)} new top predictors "
+            f"({len(picked)} followed, {len(previous - self.discovered)} dropped)."
+        )
 
 
-    async def check_line_movement(self, bet: Bet):
-        if not bet.odds or bet.odds <= 1.0: return
 
-        snapshot = await self.storage.get_odds_snapshot(bet.id)
-        previous_odds = snapshot['odds'] if snapshot else None
-        
-        if previous_odds and previous_odds > 1.0:
-            diff = abs(bet.odds - previous_odds)
-            movement_pct = diff / previous_odds
-            
-            if movement_pct >= 0.15:
-                # Significant movement
-                alert_sent = snapshot.get('alert_sent', 0)
-                if not alert_sent:
-                    logger.info(f"Line Movement! {bet.match_name}: {previous_odds} -> {bet.odds}")
-                    send_line_movement_alert(bet, previous_odds, movement_pct)
-                    await self.storage.mark_alert_sent(bet.id)
-            else:
-                # Normalized - reset flag if set
-                if snapshot.get('alert_sent'):
-                     await self.storage.reset_alert_flag(bet.id)
-        
-        # Always update snapshot
-        await self.storage.upsert_odds_snapshot(bet.id, bet.odds, previous_odds)
+    async def check_line_movements(self, bets: List[Bet]):
+        """Line-movement stage for a whole cycle: one snapshot lookup, one NumPy pass, bulk writes."""
+        import numpy as np
+
+        bets = list({b.id: b for b in bets if b.odds and b.odds > 1.0}.values())
+        if not bets:
+            return
+        with tracer.child_span("check_line_movements", bets=len(bets)):
+            # In-memory cache first; the DB is only consulted for bets we haven't seen since startup
+            missing = [b.id for b in bets if b.id not in self.odds_cache]
+            stored = await self.storage.get_odds_snapshots(missing) if missing else {}
+
+            previous = np.full(len(bets), np.nan)
+            sent = np.zeros(len(bets), dtype=bool)
+            observed_at = [0] * len(bets)  # When the previous price was recorded: tells repeated moves apart
+            for i, bet in enumerate(bets):
+                snapshot = self.odds_cache.get(bet.id)
+                if snapshot is None and bet.id in stored:
+                    row = stored[bet.id]
+                    snapshot = (row['odds'], row['alert_sent'], row['updated_at'])
+                if snapshot is not None:
+                    previous[i] = snapshot[0] if snapshot[0] is not None else np.nan
+                    sent[i] = bool(snapshot[1])
+                    observed_at[i] = int(snapshot[2] or 0)
+
+            odds = np.fromiter((b.odds for b in bets), dtype=np.float64, count=len(bets))
+            move_pct, alert, reset = line_moves(odds, previous, sent, self.settings.line_movement_threshold)
+            # Snapshot writes are skipped when a cached price is unchanged
+            cached = np.fromiter((b.id in self.odds_cache for b in bets), dtype=bool, count=len(bets))
+            changed = ~cached | (odds != previous)
+
+            now = int(time.time())
+            rows, observations = [], []
+            for i in np.flatnonzero(changed):
+                bet = bets[i]
+                rows.append((bet.id, bet.odds, None if np.isnan(previous[i]) else float(previous[i])))
+                observations.append((bet.id, now, bet.odds))
+
+            alert_idx = np.flatnonzero(alert)
+            alerts = []
+            for i in alert_idx:
+                bet = bets[i]
+                logger.info(f"Line Movement! {bet.match_name}: {previous[i]} -> {bet.odds}")
+                alerts.append(line_movement_alert(bet, float(previous[i]), float(move_pct[i]), observed_at[i]))
+            flag_rows = [(bets[i].id, 1) for i in alert_idx] + [(bets[i].id, 0) for i in np.flatnonzero(reset)]
+            # New prices, queued alerts and alert flags are committed together: a crash in between
+            # can neither drop a move (price stored, alert not) nor queue it twice (alert, no flag)
+            with tracer.child_span("notify", kind="line_movement", alerts=len(alerts)):
+                recorded = await self.storage.record_line_movements(rows, outbox_rows(alerts), flag_rows)
+            if not recorded:
+                return  # Cache untouched: the same moves are detected again next cycle
+            if alerts:
+                self.outbox.wake()
+            self._odds_observations.extend(observations)
+
+            flags = (sent | alert) & ~reset
+            for i, bet in enumerate(bets):
+                self.odds_cache[bet.id] = [bet.odds, int(flags[i]), now]
+
+    async def update_odds_history(self):
+        """Persist this cycle's price changes and recompute movement signals for all active bets."""
+        observations, self._odds_observations = self._odds_observations, []
+        now = int(time.time())
+        with tracer.child_span("odds_history", observations=len(observations)):
+            # Bets first seen since startup: pull their stored path before appending to it
+            missing = list({bet_id for bet_id, _, _ in observations if bet_id not in self.odds_history})
+            if missing:
+                for bet_id, blocks in (await self.storage.get_odds_history(missing)).items():
+                    self.odds_history.load(bet_id, *decode_blocks(blocks))
+            for bet_id, ts, odds in observations:
+                self.odds_history.record(bet_id, ts, odds)
+            await self.storage.append_odds_history(observations)
+
+            ttl_cutoff = now - ODDS_CACHE_TTL_HOURS * 3600
+            active = [bet_id for bet_id, entry in self.odds_cache.items() if entry[2] >= ttl_cutoff]
+            self.odds_history.retain(active)
+            self.odds_signals = self.odds_history.signals(active, now)
+
+    async def notify_consensus(self):
+        """Alert on selections that reached consensus this cycle, then drop finished events."""
+        alerts = []
+        for found in self.consensus.drain():
+            bet = found.bet
+            logger.info(
+                f"Consensus! {len(found.users)} predictors on {bet.match_name}: {bet.choice_name} "
+                f"(confidence {found.confidence:.0%})"
+            )
+            alerts.append(consensus_alert(found))
+        with tracer.child_span("notify", kind="consensus", alerts=len(alerts)):
+            await self.outbox.enqueue(alerts)
+        self.consensus.expire()
 
     async def check_all_users(self):
-        """Concurrent check of all users."""
-        tasks = [self.check_user(user) for user in self.users]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        """Concurrent check of all users, then the cycle-wide stages: one trace per cycle."""
+        with tracer.span("check_all_users", users=len(self.users)):
+            await self._check_all_users()
+
+    async def _check_all_users(self):
+        with tracer.child_span("check_users", users=len(self.users)):
+            tasks = [self.check_user(user) for user in self.users]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
         
         for res in results:
              if isinstance(res, Exception):
                  logger.error(f"Error checking user: {res}")
 
+        batch, self._line_batch = self._line_batch, []
+        try:
+            await self.check_line_movements(batch)
+        except Exception as e:
+            logger.error(f"Error checking line movement: {e}")
+
+        try:
+            await self.update_odds_history()
+        except Exception as e:
+            logger.error(f"Error updating odds history: {e}")
+
+        try:
+            await self.notify_consensus()
+        except Exception as e:
+            logger.error(f"Error sending consensus alerts: {e}")
+
+        if self._dirty_circuits:
+            self.spawn(self.persist_circuits())
+
+        USERS_MONITORED.set(len(self.users))
+        USERS_PAUSED.set(len(self.paused_users))
+
     async def check_user(self, user: User):
-        # 1. Check Rate Limit Status
-        failures, paused_until = await self.storage.get_user_status(str(user.id))
-        if paused_until:
-            if datetime.now() < paused_until:
-                # logger.info(f"Skipping paused user {user.name} until {paused_until}")
-                return
-            else:
-                # Unpause
-                await self.storage.reset_failure(str(user.id))
+        with tracer.child_span("check_user", user_id=str(user.id)) as span:
+            await self._check_user(user, span)
+
+    async def _check_user(self, user: User, span):
+        uid = str(user.id)
+        endpoint = predictions_endpoint(user.id)
+
+        # 1. Circuit breakers (in memory: no DB round-trip before the fetch)
+        if not self.breaker.allow(uid):
+            self.paused_users.add(uid)
+            return
+        self.paused_users.discard(uid)
+        if not self.client.available(endpoint):
+            self.breaker.release(uid)  # The endpoint is failing for everyone: not this user's failure
+            return
 
         # 2. Fetch Bets
         try:
+            wait_start = time.perf_counter()
             async with self.http_semaphore:
+                SEMAPHORE_WAIT_SECONDS.observe(time.perf_counter() - wait_start)
                 data = await self.client.get_user_predictions(user.id)
         except UserNotFoundError:
-            logger.warning(f"User {user.name} (404) not found. Pausing.")
-            # 404 -> Trigger Long Pause
-            await self.storage.increment_failure(str(user.id), MAX_RETRIES, PAUSE_DURATION_MINUTES)
+            logger.warning(f"User {user.name} (404) not found.")
+            # 404 -> once the circuit opens, it stays open for at least the long pause
+            self.breaker.failure(uid, PAUSE_DURATION_MINUTES * 60)
             return
 
         if not data:
-            # Other error -> Increment failure but DO NOT PAUSE (0 mins)
-            await self.storage.increment_failure(str(user.id), MAX_RETRIES, 0)
+            if self.client.available(endpoint):
+                self.breaker.failure(uid)  # Backs off exponentially once the circuit opens
+            else:
+                self.breaker.release(uid)  # Rejected (or just tripped) by the endpoint circuit
             return
-        
-        # Reset failures on success
-        if failures > 0:
-            await self.storage.reset_failure(str(user.id))
+        self.breaker.success(uid)
 
         predictions = data.get('predictions', []) 
+        settings = self.settings
+        span.set_attribute("predictions", len(predictions))
         bets_by_match = {}
+        known = self.seen_cache.get(uid, set())  # Handled in a previous poll: no DB round-trip needed
+        handled = set()
+        seen_rows = []  # Seen-marks, committed together with this poll's alerts
         
         for p in predictions:
             # Bet Parsing Logic
             match_custom_id = p.get('customId')
-            endpoint_id = p.get('id') 
-            unique_key = str(endpoint_id or f"{p.get('eventId')}_{p.get('vote')}")
+            unique_key = prediction_key(p)
 
             # Get correct event slug
             event_slug = p.get('eventSlug')
@@ -353,7 +870,9 @@ class Monitor:
             # Check Status - Skip if match is already finished
             status_type = p.get('status', {}).get('type')
             if status_type == 'finished':
-                await self.storage.add_seen(unique_key, str(user.id))
+                if unique_key not in known and unique_key not in handled:
+                    seen_rows.append((unique_key, uid))
+                handled.add(unique_key)
                 continue
 
             # Time Filtering
@@ -364,24 +883,18 @@ class Monitor:
                 now = datetime.now()
                 
                 # 1. 24-Hour Lookahead Limit
-                if start_time > now + timedelta(hours=TIME_LOOKAHEAD_HOURS):
+                if start_time > now + timedelta(hours=settings.time_lookahead_hours):
                     continue
 
                 # 2. Started Match Limit (Max 5 mins grace)
                 if start_time < now:
-                    if now - start_time > timedelta(minutes=MATCH_GRACE_PERIOD_MINUTES):
-                        await self.storage.add_seen(unique_key, str(user.id)) # suppress
+                    if now - start_time > timedelta(minutes=settings.match_grace_period_minutes):
+                        if unique_key not in known and unique_key not in handled:
+                            seen_rows.append((unique_key, uid)) # suppress
+                        handled.add(unique_key)
                         continue
 
-            # Parse Odds (moved up)
-            try:
-                odds_val = p.get('odds', {}).get('decimalValue')
-                if odds_val and str(odds_val).replace('.', '', 1).isdigit():
-                    odds = float(odds_val)
-                else:
-                    odds = 0.0
-            except (ValueError, TypeError):
-                odds = 0.0
+            odds = prediction_odds(p)
 
             # Create Bet Object Early
             bet = Bet(
@@ -401,15 +914,16 @@ class Monitor:
                 created_at=datetime.now()
             )
             
-            # Check Line Movement (Always run for active bets)
-            await self.check_line_movement(bet)
+            # Line movement is checked for every active bet in one batch after the cycle
+            self._line_batch.append(bet)
+            self.consensus.add(bet, user)
 
             # Check Is Seen (New Bet Alert Filter)
-            if await self.storage.is_seen(unique_key):
+            if unique_key in known or unique_key in handled or await self.storage.is_seen(unique_key):
+                handled.add(unique_key)
                 continue
-            
-            # Mark as seen in DB
-            await self.storage.add_seen(unique_key, str(user.id))
+            handled.add(unique_key)
+            seen_rows.append((unique_key, uid))
             
             # Group by Event ID
             eid = bet.event_id
@@ -417,25 +931,31 @@ class Monitor:
                 bets_by_match[eid] = []
             bets_by_match[eid].append(bet)
             
-        # Send Grouped Alerts
+        # Grouped alerts, ROI tracking rows and seen-marks are committed in one transaction
+        alerts, alerted = [], []
         for eid, bets in bets_by_match.items():
-            if not bets: continue
-            
-            logger.info(f"Sending grouped alert for {user.name}: {len(bets)} bets on match {eid}")
-            send_discord_alert(user, bets)
-            for b in bets:
-                print(f"[ALERT] {user.name} bet on {b.match_name} ({b.market_name}: {b.choice_name})")
-                # Store for ROI Tracking
-                await self.storage.store_alerted_bet(
-                    bet_id=b.id,
-                    user_id=user.id,
-                    event_id=b.event_id,
-                    market=b.market_name,
-                    selection=b.choice_name,
-                    odds=b.odds
-                )
+            logger.info(f"Queueing grouped alert for {user.name}: {len(bets)} bets on match {eid}")
+            alerts.append(bet_alert(user, bets))
+            alerted.extend((b.id, user.id, b.event_id, b.market_name, b.choice_name, b.odds) for b in bets)
+        with tracer.child_span("notify", alerts=len(alerts)):
+            recorded = await self.storage.record_new_bets(seen_rows, outbox_rows(alerts), alerted)
+        if recorded:
+            if alerts:
+                self.outbox.wake()
+        else:
+            # Nothing was marked seen: the same bets come up as new on the next poll
+            handled.difference_update(bet_id for bet_id, _ in seen_rows)
+
+        # High-water mark for the next poll (bounded by the size of one response)
+        self.seen_cache[uid] = handled
+        self.last_poll[uid] = time.time()
+
     async def resolve_pending_bets(self):
         """Check status of pending bets and update ROI stats."""
+        with self.profiler.phase("resolve_pending_bets"), tracer.span("resolve_pending_bets"):
+            await self._resolve_pending_bets()
+
+    async def _resolve_pending_bets(self):
         logger.info("Starting ROI Resolution Task...")
         pending = await self.storage.get_pending_bets()
         if not pending:
@@ -450,11 +970,20 @@ class Monitor:
                 bets_by_user[uid] = []
             bets_by_user[uid].append(row)
 
-        for user_id, bets in bets_by_user.items():
+        # Fetch user history (Page 0 should cover recent settled bets) for all users at once
+        # If bets are old, might need page 1, but 1h loop should catch them as they settle.
+        async def fetch_history(user_id):
+            async with self.http_semaphore:
+                return await self.client.get_user_predictions(user_id, page=0)
+
+        user_ids = list(bets_by_user)
+        histories = await asyncio.gather(*(fetch_history(uid) for uid in user_ids), return_exceptions=True)
+
+        for user_id, data in zip(user_ids, histories):
+            bets = bets_by_user[user_id]
             try:
-                # Fetch user history (Page 0 should cover recent settled bets)
-                # If bets are old, might need page 1, but 1h loop should catch them as they settle.
-                data = await self.client.get_user_predictions(user_id, page=0)
+                if isinstance(data, Exception):
+                    raise data
                 if not data: continue
 
                 predictions = data.get('predictions', [])
@@ -490,30 +1019,11 @@ class Monitor:
 
                     # Check Status
                     status_type = p.get('status', {}).get('type')
-                    if status_type in ('finished', 'canceled', 'interrupted', 'aborted'):
-                        correct = p.get('correct') # 1 = Won, -1 = Lost, 0 = Void?
-                        
-                        new_status = 'PENDING'
-                        profit = 0.0
-                        
-                        if status_type in ('canceled', 'interrupted', 'aborted') or correct == 0:
-                            new_status = 'VOID'
-                            profit = 0.0
-                        elif correct == 1:
-                            new_status = 'WON'
-                            odds = bet_row['odds']
-                            stake = bet_row['stake']
-                            profit = (odds * stake) - stake
-                        elif correct == -1:
-                            new_status = 'LOST'
-                            stake = bet_row['stake']
-                            profit = -stake
-                            new_status = 'VOID'
-                            profit = 0.0
-                        
-                        if new_status != 'PENDING':
-                            logger.info(f"Bet Resolved: {bet_id} -> {new_status} ({profit:+.2f})")
-                            await self.storage.update_bet_outcome(bet_id, new_status, profit)
+                    outcome = settle(status_type, p.get('correct'), bet_row['odds'], bet_row['stake'])
+                    if outcome:
+                        new_status, profit = outcome
+                        logger.info(f"Bet Resolved: {bet_id} -> {new_status} ({profit:+.2f})")
+                        await self.storage.update_bet_outcome(bet_id, new_status, profit)
 
             except Exception as e:
                 logger.error(f"Error resolving bets for user {user_id}: {e}")
@@ -1,176 +1,87 @@
 import logging
-import requests
-import json
 from datetime import datetime
-from urllib.parse import quote
 from typing import List
 from .models import Bet, User
-from .config import DISCORD_WEBHOOK_URL, DISCORD_HEALTH_WEBHOOK_URL
+from .config import (
+    DISCORD_WEBHOOK_URL, DISCORD_HEALTH_WEBHOOK_URL, ALERT_DIGEST_THRESHOLD, ALERT_WINDOW_SECONDS,
+    ENABLE_CONSOLE_LOGS, ENABLE_DESKTOP_NOTIFICATIONS, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID,
+    ALERT_WEBHOOK_URLS, ALERT_LOG_PATH, SINK_QUEUE_SIZE
+)
+from .alerts import Alert
+from .templates import bet_embed, consensus_embed, line_movement_embed, user_card
+from .sinks import (
+    ConsoleSink, DesktopSink, DiscordSink, FileSink, SinkRegistry, TelegramSink, WebhookSink, post_json
+)
 
 logger = logging.getLogger(__name__)
 
-def send_discord_alert(user: User, bets: List[Bet]):
-    if not DISCORD_WEBHOOK_URL or not bets:
-        return
-
-    try:
-        # Use first bet for Match/Sport details (assuming grouped by match)
-        first_bet = bets[0]
-        
-        # Build Bet Strings
-        bet_lines = []
-        for bet in bets:
-            bet_lines.append(f"• **{bet.market_name}**: {bet.choice_name} @ {bet.odds}")
-            
-        bet_content = "\n".join(bet_lines)
-
-        # Prepare Links
-        # User Link: https://www.sofascore.com/user/profile/{user.id}
-        user_link = f"https://www.sofascore.com/user/profile/{user.id}"
-        
-        # Match Link (use first bet)
-        slug = first_bet.event_slug or "match"
-        sport = first_bet.sport or "sport"
-        custom_id = first_bet.custom_id
-        
-        if custom_id:
-             match_link = f"https://www.sofascore.com/{sport}/match/{slug}/{custom_id}#id:{first_bet.event_id}"
-        else:
-             match_link = f"https://www.sofascore.com/{slug}/{first_bet.event_id}"
-
-        # Determine Color (Green if profitable in either All-time or Current)
-        is_profitable = (user.roi is not None and user.roi > 0) or (user.current_roi is not None and user.current_roi > 0)
-        color = 3447003 if is_profitable else 10181046 # Green (0x349933) vs Grey (0x9B9B96)
-
-        # Build Bets Field
-        bet_field_lines = []
-        for i, bet in enumerate(bets):
-            # 🎯 Highlight high confidence or simply the selection
-            icon = "🎯" 
-            bet_line = f"**{i+1}.** {bet.market_name}: {bet.choice_name} @ **{bet.odds}** {icon}"
-            bet_field_lines.append(bet_line)
-        
-        bets_value = "\n".join(bet_field_lines)
-
-        # Stats Icons
-        icon_all = "⚪"
-        icon_cur = "🟢" if (user.current_roi and user.current_roi > 10) else "⚪"
-
-        embed = {
-            "title": "⚽️ NEW BET ALERT",
-            "color": color,
-            "fields": [
-                {
-                    "name": "🔮 Predictor",
-                    "value": f"[{user.name}]({user_link})",
-                    "inline": True
-                },
-                {
-                    "name": "📊 Performance",
-                    "value": (
-                        f"**All Time** {icon_all}\n"
-                        f"ROI: **{user.roi or 0:.1f}%** | P&L: **{user.profit or 0:+.0f}** | Win: **{user.win_rate or 0:.0f}%**\n\n"
-                        f"**Current** {icon_cur}\n"
-                        f"ROI: **{user.current_roi or 0:.1f}%** | P&L: **{user.current_profit or 0:+.0f}** | Win: **{user.current_win_rate or 0:.0f}%**"
-                    ),
-                    "inline": True
-                },
-                {
-                    "name": "⚽️ Match",
-                    "value": f"[{first_bet.match_name}]({match_link})",
-                    "inline": False
-                },
-                {
-                    "name": f"🎯 Bets ({len(bets)})",
-                    "value": bets_value,
-                    "inline": False
-                }
-            ],
-            "footer": {
-                "text": "Sofascore Monitor • Antigravity",
-                # "icon_url": "https://your-logo-url.png" # Placeholder
-            },
-            "timestamp": datetime.utcnow().isoformat()
-        }
-
-        payload = {
-            "embeds": [embed]
-        }
-        
-        # Retry loop for rate limits
-        import time
-        max_retries = 3
-        for attempt in range(max_retries):
-            response = requests.post(
-                DISCORD_WEBHOOK_URL,
-                data=json.dumps(payload),
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code == 204:
-                return # Success
-                
-            if response.status_code == 429:
-                try:
-                    data = response.json()
-                    retry_after = data.get('retry_after', 1.0)
-                    logger.warning(f"Discord Rate Limited. Sleeping for {retry_after}s...")
-                    time.sleep(float(retry_after) + 0.1) # Add buffer
-                    continue
-                except:
-                    time.sleep(1)
-                    continue
-
-            # Other error
-            logger.error(f"Failed to send Discord alert: {response.text}")
-            break
-
-    except Exception as e:
-        logger.error(f"Error sending Discord webhook: {e}")
-
-def send_line_movement_alert(bet: Bet, previous_odds: float, movement_pct: float):
-    if not DISCORD_WEBHOOK_URL:
-        return
 
-    try:
-        # Calculate stats
-        direction = "DROP" if bet.odds < previous_odds else "RISE"
-        arrow = "🔻" if bet.odds < previous_odds else "🔺"
-        color = 15158332 if bet.odds < previous_odds else 3066993 # Red vs Blue/Green? 
-        # Actually Drop is usually good for value if you caught it early? 
-        # But here we are tracking a tipster's bet. 
-        # If odds drop, the tipster's pick is becoming more favorite (market agrees).
-        # Value is arguably GONE if you follow now.
-        # But user wants to know.
-        
-        # Link
-        # Match Link
-        slug = bet.event_slug or "match"
-        sport = bet.sport or "sport"
-        custom_id = bet.custom_id
-        
-        if custom_id:
-             match_link = f"https://www.sofascore.com/{sport}/match/{slug}/{custom_id}#id:{bet.event_id}"
+# Alert fan-out; workers run while the monitor does (see sinks.py)
+sinks = SinkRegistry()
+
+
+def configure_sinks() -> SinkRegistry:
+    """(Re)build the sink list from config. Call before starting `sinks.run_forever`."""
+    sinks.clear()
+    common = {"batch_window": ALERT_WINDOW_SECONDS, "queue_size": SINK_QUEUE_SIZE}
+    if DISCORD_WEBHOOK_URL:
+        sinks.register(DiscordSink(DISCORD_WEBHOOK_URL, ALERT_DIGEST_THRESHOLD, **common))
+    if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
+        sinks.register(TelegramSink(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, **common))
+    for i, url in enumerate(ALERT_WEBHOOK_URLS):
+        sinks.register(WebhookSink(url, name=f"webhook{i}" if i else "webhook", **common))
+    if ALERT_LOG_PATH:
+        sinks.register(FileSink(ALERT_LOG_PATH, queue_size=SINK_QUEUE_SIZE))
+    if ENABLE_CONSOLE_LOGS:
+        sinks.register(ConsoleSink(queue_size=SINK_QUEUE_SIZE))
+    if ENABLE_DESKTOP_NOTIFICATIONS:
+        command = DesktopSink.available()
+        if command:
+            sinks.register(DesktopSink(command, **common))
         else:
-             match_link = f"https://www.sofascore.com/{slug}/{bet.event_id}"
-
-        embed = {
-            "title": f"{arrow} Line Movement Alert ({movement_pct*100:.1f}%)",
-            "color": color,
-            "fields": [
-                {"name": "Match", "value": f"[{bet.match_name}]({match_link})", "inline": False},
-                {"name": "Selection", "value": f"**{bet.market_name}**: {bet.choice_name}", "inline": False},
-                {"name": "Odds Change", "value": f"{previous_odds} ➔ **{bet.odds}**", "inline": True},
-                {"name": "Movement", "value": f"{direction} of {abs(bet.odds - previous_odds):.2f}", "inline": True},
-            ],
-            "footer": {"text": "Sofascore Monitor • Line Tracking"}
-        }
-
-        payload = {"embeds": [embed]}
-        requests.post(DISCORD_WEBHOOK_URL, json=payload)
-
-    except Exception as e:
-        logger.error(f"Error sending line movement alert: {e}")
+            logger.warning("Desktop notifications enabled but this host has no notifier or display; sink not started.")
+    logger.info(f"Alert sinks: {', '.join(s.name for s in sinks.sinks) or 'none'}")
+    return sinks
+
+
+def bet_alert(user: User, bets: List[Bet]) -> Alert:
+    first_bet = bets[0]
+    picks = ", ".join(f"{b.choice_name} @ {b.odds}" for b in bets)
+    return Alert(
+        kind="bet",
+        key=("bet", str(user.id), tuple(sorted(b.id for b in bets))),
+        event_id=first_bet.event_id,
+        match=first_bet.match_name,
+        summary=f"🔮 {user_card(user).mention} (ROI {user.roi or 0:.1f}%): {picks}",
+        embed=bet_embed(user, bets),
+        priority=1,
+    )
+
+def line_movement_alert(bet: Bet, previous_odds: float, movement_pct: float, observed_at: int = 0) -> Alert:
+    """`observed_at`: when `previous_odds` was recorded, so a move that repeats (A->B, B->A, A->B) is a new alert."""
+    embed, arrow = line_movement_embed(bet, previous_odds, movement_pct)
+    return Alert(
+        kind="line_movement",
+        key=("line_movement", bet.id),
+        event_id=bet.event_id,
+        match=bet.match_name,
+        summary=f"{arrow} {bet.choice_name}: {previous_odds} ➔ {bet.odds} ({movement_pct*100:.1f}%)",
+        embed=embed,
+        priority=2,
+        idem_key=f"line_movement:{bet.id}:{previous_odds}:{bet.odds}:{observed_at}",  # Each move is its own alert
+    )
+
+def consensus_alert(consensus) -> Alert:
+    bet = consensus.bet
+    return Alert(
+        kind="consensus",
+        key=("consensus", bet.event_id, bet.choice_name),
+        event_id=bet.event_id,
+        match=bet.match_name,
+        summary=f"🤝 {len(consensus.users)} predictors on {bet.choice_name} ({consensus.confidence * 100:.0f}% confidence)",
+        embed=consensus_embed(consensus),
+        priority=0,
+    )
 
 def send_health_alert(status: str, message: str, color: int = 0x00FF00):
    """
@@ -192,7 +103,7 @@ def send_health_alert(status: str, message: str, color: int = 0x00FF00):
    payload = {"embeds": [embed]}
    
    try:
-       requests.post(DISCORD_HEALTH_WEBHOOK_URL, json=payload, timeout=5)
+       post_json(DISCORD_HEALTH_WEBHOOK_URL, payload, timeout=5)
    except Exception as e:
        logger.error(f"Failed to send health alert: {e}")
 
@@ -224,7 +135,7 @@ def send_roi_report(stats: dict):
         }
 
         payload = {"embeds": [embed]}
-        requests.post(DISCORD_WEBHOOK_URL, json=payload)
+        post_json(DISCORD_WEBHOOK_URL, payload)
         logger.info(f"Sent ROI Report: {total} bets, {roi:.2f}% ROI")
 
     except Exception as e:
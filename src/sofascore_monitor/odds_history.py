@@ -0,0 +1,206 @@
+"""
+Append-only odds history and line-movement signals.
+
+Storage layout: one row per (bet_id, block) in `odds_history`. A block holds
+up to BLOCK_POINTS price changes as two delta-encoded columns:
+
+    block_start / base_odds         first observation (epoch s, odds in ticks of 0.01)
+    ts_deltas                       int32 LE seconds since the previous point
+    odds_deltas                     int16 LE tick change since the previous point
+
+Appending is `UPDATE ... SET ts_deltas = ts_deltas || ?` on the open block,
+so a point costs 6 bytes and no rewrite. Only changes are stored; the path
+is piecewise constant between points. Decoding a block is one `cumsum`.
+
+`OddsHistory` keeps the recent window of each active bet's path in memory and
+computes movement signals for every active bet in one vectorized NumPy pass.
+"""
+import struct
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+PRICE_SCALE = 100          # Odds are stored as integer ticks of 0.01
+BLOCK_POINTS = 256         # Points per block before a new block is started
+TS_DELTA = struct.Struct("<i")
+ODDS_DELTA = struct.Struct("<h")
+
+# (block_start, base_odds, ts_deltas, odds_deltas) as stored
+Block = Tuple[int, int, bytes, bytes]
+Observation = Tuple[str, int, float]  # (bet_id, epoch, odds)
+
+
+def to_ticks(odds: float) -> int:
+    return int(round(odds * PRICE_SCALE))
+
+
+def append_deltas(n: int, last_ts: int, last_odds: int, ts: int, ticks: int) -> Optional[Tuple[bytes, bytes]]:
+    """Encoded (ts_delta, odds_delta) to append to an open block, or None if a new block is needed."""
+    if n >= BLOCK_POINTS:
+        return None
+    dt, dodds = ts - last_ts, ticks - last_odds
+    if not (0 <= dt <= 0x7FFFFFFF and -0x8000 <= dodds <= 0x7FFF):
+        return None
+    return TS_DELTA.pack(dt), ODDS_DELTA.pack(dodds)
+
+
+def decode_blocks(blocks: Iterable[Block]):
+    """Concatenate a bet's blocks (in block_start order) into (epochs int64, ticks int64) arrays."""
+    import numpy as np
+
+    ts_parts, odds_parts = [], []
+    for block_start, base_odds, ts_deltas, odds_deltas in blocks:
+        ts = np.frombuffer(ts_deltas, dtype="<i4").astype(np.int64)
+        odds = np.frombuffer(odds_deltas, dtype="<i2").astype(np.int64)
+        ts_parts.append(block_start + np.concatenate(([0], np.cumsum(ts))))
+        odds_parts.append(base_odds + np.concatenate(([0], np.cumsum(odds))))
+    if not ts_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(ts_parts), np.concatenate(odds_parts)
+
+
+def line_moves(odds, previous, alert_sent, threshold: float):
+    """Vectorized line-movement check over aligned arrays.
+
+    `previous` is NaN where there is no snapshot; those bets (and previous <= 1.0)
+    never move. Returns (move_pct, alert, reset): `alert` crossed the threshold
+    and has not been alerted yet, `reset` is back under it with the flag still set.
+    """
+    import numpy as np
+
+    odds = np.asarray(odds, dtype=np.float64)
+    previous = np.asarray(previous, dtype=np.float64)
+    sent = np.asarray(alert_sent, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        valid = previous > 1.0
+    move_pct = np.zeros_like(odds)
+    np.divide(np.abs(odds - previous), previous, out=move_pct, where=valid)
+    moved = valid & (move_pct >= threshold)
+    return move_pct, moved & ~sent, valid & ~moved & sent
+
+
+@dataclass
+class MovementSignals:
+    """Per-bet signals, aligned with `bet_ids`.
+
+    move_pct:  last change, (last - previous) / previous
+    velocity:  log-return per hour over the window
+    drift:     (last - TWAP) / TWAP over the window
+    """
+    bet_ids: List[str]
+    last: "np.ndarray"
+    previous: "np.ndarray"
+    move_pct: "np.ndarray"
+    velocity: "np.ndarray"
+    drift: "np.ndarray"
+    points: "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.bet_ids)
+
+    def row(self, i: int) -> dict:
+        return {
+            "bet_id": self.bet_ids[i],
+            "odds": float(self.last[i]),
+            "previous_odds": float(self.previous[i]),
+            "move_pct": float(self.move_pct[i]),
+            "velocity_per_hour": float(self.velocity[i]),
+            "drift": float(self.drift[i]),
+            "points": int(self.points[i]),
+        }
+
+    def top(self, n: int = 20, by: str = "velocity") -> List[dict]:
+        import numpy as np
+
+        values = getattr(self, by)
+        order = np.argsort(-np.abs(values), kind="stable")[:n]
+        return [self.row(int(i)) for i in order]
+
+
+class OddsHistory:
+    """Recent price paths for active bets (ticks, piecewise constant between points)."""
+
+    def __init__(self, window_seconds: int):
+        self.window = window_seconds
+        self.paths: Dict[str, Tuple[List[int], List[int]]] = {}
+
+    def __contains__(self, bet_id: str) -> bool:
+        return bet_id in self.paths
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def load(self, bet_id: str, epochs: Sequence[int], ticks: Sequence[int]):
+        self.paths[bet_id] = ([int(t) for t in epochs], [int(o) for o in ticks])
+        self._trim(bet_id)
+
+    def record(self, bet_id: str, ts: int, odds: float) -> bool:
+        """Add an observation. Returns False if the price did not change."""
+        ticks = to_ticks(odds)
+        epochs, prices = self.paths.setdefault(bet_id, ([], []))
+        if prices and prices[-1] == ticks:
+            return False
+        epochs.append(ts)
+        prices.append(ticks)
+        self._trim(bet_id)
+        return True
+
+    def _trim(self, bet_id: str):
+        # Keep the last point before the window: it is the price at the window start
+        epochs, prices = self.paths[bet_id]
+        cutoff = epochs[-1] - self.window if epochs else 0
+        drop = 0
+        while drop + 1 < len(epochs) and epochs[drop + 1] <= cutoff:
+            drop += 1
+        if drop:
+            del epochs[:drop]
+            del prices[:drop]
+
+    def retain(self, bet_ids: Iterable[str]):
+        keep = set(bet_ids)
+        for bet_id in [b for b in self.paths if b not in keep]:
+            del self.paths[bet_id]
+
+    def signals(self, bet_ids: Iterable[str], now: int) -> MovementSignals:
+        """Movement signals for `bet_ids` (those with history) in one vectorized pass."""
+        import numpy as np
+
+        ids = [b for b in bet_ids if self.paths.get(b, ([], []))[0]]
+        counts = np.array([len(self.paths[b][0]) for b in ids], dtype=np.int64)
+        nb = len(ids)
+        if nb == 0:
+            empty = np.empty(0)
+            return MovementSignals([], empty, empty, empty, empty, empty, empty.astype(np.int64))
+
+        ts = np.fromiter((t for b in ids for t in self.paths[b][0]), dtype=np.float64, count=int(counts.sum()))
+        px = np.fromiter((o for b in ids for o in self.paths[b][1]), dtype=np.float64, count=int(counts.sum()))
+        px /= PRICE_SCALE
+        seg = np.repeat(np.arange(nb), counts)
+        first_idx = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        last_idx = first_idx + counts - 1
+        start = now - self.window
+
+        last = px[last_idx]
+        previous = px[np.maximum(last_idx - 1, first_idx)]
+        move_pct = (last - previous) / previous
+
+        # Each point holds until the next point of the same bet (or now); clip to the window
+        end = np.empty_like(ts)
+        end[:-1] = ts[1:]
+        end[last_idx] = now
+        duration = np.clip(end, start, now) - np.clip(ts, start, now)
+        weight = np.bincount(seg, weights=duration, minlength=nb)
+        twap = np.bincount(seg, weights=px * duration, minlength=nb)
+        twap = np.divide(twap, weight, out=last.copy(), where=weight > 0)
+        drift = (last - twap) / twap
+
+        # Price at the window start: last point at/before it, else the first point
+        before = np.bincount(seg, weights=(ts <= start), minlength=nb).astype(np.int64)
+        start_idx = first_idx + np.maximum(before - 1, 0)
+        hours = (now - np.maximum(ts[start_idx], start)) / 3600.0
+        log_return = np.log(last / px[start_idx])
+        velocity = np.divide(log_return, hours, out=np.zeros(nb), where=hours > 0)
+
+        return MovementSignals(ids, last, previous, move_pct, velocity, drift, counts)
@@ -0,0 +1,136 @@
+"""
+Transactional alert outbox.
+
+New-bet alerts are written to `alert_outbox` in the same transaction as the
+seen-marks (`record_new_bets`), so a bet is either marked seen *and* queued
+for alerting, or neither: a crash or a failed post can no longer lose an
+alert, and polling never waits on the network. Line-movement alerts are
+committed the same way with the new prices and their alert flags
+(`record_line_movements`).
+
+`OutboxRelay` drains the table into the sink registry:
+
+1. claim due entries (each is leased for `lease_seconds`, so a second relay
+   or a restarted process does not pick it up while it is in flight)
+2. publish each to the sinks that have not acknowledged it yet
+3. record per-sink acknowledgements; fully delivered entries are done,
+   the rest are retried with exponential backoff up to `max_attempts`
+
+Entries are unique by idempotency key, so re-enqueueing an alert (a retried
+cycle, a restart replaying the same odds move) is a no-op while the entry is
+kept. Delivery is at-least-once per sink: a crash between a successful post
+and its ack being written, or a lease expiring mid-delivery, posts it again.
+"""
+import asyncio
+import logging
+import time
+from typing import Iterable, List
+
+from .alerts import Alert
+from .metrics import OUTBOX_ENTRIES_TOTAL
+from .sinks import SinkRegistry
+from .storage import StorageBackend
+from .storage.base import OutboxRow
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 3600
+
+
+def outbox_rows(alerts: Iterable[Alert]) -> List[OutboxRow]:
+    return [(alert.idempotency_key, alert.to_json()) for alert in alerts]
+
+
+class OutboxRelay:
+    def __init__(self, storage: StorageBackend, registry: SinkRegistry, batch_size: int = 100,
+                 lease_seconds: int = 120, max_attempts: int = 8, poll_seconds: float = 2.0,
+                 backoff_seconds: float = 5.0):
+        self.storage = storage
+        self.registry = registry
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.backoff_seconds = backoff_seconds
+        self._wake = asyncio.Event()
+
+    def wake(self):
+        """New entries were committed: drain now instead of at the next poll."""
+        self._wake.set()
+
+    async def enqueue(self, alerts: List[Alert]):
+        if alerts:
+            await self.storage.enqueue_alerts(outbox_rows(alerts))
+            self.wake()
+
+    async def run_once(self) -> int:
+        """Claim one batch, deliver it and record the acks. Returns the number of entries completed."""
+        if not self.registry.running:
+            return 0  # Entries stay in the table until the sink workers are up
+        entries = await self.storage.claim_outbox(self.batch_size, self.lease_seconds)
+        if not entries:
+            return 0
+
+        in_flight = []
+        for entry in entries:
+            delivered = set(filter(None, entry["delivered_sinks"].split(",")))
+            try:
+                alert = Alert.from_json(entry["payload"])
+            except (ValueError, KeyError, TypeError) as e:
+                logger.error(f"Dropping unreadable outbox entry {entry['idem_key']}: {e}")
+                in_flight.append((entry, delivered, None))
+                continue
+            pending = [s.name for s in self.registry.sinks if s.name not in delivered]
+            in_flight.append((entry, delivered, self.registry.publish(alert, only=pending)))
+
+        # Wait for the sinks, but never past the lease: after that another claim may pick the entry up
+        acks = [f for _, _, futures in in_flight if futures for f in futures.values()]
+        if acks:
+            await asyncio.wait(acks, timeout=self.lease_seconds * 0.9)
+
+        sinks = {s.name for s in self.registry.sinks}
+        now = time.time()
+        results, completed = [], 0
+        for entry, delivered, futures in in_flight:
+            for name, future in (futures or {}).items():
+                if future.done() and future.result():
+                    delivered.add(name)
+            if futures is None or sinks <= delivered:
+                result, done, retry_at = "delivered" if futures is not None else "dead", True, int(now)
+            elif entry["attempts"] >= self.max_attempts:
+                logger.error(
+                    f"Giving up on alert {entry['idem_key']} after {entry['attempts']} attempts "
+                    f"(undelivered: {', '.join(sorted(sinks - delivered))})"
+                )
+                result, done, retry_at = "dead", True, int(now)
+            else:
+                delay = min(self.backoff_seconds * 2 ** (entry["attempts"] - 1), MAX_BACKOFF_SECONDS)
+                result, done, retry_at = "retry", False, int(now + delay)
+            completed += done
+            OUTBOX_ENTRIES_TOTAL.inc(result=result)
+            results.append((entry["id"], ",".join(sorted(delivered)), done, retry_at))
+        await self.storage.ack_outbox(results)
+        return completed
+
+    async def drain(self) -> int:
+        """Run batches until nothing is due. Returns the number of entries completed."""
+        total = 0
+        while True:
+            completed = await self.run_once()
+            if not completed:
+                return total
+            total += completed
+
+    async def run_forever(self, stop_event: asyncio.Event):
+        # Undelivered entries simply stay in the table for the next start
+        while not stop_event.is_set():
+            self._wake.clear()
+            try:
+                await self.drain()
+            except Exception as e:
+                logger.error(f"Outbox relay error: {e}")
+            wake = asyncio.ensure_future(self._wake.wait())
+            stop = asyncio.ensure_future(stop_event.wait())
+            await asyncio.wait({wake, stop}, timeout=self.poll_seconds, return_when=asyncio.FIRST_COMPLETED)
+            wake.cancel()
+            stop.cancel()
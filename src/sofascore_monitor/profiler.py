@@ -0,0 +1,240 @@
+"""
+On-demand profiling for the live service.
+
+Armed at runtime (SIGUSR1 or `POST /debug/profile` on the admin server) and
+runs for N monitor cycles, then writes its output to the data directory:
+
+- sample:   a background thread samples every thread's stack at a fixed
+            interval and writes Brendan Gregg "folded" stacks
+            (`profile-<ts>-sample.folded`), ready for flamegraph.pl/speedscope.
+            Every stack is rooted at `phase:<name>` so the flamegraph splits
+            by cycle phase: the phase of the task (or `to_thread` call) the
+            sampled thread is running at that instant.
+- cprofile: deterministic cProfile of the event loop thread, one
+            `profile-<ts>-<phase>.prof` per phase (snakeviz/flameprof/pstats).
+            cProfile sees everything the loop runs while it is enabled and
+            only one profiler can be active at a time, so a phase that starts
+            while another is being profiled runs unprofiled (see `skipped`).
+
+The current phase lives in a ContextVar, like the current span in tracing:
+tasks started inside a phase inherit it, and concurrent phases (the poll
+cycle and a background resolution pass) do not overwrite each other.
+The sampler finds a sampled frame's context through CPython internals
+(`asyncio.events.Handle._run`, `concurrent.futures.thread._WorkItem`); on an
+interpreter without them, "sample" falls back to "cprofile", which is per
+phase through public APIs only.
+
+Nothing runs until profiling is requested, so the hook is free when idle.
+"""
+import asyncio
+import cProfile
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from datetime import datetime
+from pathlib import Path
+from types import CodeType
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODES = ("sample", "cprofile")
+IDLE_PHASE = "idle"
+
+_phase: ContextVar[str] = ContextVar("sofascore_profile_phase", default=IDLE_PHASE)
+
+
+def _private_code(get: Callable[[], CodeType]) -> Optional[CodeType]:
+    try:
+        return get()
+    except (AttributeError, ImportError):
+        return None
+
+
+# Private CPython internals used to attribute samples to a phase; None where they do not exist
+_HANDLE_RUN = _private_code(lambda: asyncio.events.Handle._run.__code__)
+_WORK_ITEM_RUN = _private_code(lambda: importlib.import_module("concurrent.futures.thread")._WorkItem.run.__code__)
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _context_of(frame):
+    """The context a sampled frame runs in, found on its stack: the asyncio callback's (tasks run
+    their steps in theirs) or the `to_thread` work item's. None for plain threads."""
+    while frame is not None:
+        code = frame.f_code
+        if code is _HANDLE_RUN or code is _WORK_ITEM_RUN:
+            owner = frame.f_locals.get("self")
+            if code is _HANDLE_RUN:
+                return getattr(owner, "_context", None)
+            # to_thread submits functools.partial(context.run, func, ...)
+            context = getattr(getattr(getattr(owner, "fn", None), "func", None), "__self__", None)
+            return context if isinstance(context, Context) else None
+        frame = frame.f_back
+    return None
+
+
+class ProfilerHook:
+    def __init__(self, output_dir, interval: float = 0.02, default_cycles: int = 3):
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.default_cycles = default_cycles
+        self.mode: Optional[str] = None
+        self.cycles_left = 0
+        self.last_outputs: List[str] = []
+        self._stacks: Counter = Counter()
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._thread_phases: Dict[int, str] = {}  # Phases entered outside an event loop
+        self._profiling: Optional[str] = None  # Phase whose cProfile is enabled
+        self.skipped: Counter = Counter()  # Phases not profiled because another one was
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._started_at: Optional[datetime] = None
+
+    @property
+    def active(self) -> bool:
+        return self.mode is not None
+
+    def request(self, mode: str = "sample", cycles: Optional[int] = None) -> dict:
+        """Arm profiling for the next `cycles` cycles. No-op if already running."""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {MODES}")
+        if self.active:
+            return self.status()
+        if mode == "sample" and (_HANDLE_RUN is None or _WORK_ITEM_RUN is None):
+            logger.warning("Profiling: this Python cannot tag samples by phase, using cprofile instead")
+            mode = "cprofile"
+
+        self.mode = mode
+        self.cycles_left = max(int(cycles or self.default_cycles), 1)
+        self._started_at = datetime.now()
+        self._stacks.clear()
+        self._profiles.clear()
+        self.skipped.clear()
+        if mode == "sample":
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+        logger.info(f"Profiling armed: mode={mode} cycles={self.cycles_left}")
+        return self.status()
+
+    def status(self) -> dict:
+        return {
+            "active": self.active,
+            "mode": self.mode,
+            "cycles_left": self.cycles_left,
+            "phase": self.current_phase,
+            "skipped": dict(self.skipped),
+            "last_outputs": self.last_outputs,
+        }
+
+    @property
+    def current_phase(self) -> str:
+        return _phase.get()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Tag everything inside the block, and the tasks it starts, with a cycle phase."""
+        token = _phase.set(name)
+        ident = None if _in_event_loop() else threading.get_ident()
+        if ident is not None:
+            self._thread_phases[ident] = name
+        profile = self._enable(name) if self.mode == "cprofile" else None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._profiling = None
+            _phase.reset(token)
+            if ident is not None:
+                self._thread_phases[ident] = _phase.get()
+
+    def _enable(self, name: str) -> Optional[cProfile.Profile]:
+        if self._profiling is not None:
+            self.skipped[name] += 1
+            logger.debug(f"Profiling: {name} overlaps {self._profiling}, not profiled")
+            return None
+        profile = self._profiles.setdefault(name, cProfile.Profile())
+        try:
+            profile.enable()
+        except ValueError as e:  # Another profiling tool is active (3.12+)
+            self.skipped[name] += 1
+            logger.warning(f"Profiling: cannot profile {name}: {e}")
+            return None
+        self._profiling = name
+        return profile
+
+    def cycle_done(self):
+        """Called once per monitor cycle; finishes the session after N cycles."""
+        if not self.active:
+            return
+        self.cycles_left -= 1
+        if self.cycles_left <= 0:
+            self.finish()
+
+    def finish(self) -> List[str]:
+        if not self.active:
+            return []
+        mode = self.mode
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join(timeout=2)
+            self._sampler = None
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = (self._started_at or datetime.now()).strftime("%Y%m%d-%H%M%S")
+        outputs = []
+        if mode == "sample":
+            path = self.output_dir / f"profile-{stamp}-sample.folded"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in sorted(self._stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            outputs.append(str(path))
+        else:
+            for phase_name, profile in self._profiles.items():
+                path = self.output_dir / f"profile-{stamp}-{phase_name}.prof"
+                profile.dump_stats(str(path))
+                outputs.append(str(path))
+
+        self.mode = None
+        self.cycles_left = 0
+        self.last_outputs = outputs
+        skipped = f" (not profiled: {dict(self.skipped)})" if self.skipped else ""
+        logger.info(f"Profiling finished: {', '.join(outputs) or 'no samples'}{skipped}")
+        return outputs
+
+    def _sample_loop(self):
+        own_ident = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                context = _context_of(frame)
+                phase = context.get(_phase, IDLE_PHASE) if context is not None else self._thread_phases.get(ident, IDLE_PHASE)
+                self._stacks[self._collapse(phase, names.get(ident, str(ident)), frame)] += 1
+
+    @staticmethod
+    def _collapse(phase: str, thread_name: str, frame) -> str:
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        frames.reverse()
+        return ";".join([f"phase:{phase}", f"thread:{thread_name}"] + frames)
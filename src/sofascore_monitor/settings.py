@@ -0,0 +1,144 @@
+"""
+Runtime-tunable settings.
+
+`Settings` is an immutable, validated snapshot of the knobs that can change
+while the monitor runs (discovery filters, intervals, thresholds, proxy).
+It is parsed once from the environment at startup (a bad value fails there,
+not mid-loop), and the monitor reads `self.settings` on every use instead of
+module constants. A change builds a complete new snapshot and swaps the
+reference in one assignment, so a cycle never sees half an update.
+
+Changes come from the control API (POST /control/settings) or from editing
+`.env`: `SettingsWatcher` polls the file's mtime and pushes each valid new
+snapshot to its subscribers. An invalid edit is logged and ignored.
+"""
+import asyncio
+import logging
+import os
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Field names are the lower-cased environment variable names
+    top_predictors_limit: int = 10
+    min_roi: float = 0.0
+    min_avg_odds: float = 1.5
+    min_total_bets: int = 0
+    min_win_rate: float = 0.0
+    scan_interval_minutes: int = 5
+    time_lookahead_hours: int = 24
+    match_grace_period_minutes: int = 5
+    line_movement_threshold: float = 0.15
+    proxy_url: str = ""
+
+    def __post_init__(self):
+        for name in ("top_predictors_limit", "min_total_bets"):
+            if getattr(self, name) < 0:
+                raise ValueError(f"{name} must be >= 0")
+        if self.scan_interval_minutes <= 0:
+            raise ValueError("scan_interval_minutes must be > 0")
+        if self.time_lookahead_hours <= 0 or self.match_grace_period_minutes < 0:
+            raise ValueError("time_lookahead_hours must be > 0 and match_grace_period_minutes >= 0")
+        if not 0 < self.line_movement_threshold < 1:
+            raise ValueError("line_movement_threshold must be between 0 and 1")
+        if not 0 <= self.min_win_rate <= 100:
+            raise ValueError("min_win_rate must be a percentage")
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str]) -> "Settings":
+        """Parse and validate from environment-style strings; unset or empty keys keep their defaults."""
+        changes = {f.name: env[f.name.upper()] for f in fields(cls) if env.get(f.name.upper(), "") != ""}
+        return cls().updated(changes)
+
+    @classmethod
+    def load(cls) -> "Settings":
+        """The startup snapshot (config.py has already merged `.env` into the environment)."""
+        from . import config  # noqa: F401
+        return cls.from_env(os.environ)
+
+    def updated(self, changes: Dict[str, Any]) -> "Settings":
+        """A new snapshot with `changes` applied (values coerced to the field types). Raises ValueError."""
+        types = {f.name: f.type for f in fields(self)}  # int, float or str
+        unknown = sorted(set(changes) - set(types))
+        if unknown:
+            raise ValueError(f"unknown settings: {', '.join(unknown)}")
+        coerced = {}
+        for name, value in changes.items():
+            kind = types[name]
+            if isinstance(value, bool) or (kind is int and isinstance(value, float) and not value.is_integer()):
+                raise ValueError(f"{name} must be {kind.__name__}")
+            try:
+                coerced[name] = kind(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be {kind.__name__}") from None
+        return replace(self, **coerced)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        if data["proxy_url"]:
+            data["proxy_url"] = "***@" + data["proxy_url"].split("@")[-1]  # Never echo credentials
+        return data
+
+
+def read_env_file(path: str) -> Dict[str, str]:
+    from dotenv import dotenv_values
+    return {k: v for k, v in dotenv_values(path).items() if v is not None}
+
+
+class SettingsWatcher:
+    """Polls `path` for modifications and publishes a new `Settings` snapshot when it changes."""
+
+    def __init__(self, path: str, current: Settings, interval_seconds: float = 5.0):
+        self.path = path
+        self.current = current
+        self.interval = interval_seconds
+        self.subscribers: List[Callable[[Settings], None]] = []
+        self._stamp = self._mtime()
+        # config.py loaded these into os.environ at startup: once removed from the file they fall back to defaults
+        self._file_keys = set(read_env_file(path)) if self._stamp is not None else set()
+
+    def subscribe(self, callback: Callable[[Settings], None]):
+        self.subscribers.append(callback)
+
+    def _mtime(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check. Returns True when a new snapshot was pushed."""
+        stamp = self._mtime()
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        if stamp is None:
+            return False  # Deleted or mid-rename: keep the current snapshot
+        try:
+            environ = {k: v for k, v in os.environ.items() if k not in self._file_keys}
+            settings = Settings.from_env({**environ, **read_env_file(self.path)})
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring invalid settings in {self.path}: {e}")
+            return False
+        if settings == self.current:
+            return False
+        self.current = settings
+        for callback in self.subscribers:
+            try:
+                callback(settings)
+            except Exception as e:
+                logger.error(f"Settings subscriber failed: {e}")
+        return True
+
+    async def run_forever(self, stop_event: asyncio.Event):
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                # On the loop so subscribers run there too; stat() is cheap and the parse only follows an edit
+                self.check()
@@ -0,0 +1,366 @@
+"""
+Notification sinks: fan-out of alerts to every configured destination.
+
+Each sink owns a bounded queue and a worker task with its own retry policy,
+rate limiter and delivery timeout, so a slow or failing sink only backs up
+its own queue. `SinkRegistry.publish` never awaits: it offers the alert to
+every queue (dropping that sink's oldest alert when full) and returns.
+
+Sinks batch what arrives within `batch_window` seconds into one `deliver`
+call; Discord packs the batch into embeds (alerts.py), the others send a
+single text message or line-delimited JSON.
+
+`publish` returns one future per sink, resolved with True once that sink
+delivered the alert (False when it gave up or dropped it). The outbox relay
+(outbox.py) uses these as acknowledgements.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .alerts import Alert, AlertAggregator
+from .templates import dumps, encode
+from .metrics import NOTIFICATION_QUEUE_DEPTH, SINK_DELIVERIES_TOTAL, SINK_DROPPED_TOTAL, SINK_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[Alert, Optional[asyncio.Future]]  # Queued alert and its acknowledgement
+
+TELEGRAM_MAX_CHARS = 4096
+_LINK = re.compile(r"\[([^\]]+)\]\([^)]+\)")
+
+
+def plain_text(text: str) -> str:
+    """Strip Discord markdown (links, bold) for text-only sinks."""
+    return _LINK.sub(r"\1", text).replace("**", "")
+
+
+def text_digest(alerts: List[Alert]) -> str:
+    groups = {}
+    for alert in alerts:
+        groups.setdefault(alert.match, []).append(plain_text(alert.summary))
+    return "\n\n".join(f"{match}\n" + "\n".join(lines) for match, lines in groups.items())
+
+
+class SinkError(Exception):
+    """Retryable delivery failure; `retry_after` overrides the backoff when the remote asked for it."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket: `rate` deliveries per second with bursts of `burst`. rate=0 disables it."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return
+        wait = (1 - self.tokens) / self.rate
+        self.tokens = 0.0
+        self.updated = now + wait
+        await asyncio.sleep(wait)
+
+
+class Sink:
+    def __init__(self, name: str, *, batch_window: float = 0.0, queue_size: int = 1000, max_retries: int = 3,
+                 backoff_seconds: float = 1.0, rate_per_second: float = 0.0, burst: int = 1,
+                 timeout_seconds: float = 30.0):
+        self.name = name
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.limiter = RateLimiter(rate_per_second, burst)
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+
+    async def deliver(self, alerts: List[Alert]):
+        raise NotImplementedError
+
+    def offer(self, alert: Alert, ack: Optional[asyncio.Future] = None):
+        if self.queue.full():
+            _, dropped_ack = self.queue.get_nowait()
+            _resolve(dropped_ack, False)
+            SINK_DROPPED_TOTAL.inc(sink=self.name)
+        self.queue.put_nowait((alert, ack))
+        self._update_depth()
+
+    def _update_depth(self):
+        SINK_QUEUE_DEPTH.set(self.queue.qsize(), sink=self.name)
+        NOTIFICATION_QUEUE_DEPTH.set(SINK_QUEUE_DEPTH.total())
+
+    def _take_queued(self, batch: List[Entry]):
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+    async def _next_batch(self, stop_event: asyncio.Event) -> List[Entry]:
+        """Wait for the first alert (or stop), then collect for `batch_window`."""
+        batch: List[Entry] = []
+        if self.queue.empty():
+            getter = asyncio.ensure_future(self.queue.get())
+            stopper = asyncio.ensure_future(stop_event.wait())
+            await asyncio.wait({getter, stopper}, return_when=asyncio.FIRST_COMPLETED)
+            stopper.cancel()
+            if not getter.done():
+                getter.cancel()
+                return batch
+            batch.append(getter.result())
+        if self.batch_window > 0 and not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.batch_window)
+            except asyncio.TimeoutError:
+                pass
+        self._take_queued(batch)
+        self._update_depth()
+        return batch
+
+    async def _deliver_with_retry(self, batch: List[Alert]) -> bool:
+        for attempt in range(self.max_retries):
+            await self.limiter.acquire()
+            try:
+                await asyncio.wait_for(self.deliver(batch), timeout=self.timeout_seconds)
+                SINK_DELIVERIES_TOTAL.inc(sink=self.name, result="ok")
+                return True
+            except Exception as e:
+                retry_after = getattr(e, "retry_after", None)
+                delay = retry_after if retry_after is not None else self.backoff_seconds * 2 ** attempt
+                logger.warning(f"Sink {self.name} failed ({e or type(e).__name__}), attempt {attempt + 1}/{self.max_retries}")
+                if attempt + 1 < self.max_retries:
+                    await asyncio.sleep(min(delay, 60.0))
+        SINK_DELIVERIES_TOTAL.inc(sink=self.name, result="failed")
+        logger.error(f"Sink {self.name} dropped {len(batch)} alerts after {self.max_retries} attempts")
+        return False
+
+    async def run_forever(self, stop_event: asyncio.Event):
+        # After stop: deliver what is already queued, then exit
+        while not (stop_event.is_set() and self.queue.empty()):
+            batch: List[Entry] = []
+            try:
+                batch = await self._next_batch(stop_event)
+                if batch:
+                    ok = await self._deliver_with_retry([alert for alert, _ in batch])
+                    for _, ack in batch:
+                        _resolve(ack, ok)
+            except Exception as e:
+                logger.error(f"Sink {self.name} worker error: {e}")
+                for _, ack in batch:
+                    _resolve(ack, False)
+
+
+def _resolve(ack: Optional[asyncio.Future], ok: bool):
+    if ack is not None and not ack.done():
+        ack.set_result(ok)
+
+
+# --- Concrete sinks ---
+
+PostFn = Callable[[str, dict], Tuple[int, float]]
+
+
+def post_json(url: str, payload: dict, timeout: float = 10) -> Tuple[int, float]:
+    """POST JSON. Returns (status_code, retry_after seconds from a 429 body or header).
+
+    A `Payload` is encoded once and reused across retries.
+    """
+    import requests  # Deferred: only processes that actually post pay for it
+    response = requests.post(
+        url, data=encode(payload), headers={"Content-Type": "application/json"}, timeout=timeout
+    )
+    retry_after = 0.0
+    if response.status_code == 429:
+        try:
+            body = response.json()
+            retry_after = float(body.get("retry_after") or body.get("parameters", {}).get("retry_after", 1.0))
+        except Exception:
+            retry_after = float(response.headers.get("Retry-After", 1.0))
+    return response.status_code, retry_after
+
+
+class DiscordSink(Sink):
+    """Embeds merged per match and packed 10 per post; the aggregator handles 429s per message."""
+
+    def __init__(self, url: str, digest_threshold: int, post: PostFn = post_json, **kwargs):
+        kwargs.setdefault("rate_per_second", 0.5)
+        kwargs.setdefault("burst", 5)
+        kwargs.setdefault("max_retries", 1)  # Retried per message inside the aggregator
+        super().__init__("discord", **kwargs)
+        self.aggregator = AlertAggregator(lambda payload: post(url, payload), digest_threshold, limiter=self.limiter)
+
+    async def deliver(self, alerts: List[Alert]):
+        for alert in alerts:
+            self.aggregator.add(alert)
+        await self.aggregator.flush()
+        if not self.aggregator.last_flush_ok:
+            raise SinkError("some webhook posts were not accepted")
+
+    async def _deliver_with_retry(self, batch: List[Alert]) -> bool:
+        # Posts acquire the limiter one message at a time
+        try:
+            await asyncio.wait_for(self.deliver(batch), timeout=self.timeout_seconds)
+            SINK_DELIVERIES_TOTAL.inc(sink=self.name, result="ok")
+            return True
+        except Exception as e:
+            SINK_DELIVERIES_TOTAL.inc(sink=self.name, result="failed")
+            logger.error(f"Sink {self.name} failed: {e or type(e).__name__}")
+            return False
+
+
+class TelegramSink(Sink):
+    def __init__(self, token: str, chat_id: str, post: PostFn = post_json, **kwargs):
+        kwargs.setdefault("rate_per_second", 1.0)
+        super().__init__("telegram", **kwargs)
+        self.url = f"https://api.telegram.org/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.post = post
+
+    async def deliver(self, alerts: List[Alert]):
+        text = text_digest(alerts)
+        for i in range(0, len(text), TELEGRAM_MAX_CHARS):
+            payload = {"chat_id": self.chat_id, "text": text[i:i + TELEGRAM_MAX_CHARS],
+                       "disable_web_page_preview": True}
+            status, retry_after = await asyncio.to_thread(self.post, self.url, payload)
+            if status == 429:
+                raise SinkError("rate limited", retry_after)
+            if not 200 <= status < 300:
+                raise SinkError(f"HTTP {status}")
+
+
+class WebhookSink(Sink):
+    """Generic JSON webhook: {"alerts": [{kind, event_id, match, summary, embed}, ...]}."""
+
+    def __init__(self, url: str, post: PostFn = post_json, **kwargs):
+        super().__init__(kwargs.pop("name", "webhook"), **kwargs)
+        self.url = url
+        self.post = post
+
+    async def deliver(self, alerts: List[Alert]):
+        payload = {"alerts": [
+            {"kind": a.kind, "event_id": a.event_id, "match": a.match, "summary": plain_text(a.summary),
+             "embed": a.embed}
+            for a in alerts
+        ]}
+        status, retry_after = await asyncio.to_thread(self.post, self.url, payload)
+        if status == 429:
+            raise SinkError("rate limited", retry_after)
+        if not 200 <= status < 300:
+            raise SinkError(f"HTTP {status}")
+
+
+class FileSink(Sink):
+    """Appends one JSON object per alert (JSON Lines)."""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__("file", **kwargs)
+        self.path = Path(path)
+
+    def _append(self, lines: List[str]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+
+    async def deliver(self, alerts: List[Alert]):
+        now = int(time.time())
+        lines = [
+            dumps({"ts": now, "kind": a.kind, "event_id": a.event_id, "match": a.match,
+                   "summary": plain_text(a.summary)}).decode() + "\n"
+            for a in alerts
+        ]
+        await asyncio.to_thread(self._append, lines)
+
+
+class ConsoleSink(Sink):
+    def __init__(self, **kwargs):
+        super().__init__("console", **kwargs)
+
+    async def deliver(self, alerts: List[Alert]):
+        for alert in alerts:
+            print(f"[ALERT] {alert.match}: {plain_text(alert.summary)}")
+
+
+class DesktopSink(Sink):
+    """One desktop notification per batch via notify-send (Linux) or osascript (macOS)."""
+
+    def __init__(self, command: List[str], **kwargs):
+        kwargs.setdefault("rate_per_second", 0.2)
+        super().__init__("desktop", **kwargs)
+        self.command = command
+
+    @classmethod
+    def available(cls) -> Optional[List[str]]:
+        """The notifier command, or None when this host cannot show notifications (e.g. no display)."""
+        if shutil.which("notify-send") and (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+            return ["notify-send", "--app-name=Sofascore Monitor"]
+        if shutil.which("osascript"):
+            return ["osascript"]
+        return None
+
+    def _notify(self, title: str, body: str):
+        if self.command[0] == "osascript":
+            script = f"display notification {json.dumps(body)} with title {json.dumps(title)}"
+            subprocess.run(self.command + ["-e", script], check=True, timeout=5, capture_output=True)
+        else:
+            subprocess.run(self.command + [title, body], check=True, timeout=5, capture_output=True)
+
+    async def deliver(self, alerts: List[Alert]):
+        title = f"{len(alerts)} new alert{'s' if len(alerts) != 1 else ''}"
+        body = "\n".join(f"{a.match}: {plain_text(a.summary)}" for a in alerts[:3])
+        if len(alerts) > 3:
+            body += f"\n... and {len(alerts) - 3} more"
+        await asyncio.to_thread(self._notify, title, body)
+
+
+class SinkRegistry:
+    def __init__(self):
+        self.sinks: List[Sink] = []
+        self.running = False
+
+    def __len__(self) -> int:
+        return len(self.sinks)
+
+    def register(self, sink: Sink) -> Sink:
+        self.sinks.append(sink)
+        return sink
+
+    def clear(self):
+        for sink in self.sinks:
+            SINK_QUEUE_DEPTH.set(0, sink=sink.name)  # Their queues go away with them
+        NOTIFICATION_QUEUE_DEPTH.set(SINK_QUEUE_DEPTH.total())
+        self.sinks = []
+
+    def publish(self, alert: Alert, only: Optional[Iterable[str]] = None) -> Dict[str, asyncio.Future]:
+        """Queue `alert` on every sink (or just the sinks named in `only`). Returns sink name -> ack."""
+        names = None if only is None else set(only)
+        loop = asyncio.get_running_loop()
+        acks = {}
+        for sink in self.sinks:
+            if names is None or sink.name in names:
+                acks[sink.name] = loop.create_future()
+                sink.offer(alert, acks[sink.name])
+        return acks
+
+    async def run_forever(self, stop_event: asyncio.Event):
+        """Run every sink's worker until stop, then let each drain its queue."""
+        self.running = True
+        try:
+            await asyncio.gather(*(sink.run_forever(stop_event) for sink in self.sinks))
+        finally:
+            self.running = False
@@ -0,0 +1,50 @@
+"""
+Crash-safe persistence of monitor runtime state between restarts.
+
+Snapshots are compact JSON documents (gzip-compressed when the path ends in
+.gz) written atomically (temp file + os.replace), so a kill mid-write leaves
+the previous snapshot intact.
+"""
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+
+
+def _open(path, mode: str):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    return open(path, mode, encoding="utf-8")
+
+
+def save_snapshot(path: str, state: dict):
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp" + (".gz" if target.suffix == ".gz" else ""))
+    with _open(tmp, "w") as f:
+        json.dump({"version": SNAPSHOT_VERSION, **state}, f, separators=(",", ":"))
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, target)
+
+
+def load_snapshot(path: str) -> Optional[dict]:
+    """Return the saved state, or None if missing, unreadable or from another version."""
+    try:
+        with _open(path, "r") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+    if state.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"Ignoring snapshot {path} with version {state.get('version')}")
+        return None
+    return state
@@ -0,0 +1,52 @@
+"""
+Storage backends.
+
+    create_storage("data/sofascore_monitor.db")       # SQLite file (default)
+    create_storage("sqlite:///data/sofascore_monitor.db")
+    create_storage("memory://")                       # tests / benchmarks
+    create_storage("postgresql://user:pw@host/db")    # multi-node, needs asyncpg
+
+All backends implement `StorageBackend`; call `await storage.open()` before
+use (a no-op for SQLite and memory).
+"""
+from .base import StorageBackend, roi_summary
+from .memory import MemoryStorage
+from .sqlite import (
+    EXPIRED_ODDS_DELETE_SQL,
+    EXPIRED_SEEN_DELETE_SQL,
+    PENDING_BETS_SQL,
+    SEEN_LOOKUP_SQL,
+    SETTLED_FOR_ARCHIVE_SQL,
+    SqliteStorage,
+    Storage,
+)
+
+
+def create_storage(url: str) -> StorageBackend:
+    if url.startswith("memory:"):
+        return MemoryStorage()
+    if url.startswith(("postgres://", "postgresql://")):
+        from .postgres import PostgresStorage
+        return PostgresStorage(url)
+    if url.startswith("sqlite:///"):
+        url = url[len("sqlite:///"):]
+    return SqliteStorage(url)
+
+
+def __getattr__(name: str):
+    # The Postgres backend is only loaded by deployments that use it
+    if name == "PostgresStorage":
+        from .postgres import PostgresStorage
+        return PostgresStorage
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "StorageBackend",
+    "SqliteStorage",
+    "Storage",
+    "MemoryStorage",
+    "PostgresStorage",
+    "create_storage",
+    "roi_summary",
+]
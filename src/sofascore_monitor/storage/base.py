@@ -0,0 +1,81 @@
+"""
+Backend-neutral storage interface.
+
+The monitor, compactor and benchmark only talk to this protocol, so the
+backend can be swapped with `STORAGE_URL` without touching call sites.
+Timestamps are integer epoch seconds everywhere; bet dicts returned by
+`get_pending_bets`/`load_archived_bets` use the `alerted_bets` column names.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Protocol, Tuple, runtime_checkable
+
+from ..odds_history import Block, Observation
+
+OddsRow = Tuple[str, float, Optional[float]]  # (bet_id, odds, previous_odds)
+AlertedRow = Tuple[str, str, int, str, str, float]  # (bet_id, user_id, event_id, market, selection, odds)
+OutboxRow = Tuple[str, str]  # (idem_key, payload JSON)
+AlertFlagRow = Tuple[str, int]  # (bet_id, alert_sent)
+OutboxAck = Tuple[int, str, bool, int]  # (outbox id, delivered_sinks csv, done, retry_at epoch)
+UserStatusRow = Tuple[str, int, Optional[datetime]]  # (user_id, failures, paused_until)
+
+
+@runtime_checkable
+class StorageBackend(Protocol):
+    async def open(self): ...
+    async def close(self): ...
+
+    # Seen bets
+    async def is_seen(self, bet_id: str) -> bool: ...
+    async def add_seen(self, bet_id: str, user_id: str): ...
+
+    # Per-user circuit breaker state: loaded once at start-up, written back only when a circuit changes state
+    async def load_user_statuses(self) -> Dict[str, Tuple[int, Optional[datetime]]]: ...
+    async def save_user_statuses(self, rows: List[UserStatusRow]): ...
+
+    # Line movement
+    async def get_odds_snapshot(self, bet_id: str) -> Optional[dict]: ...
+    async def get_odds_snapshots(self, bet_ids: List[str]) -> Dict[str, dict]: ...
+    async def upsert_odds_snapshots(self, rows: List[OddsRow]): ...
+    async def set_alert_flags(self, bet_ids: List[str], flag: int): ...
+
+    # Odds history (append-only; unchanged prices are skipped)
+    async def append_odds_history(self, observations: List[Observation]): ...
+    async def get_odds_history(self, bet_ids: List[str]) -> Dict[str, List[Block]]: ...
+
+    # ROI tracking
+    async def store_alerted_bet(self, bet_id: str, user_id: str, event_id: int, market: str,
+                                selection: str, odds: float): ...
+    async def get_pending_bets(self) -> List[dict]: ...
+    async def update_bet_outcome(self, bet_id: str, status: str, profit: float): ...
+    async def get_roi_stats(self) -> dict: ...
+
+    # Alert outbox: new bets are marked seen, recorded and queued for delivery in one transaction
+    async def record_new_bets(self, seen: List[Tuple[str, str]], alerts: List[OutboxRow],
+                              alerted: List[AlertedRow]) -> bool: ...
+    # Line movements: snapshots, outbox entries and alert flags in one transaction
+    async def record_line_movements(self, snapshots: List[OddsRow], alerts: List[OutboxRow],
+                                    flags: List[AlertFlagRow]) -> bool: ...
+    async def enqueue_alerts(self, alerts: List[OutboxRow]): ...
+    async def claim_outbox(self, limit: int, lease_seconds: int) -> List[dict]: ...
+    async def ack_outbox(self, acks: List[OutboxAck]): ...
+
+    # Retention / compaction
+    async def delete_expired_seen_batch(self, cutoff_ts: int, limit: int) -> int: ...
+    async def delete_expired_odds_batch(self, cutoff_ts: int, limit: int) -> int: ...
+    async def delete_expired_history_batch(self, cutoff_ts: int, limit: int) -> int: ...
+    async def delete_delivered_outbox_batch(self, cutoff_ts: int, limit: int) -> int: ...
+    async def archive_settled_batch(self, cutoff_ts: int, limit: int) -> int: ...
+    async def load_archived_bets(self) -> List[dict]: ...
+    async def incremental_vacuum(self, pages: int) -> int: ...
+    async def checkpoint(self): ...
+
+
+def roi_summary(total: int, wins: int, profit: float, stake: float) -> dict:
+    """Shared shape of get_roi_stats() across backends."""
+    return {
+        "total_bets": total,
+        "wins": wins,
+        "profit": profit,
+        "roi": (profit / stake * 100) if stake > 0 else 0.0,
+        "win_rate": (wins / total * 100) if total > 0 else 0.0,
+    }
@@ -0,0 +1,219 @@
+"""
+Pure in-memory backend for tests and benchmarks.
+
+Same semantics as the SQLite backend (INSERT OR IGNORE, upserts that keep
+`alert_sent`, oldest-first pruning) with plain dicts and no I/O. State lives
+for the lifetime of the instance only.
+"""
+import copy
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ..odds_history import Block, Observation, append_deltas, to_ticks
+from .base import AlertFlagRow, AlertedRow, OddsRow, OutboxAck, OutboxRow, UserStatusRow, roi_summary
+
+SETTLED = ("WON", "LOST", "VOID")
+
+
+class MemoryStorage:
+    def __init__(self):
+        self.seen: Dict[str, int] = {}                                   # bet_id -> created_at
+        self.user_status: Dict[str, Tuple[int, Optional[datetime]]] = {}
+        self.latest_odds: Dict[str, dict] = {}
+        self.alerted_bets: Dict[str, dict] = {}
+        self.archive: List[dict] = []
+        self.odds_history: Dict[str, List[dict]] = {}                    # bet_id -> blocks, oldest first
+        self.outbox: Dict[str, dict] = {}                                # idem_key -> entry
+        self._outbox_seq = 0
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def is_seen(self, bet_id: str) -> bool:
+        return bet_id in self.seen
+
+    async def add_seen(self, bet_id: str, user_id: str):
+        self.seen.setdefault(bet_id, int(time.time()))
+
+    async def load_user_statuses(self) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        return {uid: status for uid, status in self.user_status.items() if status != (0, None)}
+
+    async def save_user_statuses(self, rows: List[UserStatusRow]):
+        for user_id, failures, paused_until in rows:
+            self.user_status[user_id] = (failures, paused_until)
+
+    async def get_odds_snapshot(self, bet_id: str) -> Optional[dict]:
+        row = self.latest_odds.get(bet_id)
+        return dict(row) if row else None
+
+    async def get_odds_snapshots(self, bet_ids: List[str]) -> Dict[str, dict]:
+        return {bet_id: dict(self.latest_odds[bet_id]) for bet_id in bet_ids if bet_id in self.latest_odds}
+
+    async def upsert_odds_snapshots(self, rows: List[OddsRow]):
+        updated_at = int(time.time())
+        for bet_id, odds, previous_odds in rows:
+            row = self.latest_odds.setdefault(bet_id, {"bet_id": bet_id, "alert_sent": 0})
+            row.update(odds=odds, previous_odds=previous_odds, updated_at=updated_at)
+
+    async def set_alert_flags(self, bet_ids: List[str], flag: int):
+        for bet_id in bet_ids:
+            if bet_id in self.latest_odds:
+                self.latest_odds[bet_id]["alert_sent"] = flag
+
+    async def append_odds_history(self, observations: List[Observation]):
+        for bet_id, ts, odds in observations:
+            ticks = to_ticks(odds)
+            blocks = self.odds_history.setdefault(bet_id, [])
+            head = blocks[-1] if blocks else None
+            if head and head["last_odds"] == ticks:
+                continue
+            deltas = append_deltas(head["n"], head["last_ts"], head["last_odds"], ts, ticks) if head else None
+            if deltas:
+                head.update(n=head["n"] + 1, last_ts=ts, last_odds=ticks,
+                            ts_deltas=head["ts_deltas"] + deltas[0], odds_deltas=head["odds_deltas"] + deltas[1])
+            elif not head or head["block_start"] != ts:
+                blocks.append({"block_start": ts, "base_odds": ticks, "n": 1, "last_ts": ts,
+                               "last_odds": ticks, "ts_deltas": b"", "odds_deltas": b""})
+
+    async def get_odds_history(self, bet_ids: List[str]) -> Dict[str, List[Block]]:
+        return {
+            bet_id: [(b["block_start"], b["base_odds"], b["ts_deltas"], b["odds_deltas"]) for b in self.odds_history[bet_id]]
+            for bet_id in bet_ids if self.odds_history.get(bet_id)
+        }
+
+    async def store_alerted_bet(self, bet_id: str, user_id: str, event_id: int, market: str,
+                                selection: str, odds: float):
+        self.alerted_bets.setdefault(bet_id, {
+            "id": bet_id, "user_id": user_id, "event_id": event_id, "market": market,
+            "selection": selection, "odds": odds, "stake": 1.0, "status": "PENDING",
+            "profit": 0.0, "alerted_at": int(time.time()),
+        })
+
+    async def record_new_bets(self, seen: List[Tuple[str, str]], alerts: List[OutboxRow],
+                              alerted: List[AlertedRow]) -> bool:
+        for bet_id, user_id in seen:
+            await self.add_seen(bet_id, user_id)
+        for bet_id, user_id, event_id, market, selection, odds in alerted:
+            await self.store_alerted_bet(bet_id, user_id, event_id, market, selection, odds)
+        await self.enqueue_alerts(alerts)
+        return True
+
+    async def record_line_movements(self, snapshots: List[OddsRow], alerts: List[OutboxRow],
+                                    flags: List[AlertFlagRow]) -> bool:
+        await self.upsert_odds_snapshots(snapshots)
+        await self.enqueue_alerts(alerts)
+        for bet_id, flag in flags:
+            await self.set_alert_flags([bet_id], flag)
+        return True
+
+    async def enqueue_alerts(self, alerts: List[OutboxRow]):
+        now = int(time.time())
+        for idem_key, payload in alerts:
+            if idem_key in self.outbox:
+                continue
+            self._outbox_seq += 1
+            self.outbox[idem_key] = {
+                "id": self._outbox_seq, "idem_key": idem_key, "payload": payload, "delivered_sinks": "",
+                "attempts": 0, "created_at": now, "available_at": now, "delivered_at": None,
+            }
+
+    async def claim_outbox(self, limit: int, lease_seconds: int) -> List[dict]:
+        now = int(time.time())
+        due = sorted(
+            (e for e in self.outbox.values() if e["delivered_at"] is None and e["available_at"] <= now),
+            key=lambda e: e["available_at"],
+        )[:limit]
+        for entry in due:
+            entry.update(available_at=now + lease_seconds, attempts=entry["attempts"] + 1)
+        return [{k: e[k] for k in ("id", "idem_key", "payload", "delivered_sinks", "attempts")} for e in due]
+
+    async def ack_outbox(self, acks: List[OutboxAck]):
+        now = int(time.time())
+        by_id = {e["id"]: e for e in self.outbox.values()}
+        for outbox_id, sinks, done, retry_at in acks:
+            if outbox_id in by_id:
+                by_id[outbox_id].update(delivered_sinks=sinks, delivered_at=now if done else None, available_at=retry_at)
+
+    async def get_pending_bets(self) -> List[dict]:
+        return [dict(b) for b in self.alerted_bets.values() if b["status"] == "PENDING"]
+
+    async def update_bet_outcome(self, bet_id: str, status: str, profit: float):
+        if bet_id in self.alerted_bets:
+            self.alerted_bets[bet_id].update(status=status, profit=profit)
+
+    async def get_roi_stats(self) -> dict:
+        settled = [b for b in self.alerted_bets.values() if b["status"] in SETTLED]
+        return roi_summary(
+            len(settled) + sum(a["bet_count"] for a in self.archive),
+            sum(1 for b in settled if b["status"] == "WON") + sum(a["wins"] for a in self.archive),
+            sum(b["profit"] or 0.0 for b in settled) + sum(a["profit"] for a in self.archive),
+            sum(b["stake"] or 0.0 for b in settled) + sum(a["stake"] for a in self.archive),
+        )
+
+    async def delete_expired_seen_batch(self, cutoff_ts: int, limit: int) -> int:
+        expired = sorted((ts, bet_id) for bet_id, ts in self.seen.items() if ts < cutoff_ts)[:limit]
+        for _, bet_id in expired:
+            del self.seen[bet_id]
+        return len(expired)
+
+    async def delete_expired_odds_batch(self, cutoff_ts: int, limit: int) -> int:
+        expired = sorted((r["updated_at"], k) for k, r in self.latest_odds.items() if r["updated_at"] < cutoff_ts)[:limit]
+        for _, bet_id in expired:
+            del self.latest_odds[bet_id]
+        return len(expired)
+
+    async def delete_expired_history_batch(self, cutoff_ts: int, limit: int) -> int:
+        expired = sorted(
+            (b["last_ts"], bet_id, b["block_start"])
+            for bet_id, blocks in self.odds_history.items() for b in blocks if b["last_ts"] < cutoff_ts
+        )[:limit]
+        for _, bet_id, block_start in expired:
+            blocks = [b for b in self.odds_history[bet_id] if b["block_start"] != block_start]
+            if blocks:
+                self.odds_history[bet_id] = blocks
+            else:
+                del self.odds_history[bet_id]
+        return len(expired)
+
+    async def delete_delivered_outbox_batch(self, cutoff_ts: int, limit: int) -> int:
+        expired = sorted(
+            (e["delivered_at"], key) for key, e in self.outbox.items()
+            if e["delivered_at"] is not None and e["delivered_at"] < cutoff_ts
+        )[:limit]
+        for _, key in expired:
+            del self.outbox[key]
+        return len(expired)
+
+    async def archive_settled_batch(self, cutoff_ts: int, limit: int) -> int:
+        rows = sorted(
+            (b for b in self.alerted_bets.values() if b["status"] != "PENDING" and b["alerted_at"] < cutoff_ts),
+            key=lambda b: b["alerted_at"],
+        )[:limit]
+        if not rows:
+            return 0
+        self.archive.append({
+            "archived_at": int(time.time()),
+            "first_alerted_at": rows[0]["alerted_at"],
+            "last_alerted_at": rows[-1]["alerted_at"],
+            "bet_count": len(rows),
+            "wins": sum(1 for r in rows if r["status"] == "WON"),
+            "profit": sum(r["profit"] or 0.0 for r in rows),
+            "stake": sum(r["stake"] or 0.0 for r in rows),
+            "bets": rows,
+        })
+        for r in rows:
+            del self.alerted_bets[r["id"]]
+        return len(rows)
+
+    async def load_archived_bets(self) -> List[dict]:
+        return [copy.copy(b) for batch in self.archive for b in batch["bets"]]
+
+    async def incremental_vacuum(self, pages: int) -> int:
+        return 0
+
+    async def checkpoint(self):
+        pass
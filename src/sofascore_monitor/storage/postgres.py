@@ -0,0 +1,488 @@
+"""
+PostgreSQL backend for multi-node deployments.
+
+Several monitor processes can share one database. Seen-marks and odds use
+`ON CONFLICT` upserts, the archiver claims rows with `FOR UPDATE SKIP
+LOCKED`, and schema creation is serialised with an advisory lock. Bulk odds
+upserts go through a single `UNNEST` statement instead of one round-trip per
+row.
+
+asyncpg is optional and only imported by `open()`:
+
+    pip install asyncpg
+    STORAGE_URL=postgresql://monitor:secret@db/sofascore
+"""
+import json
+import logging
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ..keys import seen_key
+from ..metrics import DB_OP_SECONDS
+from ..odds_history import Block, Observation, append_deltas, to_ticks
+from ..tracing import tracer
+from .base import AlertFlagRow, AlertedRow, OddsRow, OutboxAck, OutboxRow, UserStatusRow, roi_summary
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_LOCK_ID = 0x50FA5C0E  # pg_advisory_xact_lock key for concurrent start-ups
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS seen_bets (
+        key BIGINT PRIMARY KEY,
+        created_at BIGINT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_seen_bets_created ON seen_bets(created_at)",
+    """
+    CREATE TABLE IF NOT EXISTS user_status (
+        user_id TEXT PRIMARY KEY,
+        failures INTEGER NOT NULL DEFAULT 0,
+        paused_until TIMESTAMP,
+        last_updated TIMESTAMP NOT NULL DEFAULT now()
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS latest_odds (
+        bet_id TEXT PRIMARY KEY,
+        odds DOUBLE PRECISION NOT NULL,
+        previous_odds DOUBLE PRECISION,
+        updated_at BIGINT NOT NULL,
+        alert_sent SMALLINT NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_odds_updated ON latest_odds(updated_at)",
+    """
+    CREATE TABLE IF NOT EXISTS odds_history (
+        bet_id TEXT NOT NULL,
+        block_start BIGINT NOT NULL,
+        base_odds INTEGER NOT NULL,
+        n INTEGER NOT NULL,
+        last_ts BIGINT NOT NULL,
+        last_odds INTEGER NOT NULL,
+        ts_deltas BYTEA NOT NULL,
+        odds_deltas BYTEA NOT NULL,
+        PRIMARY KEY (bet_id, block_start)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_odds_history_last ON odds_history(last_ts)",
+    """
+    CREATE TABLE IF NOT EXISTS alerted_bets (
+        id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        event_id BIGINT,
+        market TEXT,
+        selection TEXT,
+        odds DOUBLE PRECISION,
+        stake DOUBLE PRECISION DEFAULT 1.0,
+        status TEXT DEFAULT 'PENDING',
+        profit DOUBLE PRECISION DEFAULT 0.0,
+        alerted_at BIGINT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_alerted_bets_pending ON alerted_bets(user_id) WHERE status = 'PENDING'",
+    "CREATE INDEX IF NOT EXISTS idx_alerted_bets_settled ON alerted_bets(alerted_at) WHERE status <> 'PENDING'",
+    """
+    CREATE TABLE IF NOT EXISTS alert_outbox (
+        id BIGSERIAL PRIMARY KEY,
+        idem_key TEXT NOT NULL UNIQUE,
+        payload TEXT NOT NULL,
+        delivered_sinks TEXT NOT NULL DEFAULT '',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        created_at BIGINT NOT NULL,
+        available_at BIGINT NOT NULL,
+        delivered_at BIGINT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_outbox_due ON alert_outbox(available_at) WHERE delivered_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS idx_outbox_delivered ON alert_outbox(delivered_at) WHERE delivered_at IS NOT NULL",
+    """
+    CREATE TABLE IF NOT EXISTS alerted_bets_archive (
+        id BIGSERIAL PRIMARY KEY,
+        archived_at BIGINT NOT NULL,
+        first_alerted_at BIGINT,
+        last_alerted_at BIGINT,
+        bet_count INTEGER NOT NULL,
+        wins INTEGER NOT NULL,
+        profit DOUBLE PRECISION NOT NULL,
+        stake DOUBLE PRECISION NOT NULL,
+        payload BYTEA NOT NULL
+    )
+    """,
+]
+
+# Latest block per bet, row-locked (FOR UPDATE is not allowed with DISTINCT ON)
+HISTORY_HEADS_SQL = """
+    SELECT bet_id, block_start, n, last_ts, last_odds FROM odds_history h
+    WHERE bet_id = ANY($1::text[])
+      AND block_start = (SELECT max(block_start) FROM odds_history WHERE bet_id = h.bet_id)
+    FOR UPDATE
+"""
+ODDS_UPSERT_SQL = """
+    INSERT INTO latest_odds (bet_id, odds, previous_odds, updated_at, alert_sent)
+    SELECT b, o, p, $4, 0 FROM UNNEST($1::text[], $2::float8[], $3::float8[]) AS t(b, o, p)
+    ON CONFLICT (bet_id) DO UPDATE SET
+        odds = EXCLUDED.odds,
+        previous_odds = EXCLUDED.previous_odds,
+        updated_at = EXCLUDED.updated_at
+"""
+OUTBOX_INSERT_SQL = """
+    INSERT INTO alert_outbox (idem_key, payload, created_at, available_at) VALUES ($1, $2, $3, $3)
+    ON CONFLICT (idem_key) DO NOTHING
+"""
+
+_RAISE = object()
+
+
+def _rowcount(status: str) -> int:
+    """asyncpg returns the command tag, e.g. 'DELETE 42'."""
+    try:
+        return int(status.rsplit(" ", 1)[-1])
+    except (ValueError, AttributeError):
+        return 0
+
+
+def _upsert_odds(conn, rows: List[OddsRow]):
+    # ON CONFLICT cannot touch the same row twice in one statement: last write wins
+    latest = {bet_id: (odds, previous) for bet_id, odds, previous in rows}
+    return conn.execute(ODDS_UPSERT_SQL, list(latest), [v[0] for v in latest.values()],
+                        [v[1] for v in latest.values()], int(time.time()))
+
+
+class PostgresStorage:
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10, command_timeout: float = 30.0):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.command_timeout = command_timeout
+        self._pool = None
+
+    async def open(self):
+        if self._pool is not None:
+            return
+        try:
+            import asyncpg
+        except ImportError as e:
+            raise ImportError("PostgreSQL storage needs asyncpg: pip install asyncpg") from e
+
+        self._pool = await asyncpg.create_pool(
+            self.dsn, min_size=self.min_size, max_size=self.max_size, command_timeout=self.command_timeout
+        )
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", SCHEMA_LOCK_ID)
+                for ddl in SCHEMA:
+                    await conn.execute(ddl)
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _run(self, op: str, fn, default=_RAISE):
+        """Run `fn(conn)` on a pooled connection, recording latency like the SQLite backend."""
+        start = time.perf_counter()
+        try:
+            with tracer.child_span(f"db.{op}"):
+                async with self._pool.acquire() as conn:
+                    return await fn(conn)
+        except Exception as e:
+            if default is _RAISE:
+                raise
+            logger.error(f"Error in {op}: {e}")
+            return default
+        finally:
+            DB_OP_SECONDS.observe(time.perf_counter() - start, op=op)
+
+    # --- Seen bets ---
+
+    async def is_seen(self, bet_id: str) -> bool:
+        return await self._run("is_seen", lambda conn: conn.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM seen_bets WHERE key = $1)", seen_key(bet_id)
+        ), default=False)
+
+    async def add_seen(self, bet_id: str, user_id: str):
+        await self._run("add_seen", lambda conn: conn.execute(
+            "INSERT INTO seen_bets (key, created_at) VALUES ($1, $2) ON CONFLICT DO NOTHING",
+            seen_key(bet_id), int(time.time())
+        ), default=None)
+
+    # --- User status ---
+
+    async def load_user_statuses(self) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        async def fn(conn):
+            rows = await conn.fetch(
+                "SELECT user_id, failures, paused_until FROM user_status WHERE failures > 0 OR paused_until IS NOT NULL"
+            )
+            return {r["user_id"]: (r["failures"], r["paused_until"]) for r in rows}
+        return await self._run("load_user_statuses", fn, default={})
+
+    async def save_user_statuses(self, rows: List[UserStatusRow]):
+        if rows:
+            await self._run("save_user_statuses", lambda conn: conn.executemany("""
+                INSERT INTO user_status (user_id, failures, paused_until, last_updated) VALUES ($1, $2, $3, now())
+                ON CONFLICT (user_id) DO UPDATE SET
+                    failures = EXCLUDED.failures, paused_until = EXCLUDED.paused_until, last_updated = now()
+            """, rows), default=None)
+
+    # --- Line Movement Tracking ---
+
+    async def get_odds_snapshot(self, bet_id: str) -> Optional[dict]:
+        async def fn(conn):
+            row = await conn.fetchrow("SELECT * FROM latest_odds WHERE bet_id = $1", bet_id)
+            return dict(row) if row else None
+        return await self._run("get_odds_snapshot", fn, default=None)
+
+    async def get_odds_snapshots(self, bet_ids: List[str]) -> Dict[str, dict]:
+        if not bet_ids:
+            return {}
+
+        async def fn(conn):
+            rows = await conn.fetch("SELECT * FROM latest_odds WHERE bet_id = ANY($1::text[])", list(bet_ids))
+            return {r["bet_id"]: dict(r) for r in rows}
+        return await self._run("get_odds_snapshots", fn, default={})
+
+    async def upsert_odds_snapshots(self, rows: List[OddsRow]):
+        if not rows:
+            return
+        await self._run("upsert_odds_snapshots", lambda conn: _upsert_odds(conn, rows), default=None)
+
+    async def append_odds_history(self, observations: List[Observation]):
+        if not observations:
+            return
+
+        async def fn(conn):
+            async with conn.transaction():
+                heads = {r["bet_id"]: r for r in await conn.fetch(HISTORY_HEADS_SQL, list({o[0] for o in observations}))}
+                for bet_id, ts, odds in observations:
+                    ticks = to_ticks(odds)
+                    head = heads.get(bet_id)
+                    if head and head["last_odds"] == ticks:
+                        continue
+                    deltas = append_deltas(head["n"], head["last_ts"], head["last_odds"], ts, ticks) if head else None
+                    if deltas:
+                        await conn.execute("""
+                            UPDATE odds_history SET
+                                n = n + 1, last_ts = $3, last_odds = $4,
+                                ts_deltas = ts_deltas || $5, odds_deltas = odds_deltas || $6
+                            WHERE bet_id = $1 AND block_start = $2
+                        """, bet_id, head["block_start"], ts, ticks, deltas[0], deltas[1])
+                        heads[bet_id] = {**head, "n": head["n"] + 1, "last_ts": ts, "last_odds": ticks}
+                    else:
+                        await conn.execute("""
+                            INSERT INTO odds_history
+                                (bet_id, block_start, base_odds, n, last_ts, last_odds, ts_deltas, odds_deltas)
+                            VALUES ($1, $2, $3, 1, $2, $3, ''::bytea, ''::bytea)
+                            ON CONFLICT DO NOTHING
+                        """, bet_id, ts, ticks)
+                        heads[bet_id] = {"block_start": ts, "n": 1, "last_ts": ts, "last_odds": ticks}
+        await self._run("append_odds_history", fn, default=None)
+
+    async def get_odds_history(self, bet_ids: List[str]) -> Dict[str, List[Block]]:
+        async def fn(conn):
+            history: Dict[str, List[Block]] = {}
+            for r in await conn.fetch("""
+                SELECT bet_id, block_start, base_odds, ts_deltas, odds_deltas FROM odds_history
+                WHERE bet_id = ANY($1::text[]) ORDER BY bet_id, block_start
+            """, list(bet_ids)):
+                history.setdefault(r["bet_id"], []).append(
+                    (r["block_start"], r["base_odds"], bytes(r["ts_deltas"]), bytes(r["odds_deltas"]))
+                )
+            return history
+        return await self._run("get_odds_history", fn, default={})
+
+    async def set_alert_flags(self, bet_ids: List[str], flag: int):
+        if not bet_ids:
+            return
+        await self._run("set_alert_flags", lambda conn: conn.execute(
+            "UPDATE latest_odds SET alert_sent = $2 WHERE bet_id = ANY($1::text[])", list(bet_ids), flag
+        ), default=None)
+
+    # --- ROI Tracking ---
+
+    async def store_alerted_bet(self, bet_id: str, user_id: str, event_id: int, market: str,
+                                selection: str, odds: float):
+        await self._run("store_alerted_bet", lambda conn: conn.execute("""
+            INSERT INTO alerted_bets (id, user_id, event_id, market, selection, odds, alerted_at)
+            VALUES ($1, $2, $3, $4, $5, $6, $7)
+            ON CONFLICT DO NOTHING
+        """, bet_id, user_id, event_id, market, selection, odds, int(time.time())), default=None)
+
+    # --- Alert Outbox ---
+
+    async def record_new_bets(self, seen: List[Tuple[str, str]], alerts: List[OutboxRow],
+                              alerted: List[AlertedRow]) -> bool:
+        if not (seen or alerts or alerted):
+            return True
+        now = int(time.time())
+
+        async def fn(conn):
+            async with conn.transaction():
+                await conn.executemany(
+                    "INSERT INTO seen_bets (key, created_at) VALUES ($1, $2) ON CONFLICT DO NOTHING",
+                    [(seen_key(bet_id), now) for bet_id, _ in seen]
+                )
+                await conn.executemany("""
+                    INSERT INTO alerted_bets (id, user_id, event_id, market, selection, odds, alerted_at)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7)
+                    ON CONFLICT DO NOTHING
+                """, [(*row, now) for row in alerted])
+                await conn.executemany(OUTBOX_INSERT_SQL, [(key, payload, now) for key, payload in alerts])
+            return True
+        return await self._run("record_new_bets", fn, default=False)
+
+    async def record_line_movements(self, snapshots: List[OddsRow], alerts: List[OutboxRow],
+                                    flags: List[AlertFlagRow]) -> bool:
+        if not (snapshots or alerts or flags):
+            return True
+        now = int(time.time())
+
+        async def fn(conn):
+            async with conn.transaction():
+                if snapshots:
+                    await _upsert_odds(conn, snapshots)
+                await conn.executemany(OUTBOX_INSERT_SQL, [(key, payload, now) for key, payload in alerts])
+                await conn.executemany("UPDATE latest_odds SET alert_sent = $2 WHERE bet_id = $1", flags)
+            return True
+        return await self._run("record_line_movements", fn, default=False)
+
+    async def enqueue_alerts(self, alerts: List[OutboxRow]):
+        if not alerts:
+            return
+        now = int(time.time())
+        await self._run("enqueue_alerts", lambda conn: conn.executemany(
+            OUTBOX_INSERT_SQL, [(key, payload, now) for key, payload in alerts]
+        ), default=None)
+
+    async def claim_outbox(self, limit: int, lease_seconds: int) -> List[dict]:
+        # SKIP LOCKED: concurrent relays on other nodes claim disjoint entries
+        async def fn(conn):
+            rows = await conn.fetch("""
+                UPDATE alert_outbox SET available_at = $1 + $3, attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM alert_outbox
+                    WHERE delivered_at IS NULL AND available_at <= $1
+                    ORDER BY available_at LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, idem_key, payload, delivered_sinks, attempts
+            """, int(time.time()), limit, lease_seconds)
+            return [dict(r) for r in rows]
+        return await self._run("claim_outbox", fn, default=[])
+
+    async def ack_outbox(self, acks: List[OutboxAck]):
+        if not acks:
+            return
+        now = int(time.time())
+        await self._run("ack_outbox", lambda conn: conn.executemany("""
+            UPDATE alert_outbox SET delivered_sinks = $2, delivered_at = $3, available_at = $4 WHERE id = $1
+        """, [(outbox_id, sinks, now if done else None, retry_at) for outbox_id, sinks, done, retry_at in acks]),
+            default=None)
+
+    async def get_pending_bets(self) -> List[dict]:
+        async def fn(conn):
+            return [dict(r) for r in await conn.fetch("SELECT * FROM alerted_bets WHERE status = 'PENDING'")]
+        return await self._run("get_pending_bets", fn, default=[])
+
+    async def update_bet_outcome(self, bet_id: str, status: str, profit: float):
+        await self._run("update_bet_outcome", lambda conn: conn.execute(
+            "UPDATE alerted_bets SET status = $2, profit = $3 WHERE id = $1", bet_id, status, profit
+        ), default=None)
+
+    async def get_roi_stats(self) -> dict:
+        async def fn(conn):
+            row = await conn.fetchrow("""
+                SELECT
+                    (SELECT COUNT(*) FROM alerted_bets WHERE status IN ('WON', 'LOST', 'VOID'))
+                        + COALESCE((SELECT SUM(bet_count) FROM alerted_bets_archive), 0) AS total,
+                    (SELECT COUNT(*) FROM alerted_bets WHERE status = 'WON')
+                        + COALESCE((SELECT SUM(wins) FROM alerted_bets_archive), 0) AS wins,
+                    COALESCE((SELECT SUM(profit) FROM alerted_bets WHERE status IN ('WON', 'LOST', 'VOID')), 0)
+                        + COALESCE((SELECT SUM(profit) FROM alerted_bets_archive), 0) AS profit,
+                    COALESCE((SELECT SUM(stake) FROM alerted_bets WHERE status IN ('WON', 'LOST', 'VOID')), 0)
+                        + COALESCE((SELECT SUM(stake) FROM alerted_bets_archive), 0) AS stake
+            """)
+            return roi_summary(int(row["total"]), int(row["wins"]), float(row["profit"]), float(row["stake"]))
+        return await self._run("get_roi_stats", fn, default={})
+
+    # --- Compaction ---
+
+    async def delete_expired_seen_batch(self, cutoff_ts: int, limit: int) -> int:
+        status = await self._run("delete_expired_seen_batch", lambda conn: conn.execute("""
+            DELETE FROM seen_bets WHERE key IN (
+                SELECT key FROM seen_bets WHERE created_at < $1 ORDER BY created_at LIMIT $2
+            )
+        """, cutoff_ts, limit))
+        return _rowcount(status)
+
+    async def delete_expired_odds_batch(self, cutoff_ts: int, limit: int) -> int:
+        status = await self._run("delete_expired_odds_batch", lambda conn: conn.execute("""
+            DELETE FROM latest_odds WHERE bet_id IN (
+                SELECT bet_id FROM latest_odds WHERE updated_at < $1 ORDER BY updated_at LIMIT $2
+            )
+        """, cutoff_ts, limit))
+        return _rowcount(status)
+
+    async def delete_expired_history_batch(self, cutoff_ts: int, limit: int) -> int:
+        status = await self._run("delete_expired_history_batch", lambda conn: conn.execute("""
+            DELETE FROM odds_history WHERE (bet_id, block_start) IN (
+                SELECT bet_id, block_start FROM odds_history WHERE last_ts < $1 ORDER BY last_ts LIMIT $2
+            )
+        """, cutoff_ts, limit))
+        return _rowcount(status)
+
+    async def delete_delivered_outbox_batch(self, cutoff_ts: int, limit: int) -> int:
+        status = await self._run("delete_delivered_outbox_batch", lambda conn: conn.execute("""
+            DELETE FROM alert_outbox WHERE id IN (
+                SELECT id FROM alert_outbox
+                WHERE delivered_at IS NOT NULL AND delivered_at < $1 ORDER BY delivered_at LIMIT $2
+            )
+        """, cutoff_ts, limit))
+        return _rowcount(status)
+
+    async def archive_settled_batch(self, cutoff_ts: int, limit: int) -> int:
+        async def fn(conn):
+            async with conn.transaction():
+                rows = [dict(r) for r in await conn.fetch("""
+                    WITH moved AS (
+                        DELETE FROM alerted_bets WHERE id IN (
+                            SELECT id FROM alerted_bets
+                            WHERE status <> 'PENDING' AND alerted_at < $1
+                            ORDER BY alerted_at LIMIT $2
+                            FOR UPDATE SKIP LOCKED
+                        )
+                        RETURNING *
+                    )
+                    SELECT * FROM moved ORDER BY alerted_at
+                """, cutoff_ts, limit)]
+                if not rows:
+                    return 0
+                payload = zlib.compress(json.dumps(rows, separators=(",", ":"), default=str).encode(), 9)
+                await conn.execute("""
+                    INSERT INTO alerted_bets_archive
+                        (archived_at, first_alerted_at, last_alerted_at, bet_count, wins, profit, stake, payload)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                """, int(time.time()), rows[0]["alerted_at"], rows[-1]["alerted_at"], len(rows),
+                    sum(1 for r in rows if r["status"] == "WON"),
+                    sum(r["profit"] or 0.0 for r in rows),
+                    sum(r["stake"] or 0.0 for r in rows),
+                    payload)
+                return len(rows)
+        return await self._run("archive_settled_batch", fn)
+
+    async def load_archived_bets(self) -> List[dict]:
+        async def fn(conn):
+            return await conn.fetch("SELECT payload FROM alerted_bets_archive ORDER BY id")
+        bets = []
+        for row in await self._run("load_archived_bets", fn):
+            bets.extend(json.loads(zlib.decompress(row["payload"])))
+        return bets
+
+    async def incremental_vacuum(self, pages: int) -> int:
+        return 0  # autovacuum handles free space on Postgres
+
+    async def checkpoint(self):
+        pass  # The server owns its WAL
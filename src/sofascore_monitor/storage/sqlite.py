@@ -0,0 +1,586 @@
+import sqlite3
+import logging
+import os
+import json
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple, List
+import asyncio
+
+from ..keys import seen_key
+from ..metrics import DB_OP_SECONDS
+from ..migrations import run_migrations
+from ..odds_history import Block, Observation, append_deltas, to_ticks
+from ..tracing import tracer
+from .base import AlertFlagRow, AlertedRow, OddsRow, OutboxAck, OutboxRow, UserStatusRow, roi_summary
+
+logger = logging.getLogger(__name__)
+
+# Hot query shapes, shared with tests/test_storage.py's EXPLAIN QUERY PLAN checks.
+# Indexes live in migrations/ (v3); change both together.
+SEEN_LOOKUP_SQL = "SELECT 1 FROM seen_bets WHERE key = ?"
+PENDING_BETS_SQL = "SELECT * FROM alerted_bets WHERE status = 'PENDING'"
+EXPIRED_SEEN_DELETE_SQL = """
+    DELETE FROM seen_bets WHERE key IN (
+        SELECT key FROM seen_bets WHERE created_at < ? ORDER BY created_at LIMIT ?
+    )
+"""
+EXPIRED_HISTORY_DELETE_SQL = """
+    DELETE FROM odds_history WHERE (bet_id, block_start) IN (
+        SELECT bet_id, block_start FROM odds_history WHERE last_ts < ? ORDER BY last_ts LIMIT ?
+    )
+"""
+EXPIRED_ODDS_DELETE_SQL = """
+    DELETE FROM latest_odds WHERE bet_id IN (
+        SELECT bet_id FROM latest_odds WHERE updated_at < ? ORDER BY updated_at LIMIT ?
+    )
+"""
+OUTBOX_DUE_SQL = """
+    SELECT id, idem_key, payload, delivered_sinks, attempts FROM alert_outbox
+    WHERE delivered_at IS NULL AND available_at <= ? ORDER BY available_at LIMIT ?
+"""
+DELIVERED_OUTBOX_DELETE_SQL = """
+    DELETE FROM alert_outbox WHERE id IN (
+        SELECT id FROM alert_outbox
+        WHERE delivered_at IS NOT NULL AND delivered_at < ? ORDER BY delivered_at LIMIT ?
+    )
+"""
+ODDS_UPSERT_SQL = """
+    INSERT INTO latest_odds (bet_id, odds, previous_odds, updated_at, alert_sent)
+    VALUES (?, ?, ?, ?, 0)
+    ON CONFLICT(bet_id) DO UPDATE SET
+        odds = excluded.odds,
+        previous_odds = excluded.previous_odds,
+        updated_at = excluded.updated_at
+"""
+OUTBOX_INSERT_SQL = "INSERT OR IGNORE INTO alert_outbox (idem_key, payload, created_at, available_at) VALUES (?, ?, ?, ?)"
+ALERTED_INSERT_SQL = """
+    INSERT OR IGNORE INTO alerted_bets (id, user_id, event_id, market, selection, odds, alerted_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+SETTLED_FOR_ARCHIVE_SQL = """
+    SELECT * FROM alerted_bets
+    WHERE status != 'PENDING' AND alerted_at < ?
+    ORDER BY alerted_at LIMIT ?
+"""
+
+class SqliteStorage:
+    """Single-file SQLite backend (the default). Each call runs in a worker thread."""
+
+    def __init__(self, db_path: str = "sofascore_monitor.db"):
+        self.db_path = db_path
+        self._init_db()
+
+    async def open(self):
+        pass  # Schema is migrated synchronously in __init__
+
+    async def close(self):
+        pass  # One short-lived connection per call
+
+    def _get_connection(self):
+        """Helper to get connection with timeout and WAL mode."""
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        return conn
+
+    async def _run(self, op: str, fn, *args):
+        """Run a blocking DB call in a worker thread, recording its latency."""
+        start = time.perf_counter()
+        try:
+            with tracer.child_span(f"db.{op}"):
+                return await asyncio.to_thread(fn, *args)
+        finally:
+            DB_OP_SECONDS.observe(time.perf_counter() - start, op=op)
+
+    def _init_db(self):
+        try:
+            # Incremental vacuum lets the compactor return free pages without a blocking VACUUM.
+            # Must be set before WAL/first table; only takes effect on a fresh DB
+            # (existing DBs need one manual VACUUM to switch).
+            if self.db_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30.0)
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+            conn.close()
+
+            with self._get_connection() as conn:
+                version = run_migrations(conn)
+                logger.debug(f"DB schema at v{version}")
+        except Exception as e:
+            logger.error(f"Failed to init DB: {e}")
+
+    async def is_seen(self, bet_id: str) -> bool:
+        return await self._run("is_seen", self._is_seen_sync, bet_id)
+
+    def _is_seen_sync(self, bet_id: str) -> bool:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute(SEEN_LOOKUP_SQL, (seen_key(bet_id),))
+                return cursor.fetchone() is not None
+        except Exception as e:
+            logger.error(f"Error checking seen bet: {e}")
+            return False
+
+    async def add_seen(self, bet_id: str, user_id: str):
+        await self._run("add_seen", self._add_seen_sync, bet_id, user_id)
+
+    def _add_seen_sync(self, bet_id: str, user_id: str):
+        # Only the hashed key is stored; user_id is kept in the signature for callers/logging
+        try:
+            with self._get_connection() as conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO seen_bets (key, created_at) VALUES (?, ?)",
+                    (seen_key(bet_id), int(time.time()))
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error adding seen bet: {e}")
+
+    async def load_user_statuses(self) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        return await self._run("load_user_statuses", self._load_user_statuses_sync)
+
+    def _load_user_statuses_sync(self) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        try:
+            with self._get_connection() as conn:
+                rows = conn.execute(
+                    "SELECT user_id, failures, paused_until FROM user_status WHERE failures > 0 OR paused_until IS NOT NULL"
+                ).fetchall()
+            return {uid: (failures, datetime.fromisoformat(paused) if paused else None) for uid, failures, paused in rows}
+        except Exception as e:
+            logger.error(f"Error loading user statuses: {e}")
+            return {}
+
+    async def save_user_statuses(self, rows: List[UserStatusRow]):
+        if rows:
+            await self._run("save_user_statuses", self._save_user_statuses_sync, rows)
+
+    def _save_user_statuses_sync(self, rows: List[UserStatusRow]):
+        try:
+            with self._get_connection() as conn:
+                conn.executemany("""
+                    INSERT INTO user_status (user_id, failures, paused_until, last_updated)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        failures = excluded.failures,
+                        paused_until = excluded.paused_until,
+                        last_updated = CURRENT_TIMESTAMP
+                """, rows)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error saving user statuses: {e}")
+
+    def cleanup_old_data(self, days: int, batch_size: int = 1000):
+        """Synchronous full prune (scripts/tests). The monitor uses the background Compactor instead."""
+        start = time.perf_counter()
+        try:
+            cutoff_ts = int((datetime.now() - timedelta(days=days)).timestamp())
+            
+            while self._delete_expired_seen_batch_sync(cutoff_ts, batch_size) == batch_size:
+                pass
+            while self._delete_expired_odds_batch_sync(cutoff_ts, batch_size) == batch_size:
+                pass
+            while self._delete_expired_history_batch_sync(cutoff_ts, batch_size) == batch_size:
+                pass
+            logger.info(f"Cleaned up bets/odds older than {days} days.")
+        except Exception as e:
+            logger.error(f"Error cleaning old data: {e}")
+        finally:
+            DB_OP_SECONDS.observe(time.perf_counter() - start, op="cleanup_old_data")
+
+    # --- Compaction (small batches, one short transaction each) ---
+
+    async def delete_expired_seen_batch(self, cutoff_ts: int, limit: int) -> int:
+        return await self._run("delete_expired_seen_batch", self._delete_expired_seen_batch_sync, cutoff_ts, limit)
+
+    def _delete_expired_seen_batch_sync(self, cutoff_ts: int, limit: int) -> int:
+        # Walks idx_seen_bets_created from the oldest end; deleted rows drop out of the next page
+        with self._get_connection() as conn:
+            cursor = conn.execute(EXPIRED_SEEN_DELETE_SQL, (cutoff_ts, limit))
+            conn.commit()
+            return cursor.rowcount
+
+    async def delete_expired_odds_batch(self, cutoff_ts: int, limit: int) -> int:
+        return await self._run("delete_expired_odds_batch", self._delete_expired_odds_batch_sync, cutoff_ts, limit)
+
+    def _delete_expired_odds_batch_sync(self, cutoff_ts: int, limit: int) -> int:
+        # Same shape as seen_bets, over idx_odds_updated
+        with self._get_connection() as conn:
+            cursor = conn.execute(EXPIRED_ODDS_DELETE_SQL, (cutoff_ts, limit))
+            conn.commit()
+            return cursor.rowcount
+
+    async def delete_expired_history_batch(self, cutoff_ts: int, limit: int) -> int:
+        return await self._run("delete_expired_history_batch", self._delete_expired_history_batch_sync, cutoff_ts, limit)
+
+    def _delete_expired_history_batch_sync(self, cutoff_ts: int, limit: int) -> int:
+        # Blocks whose newest point is past retention, over idx_odds_history_last
+        with self._get_connection() as conn:
+            cursor = conn.execute(EXPIRED_HISTORY_DELETE_SQL, (cutoff_ts, limit))
+            conn.commit()
+            return cursor.rowcount
+
+    async def delete_delivered_outbox_batch(self, cutoff_ts: int, limit: int) -> int:
+        return await self._run("delete_delivered_outbox_batch", self._delete_delivered_outbox_batch_sync, cutoff_ts, limit)
+
+    def _delete_delivered_outbox_batch_sync(self, cutoff_ts: int, limit: int) -> int:
+        # Delivered entries are kept until retention so re-enqueues stay idempotent
+        with self._get_connection() as conn:
+            cursor = conn.execute(DELIVERED_OUTBOX_DELETE_SQL, (cutoff_ts, limit))
+            conn.commit()
+            return cursor.rowcount
+
+    async def archive_settled_batch(self, cutoff_ts: int, limit: int) -> int:
+        return await self._run("archive_settled_batch", self._archive_settled_batch_sync, cutoff_ts, limit)
+
+    def _archive_settled_batch_sync(self, cutoff_ts: int, limit: int) -> int:
+        """Move up to `limit` settled bets alerted before `cutoff_ts` into alerted_bets_archive."""
+        with self._get_connection() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = [dict(r) for r in conn.execute(SETTLED_FOR_ARCHIVE_SQL, (cutoff_ts, limit))]
+            if not rows:
+                return 0
+
+            payload = zlib.compress(json.dumps(rows, separators=(",", ":"), default=str).encode(), 9)
+            conn.execute("""
+                INSERT INTO alerted_bets_archive
+                    (archived_at, first_alerted_at, last_alerted_at, bet_count, wins, profit, stake, payload)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                int(time.time()),
+                rows[0]["alerted_at"],
+                rows[-1]["alerted_at"],
+                len(rows),
+                sum(1 for r in rows if r["status"] == "WON"),
+                sum(r["profit"] or 0.0 for r in rows),
+                sum(r["stake"] or 0.0 for r in rows),
+                payload,
+            ))
+            conn.executemany("DELETE FROM alerted_bets WHERE id = ?", [(r["id"],) for r in rows])
+            conn.commit()
+            return len(rows)
+
+    async def load_archived_bets(self) -> List[dict]:
+        return await self._run("load_archived_bets", self._load_archived_bets_sync)
+
+    def _load_archived_bets_sync(self) -> List[dict]:
+        """Decode every archived batch (for reporting/backtests; not used on the hot path)."""
+        with self._get_connection() as conn:
+            blobs = conn.execute("SELECT payload FROM alerted_bets_archive ORDER BY id").fetchall()
+        bets = []
+        for (blob,) in blobs:
+            bets.extend(json.loads(zlib.decompress(blob)))
+        return bets
+
+    async def incremental_vacuum(self, pages: int) -> int:
+        return await self._run("incremental_vacuum", self._incremental_vacuum_sync, pages)
+
+    def _incremental_vacuum_sync(self, pages: int) -> int:
+        """Release up to `pages` free pages. Returns the free pages left."""
+        with self._get_connection() as conn:
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)});").fetchall()
+            return conn.execute("PRAGMA freelist_count;").fetchone()[0]
+
+    async def checkpoint(self):
+        """Fold the WAL back into the main DB file (used on shutdown for a fast restart)."""
+        await self._run("checkpoint", self._checkpoint_sync)
+
+    def _checkpoint_sync(self):
+        try:
+            with self._get_connection() as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+        except Exception as e:
+            logger.error(f"Error checkpointing WAL: {e}")
+
+    # --- Line Movement Tracking ---
+
+    async def get_odds_snapshot(self, bet_id: str) -> Optional[dict]:
+        return await self._run("get_odds_snapshot", self._get_odds_snapshot_sync, bet_id)
+
+    def _get_odds_snapshot_sync(self, bet_id: str) -> Optional[dict]:
+        try:
+            with self._get_connection() as conn:
+                # Use row factory for dict
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute("SELECT * FROM latest_odds WHERE bet_id = ?", (bet_id,))
+                row = cursor.fetchone()
+                if row:
+                    return dict(row)
+                return None
+        except Exception as e:
+            logger.error(f"Error getting odds snapshot: {e}")
+            return None
+
+    async def get_odds_snapshots(self, bet_ids: List[str]) -> Dict[str, dict]:
+        """Bulk form of get_odds_snapshot: bet_id -> row for the ids that have a snapshot."""
+        if not bet_ids:
+            return {}
+        return await self._run("get_odds_snapshots", self._get_odds_snapshots_sync, bet_ids)
+
+    def _get_odds_snapshots_sync(self, bet_ids: List[str]) -> Dict[str, dict]:
+        snapshots: Dict[str, dict] = {}
+        try:
+            with self._get_connection() as conn:
+                conn.row_factory = sqlite3.Row
+                for i in range(0, len(bet_ids), 500):
+                    chunk = bet_ids[i:i + 500]
+                    rows = conn.execute(
+                        f"SELECT * FROM latest_odds WHERE bet_id IN ({','.join('?' * len(chunk))})", chunk
+                    )
+                    snapshots.update((row["bet_id"], dict(row)) for row in rows)
+        except Exception as e:
+            logger.error(f"Error getting odds snapshots: {e}")
+        return snapshots
+
+    async def upsert_odds_snapshots(self, rows: List[OddsRow]):
+        """Insert or update many (bet_id, odds, previous_odds) in one transaction; alert_sent is kept."""
+        if rows:
+            await self._run("upsert_odds_snapshots", self._upsert_odds_snapshots_sync, rows)
+
+    def _upsert_odds_snapshots_sync(self, rows: List[OddsRow]):
+        try:
+            updated_at = int(time.time())
+            with self._get_connection() as conn:
+                conn.executemany(ODDS_UPSERT_SQL, [(bet_id, odds, previous, updated_at) for bet_id, odds, previous in rows])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error upserting odds snapshots: {e}")
+
+    async def append_odds_history(self, observations: List[Observation]):
+        if observations:
+            await self._run("append_odds_history", self._append_odds_history_sync, observations)
+
+    def _append_odds_history_sync(self, observations: List[Observation]):
+        try:
+            with self._get_connection() as conn:
+                for bet_id, ts, odds in observations:
+                    ticks = to_ticks(odds)
+                    head = conn.execute("""
+                        SELECT block_start, n, last_ts, last_odds FROM odds_history
+                        WHERE bet_id = ? ORDER BY block_start DESC LIMIT 1
+                    """, (bet_id,)).fetchone()
+                    if head and head[3] == ticks:
+                        continue
+                    deltas = append_deltas(head[1], head[2], head[3], ts, ticks) if head else None
+                    if deltas:
+                        conn.execute("""
+                            UPDATE odds_history SET
+                                n = n + 1, last_ts = ?, last_odds = ?,
+                                ts_deltas = CAST(ts_deltas || ? AS BLOB), odds_deltas = CAST(odds_deltas || ? AS BLOB)
+                            WHERE bet_id = ? AND block_start = ?
+                        """, (ts, ticks, deltas[0], deltas[1], bet_id, head[0]))
+                    else:
+                        conn.execute("""
+                            INSERT OR IGNORE INTO odds_history
+                                (bet_id, block_start, base_odds, n, last_ts, last_odds, ts_deltas, odds_deltas)
+                            VALUES (?, ?, ?, 1, ?, ?, x'', x'')
+                        """, (bet_id, ts, ticks, ts, ticks))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error appending odds history: {e}")
+
+    async def get_odds_history(self, bet_ids: List[str]) -> Dict[str, List[Block]]:
+        return await self._run("get_odds_history", self._get_odds_history_sync, bet_ids)
+
+    def _get_odds_history_sync(self, bet_ids: List[str]) -> Dict[str, List[Block]]:
+        history: Dict[str, List[Block]] = {}
+        try:
+            with self._get_connection() as conn:
+                for i in range(0, len(bet_ids), 500):
+                    chunk = bet_ids[i:i + 500]
+                    rows = conn.execute(f"""
+                        SELECT bet_id, block_start, base_odds, ts_deltas, odds_deltas FROM odds_history
+                        WHERE bet_id IN ({",".join("?" * len(chunk))})
+                        ORDER BY bet_id, block_start
+                    """, chunk)
+                    for bet_id, block_start, base_odds, ts_deltas, odds_deltas in rows:
+                        history.setdefault(bet_id, []).append((block_start, base_odds, ts_deltas, odds_deltas))
+        except Exception as e:
+            logger.error(f"Error loading odds history: {e}")
+        return history
+
+    async def set_alert_flags(self, bet_ids: List[str], flag: int):
+        if bet_ids:
+            await self._run("set_alert_flags", self._set_alert_flags_sync, bet_ids, flag)
+
+    def _set_alert_flags_sync(self, bet_ids: List[str], flag: int):
+        try:
+            with self._get_connection() as conn:
+                conn.executemany("UPDATE latest_odds SET alert_sent = ? WHERE bet_id = ?", [(flag, b) for b in bet_ids])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error setting alert flag: {e}")
+    
+    # --- ROI Tracking ---
+
+    async def store_alerted_bet(self, bet_id: str, user_id: str, event_id: int, market: str, selection: str, odds: float):
+        await self._run("store_alerted_bet", self._store_alerted_bet_sync, bet_id, user_id, event_id, market, selection, odds)
+
+    def _store_alerted_bet_sync(self, bet_id: str, user_id: str, event_id: int, market: str, selection: str, odds: float):
+        try:
+            with self._get_connection() as conn:
+                conn.execute(ALERTED_INSERT_SQL, (bet_id, user_id, event_id, market, selection, odds, int(time.time())))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error storing alerted bet: {e}")
+
+    async def get_pending_bets(self) -> List[dict]:
+        return await self._run("get_pending_bets", self._get_pending_bets_sync)
+
+    # --- Alert Outbox ---
+
+    async def record_new_bets(self, seen: List[Tuple[str, str]], alerts: List[OutboxRow],
+                              alerted: List[AlertedRow]) -> bool:
+        """Seen-marks, alerted_bets rows and outbox entries in one transaction (all or nothing)."""
+        if not (seen or alerts or alerted):
+            return True
+        return await self._run("record_new_bets", self._record_new_bets_sync, seen, alerts, alerted)
+
+    def _record_new_bets_sync(self, seen, alerts, alerted) -> bool:
+        try:
+            now = int(time.time())
+            with self._get_connection() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO seen_bets (key, created_at) VALUES (?, ?)",
+                    [(seen_key(bet_id), now) for bet_id, _ in seen]
+                )
+                conn.executemany(ALERTED_INSERT_SQL, [(*row, now) for row in alerted])
+                conn.executemany(OUTBOX_INSERT_SQL, [(key, payload, now, now) for key, payload in alerts])
+                conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error recording new bets: {e}")
+            return False
+
+    async def record_line_movements(self, snapshots: List[OddsRow], alerts: List[OutboxRow],
+                                    flags: List[AlertFlagRow]) -> bool:
+        """Odds snapshots, line-movement outbox entries and alert_sent flags in one transaction."""
+        if not (snapshots or alerts or flags):
+            return True
+        return await self._run("record_line_movements", self._record_line_movements_sync, snapshots, alerts, flags)
+
+    def _record_line_movements_sync(self, snapshots, alerts, flags) -> bool:
+        try:
+            now = int(time.time())
+            with self._get_connection() as conn:
+                conn.executemany(ODDS_UPSERT_SQL, [(bet_id, odds, previous, now) for bet_id, odds, previous in snapshots])
+                conn.executemany(OUTBOX_INSERT_SQL, [(key, payload, now, now) for key, payload in alerts])
+                conn.executemany("UPDATE latest_odds SET alert_sent = ? WHERE bet_id = ?", [(f, b) for b, f in flags])
+                conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error recording line movements: {e}")
+            return False
+
+    async def enqueue_alerts(self, alerts: List[OutboxRow]):
+        if alerts:
+            await self._run("enqueue_alerts", self._enqueue_alerts_sync, alerts)
+
+    def _enqueue_alerts_sync(self, alerts: List[OutboxRow]):
+        try:
+            now = int(time.time())
+            with self._get_connection() as conn:
+                conn.executemany(OUTBOX_INSERT_SQL, [(key, payload, now, now) for key, payload in alerts])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error enqueueing alerts: {e}")
+
+    async def claim_outbox(self, limit: int, lease_seconds: int) -> List[dict]:
+        """Due, undelivered entries; each is leased (hidden from other claims) for `lease_seconds`."""
+        return await self._run("claim_outbox", self._claim_outbox_sync, limit, lease_seconds)
+
+    def _claim_outbox_sync(self, limit: int, lease_seconds: int) -> List[dict]:
+        try:
+            now = int(time.time())
+            with self._get_connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute(OUTBOX_DUE_SQL, (now, limit)).fetchall()
+                conn.executemany(
+                    "UPDATE alert_outbox SET available_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    [(now + lease_seconds, row[0]) for row in rows]
+                )
+                conn.commit()
+            return [
+                {"id": r[0], "idem_key": r[1], "payload": r[2], "delivered_sinks": r[3], "attempts": r[4] + 1}
+                for r in rows
+            ]
+        except Exception as e:
+            logger.error(f"Error claiming outbox: {e}")
+            return []
+
+    async def ack_outbox(self, acks: List[OutboxAck]):
+        if acks:
+            await self._run("ack_outbox", self._ack_outbox_sync, acks)
+
+    def _ack_outbox_sync(self, acks: List[OutboxAck]):
+        try:
+            now = int(time.time())
+            with self._get_connection() as conn:
+                conn.executemany(
+                    "UPDATE alert_outbox SET delivered_sinks = ?, delivered_at = ?, available_at = ? WHERE id = ?",
+                    [(sinks, now if done else None, retry_at, outbox_id) for outbox_id, sinks, done, retry_at in acks]
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error acknowledging outbox: {e}")
+
+    def _get_pending_bets_sync(self) -> List[dict]:
+        try:
+            with self._get_connection() as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(PENDING_BETS_SQL)
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error getting pending bets: {e}")
+            return []
+
+    async def update_bet_outcome(self, bet_id: str, status: str, profit: float):
+        await self._run("update_bet_outcome", self._update_bet_outcome_sync, bet_id, status, profit)
+
+    def _update_bet_outcome_sync(self, bet_id: str, status: str, profit: float):
+        try:
+            with self._get_connection() as conn:
+                conn.execute("""
+                    UPDATE alerted_bets 
+                    SET status = ?, profit = ? 
+                    WHERE id = ?
+                """, (status, profit, bet_id))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error updating bet outcome: {e}")
+
+    async def get_roi_stats(self) -> dict:
+        return await self._run("get_roi_stats", self._get_roi_stats_sync)
+
+    def _get_roi_stats_sync(self) -> dict:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute("""
+                    SELECT 
+                        COUNT(*) as total_bets,
+                        SUM(CASE WHEN status = 'WON' THEN 1 ELSE 0 END) as wins,
+                        SUM(profit) as total_profit,
+                        SUM(stake) as total_stake
+                    FROM alerted_bets 
+                    WHERE status IN ('WON', 'LOST', 'VOID')
+                """)
+                row = cursor.fetchone()
+                archived = conn.execute(
+                    "SELECT SUM(bet_count), SUM(wins), SUM(profit), SUM(stake) FROM alerted_bets_archive"
+                ).fetchone()
+                if row:
+                    return roi_summary(
+                        (row[0] or 0) + (archived[0] or 0),
+                        (row[1] or 0) + (archived[1] or 0),
+                        (row[2] or 0.0) + (archived[2] or 0.0),
+                        (row[3] or 0.0) + (archived[3] or 0.0),
+                    )
+                return {}
+        except Exception as e:
+            logger.error(f"Error getting ROI stats: {e}")
+            return {}
+
+
+# Backwards-compatible name; most callers and scripts import `Storage`
+Storage = SqliteStorage
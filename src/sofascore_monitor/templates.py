@@ -0,0 +1,198 @@
+"""
+Precompiled Discord embed templates and one-shot payload serialization.
+
+Each alert type has a skeleton whose static parts (titles, colors, footers,
+field names) are built once at import. Rendering only fills in the values
+that change per alert. The predictor card of a user (link, Performance field,
+embed color) is cached and rebuilt only when the user's stats change, so a
+busy tipster's alerts cost a couple of string joins each.
+
+Rendered embeds share the static parts and the cached fragments: treat them
+as read-only (`merge_alerts` deep-copies before adding fields).
+
+`Payload` is a webhook body that is serialized once, however many times it
+is posted or retried. orjson is used when installed, the stdlib otherwise.
+"""
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from .models import Bet, User
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data) -> Any:
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
+
+
+class Payload(dict):
+    """A JSON webhook body whose encoding is computed on first use and reused for every retry."""
+
+    __slots__ = ("_body",)
+
+    def body(self) -> bytes:
+        try:
+            return self._body
+        except AttributeError:
+            self._body = dumps(self)
+            return self._body
+
+
+def encode(payload: dict) -> bytes:
+    return payload.body() if isinstance(payload, Payload) else dumps(payload)
+
+
+# --- Static parts ---
+
+BET_TITLE = "⚽️ NEW BET ALERT"
+BET_FOOTER = {"text": "Sofascore Monitor • Antigravity"}
+LINE_FOOTER = {"text": "Sofascore Monitor • Line Tracking"}
+CONSENSUS_FOOTER = {"text": "Sofascore Monitor • Consensus"}
+COLOR_PROFITABLE = 3447003
+COLOR_DEFAULT = 10181046
+COLOR_DROP = 15158332
+COLOR_RISE = 3066993
+COLOR_CONSENSUS = 0xF1C40F
+MAX_LISTED_PREDICTORS = 10
+
+
+def _timestamp() -> str:
+    return datetime.utcnow().isoformat()
+
+
+# --- Cached fragments ---
+
+@lru_cache(maxsize=4096)
+def user_link(user_id: str) -> str:
+    return f"https://www.sofascore.com/user/profile/{user_id}"
+
+
+@lru_cache(maxsize=8192)
+def _match_link(sport: Optional[str], slug: Optional[str], custom_id: Optional[str], event_id: int) -> str:
+    slug = slug or "match"
+    if custom_id:
+        return f"https://www.sofascore.com/{sport or 'sport'}/match/{slug}/{custom_id}#id:{event_id}"
+    return f"https://www.sofascore.com/{slug}/{event_id}"
+
+
+def match_link(bet: Bet) -> str:
+    return _match_link(bet.sport, bet.event_slug, bet.custom_id, bet.event_id)
+
+
+class UserCard(NamedTuple):
+    color: int
+    predictor: dict     # "🔮 Predictor" field
+    performance: dict   # "📊 Performance" field
+    mention: str        # Markdown link to the profile
+
+
+@lru_cache(maxsize=4096)
+def _user_card(user_id: str, name: str, roi: Optional[float], profit: Optional[float], win_rate: Optional[float],
+               current_roi: Optional[float], current_profit: Optional[float],
+               current_win_rate: Optional[float]) -> UserCard:
+    # Green if profitable in either All-time or Current
+    is_profitable = (roi is not None and roi > 0) or (current_roi is not None and current_roi > 0)
+    icon_all = "⚪"
+    icon_cur = "🟢" if (current_roi and current_roi > 10) else "⚪"
+    mention = f"[{name}]({user_link(user_id)})"
+    return UserCard(
+        color=COLOR_PROFITABLE if is_profitable else COLOR_DEFAULT,
+        predictor={"name": "🔮 Predictor", "value": mention, "inline": True},
+        performance={
+            "name": "📊 Performance",
+            "value": (
+                f"**All Time** {icon_all}\n"
+                f"ROI: **{roi or 0:.1f}%** | P&L: **{profit or 0:+.0f}** | Win: **{win_rate or 0:.0f}%**\n\n"
+                f"**Current** {icon_cur}\n"
+                f"ROI: **{current_roi or 0:.1f}%** | P&L: **{current_profit or 0:+.0f}** | "
+                f"Win: **{current_win_rate or 0:.0f}%**"
+            ),
+            "inline": True,
+        },
+        mention=mention,
+    )
+
+
+def user_card(user: User) -> UserCard:
+    """Per-user fragments, keyed on every stat they show: a stats change renders a fresh card."""
+    return _user_card(str(user.id), user.name, user.roi, user.profit, user.win_rate,
+                      user.current_roi, user.current_profit, user.current_win_rate)
+
+
+# --- Renderers ---
+
+def bet_embed(user: User, bets: List[Bet]) -> dict:
+    # Use first bet for Match/Sport details (grouped by match)
+    first_bet = bets[0]
+    card = user_card(user)
+    bets_value = "\n".join(
+        f"**{i + 1}.** {bet.market_name}: {bet.choice_name} @ **{bet.odds}** 🎯" for i, bet in enumerate(bets)
+    )
+    return {
+        "title": BET_TITLE,
+        "color": card.color,
+        "fields": [
+            card.predictor,
+            card.performance,
+            {"name": "⚽️ Match", "value": f"[{first_bet.match_name}]({match_link(first_bet)})", "inline": False},
+            {"name": f"🎯 Bets ({len(bets)})", "value": bets_value, "inline": False},
+        ],
+        "footer": BET_FOOTER,
+        "timestamp": _timestamp(),
+    }
+
+
+def line_movement_embed(bet: Bet, previous_odds: float, movement_pct: float) -> Tuple[dict, str]:
+    """(embed, arrow). A drop means the market now agrees with the tipster's pick."""
+    drop = bet.odds < previous_odds
+    arrow = "🔻" if drop else "🔺"
+    embed = {
+        "title": f"{arrow} Line Movement Alert ({movement_pct * 100:.1f}%)",
+        "color": COLOR_DROP if drop else COLOR_RISE,
+        "fields": [
+            {"name": "Match", "value": f"[{bet.match_name}]({match_link(bet)})", "inline": False},
+            {"name": "Selection", "value": f"**{bet.market_name}**: {bet.choice_name}", "inline": False},
+            {"name": "Odds Change", "value": f"{previous_odds} ➔ **{bet.odds}**", "inline": True},
+            {"name": "Movement", "value": f"{'DROP' if drop else 'RISE'} of {abs(bet.odds - previous_odds):.2f}",
+             "inline": True},
+        ],
+        "footer": LINE_FOOTER,
+    }
+    return embed, arrow
+
+
+def consensus_embed(consensus) -> dict:
+    bet = consensus.bet
+    users = consensus.users
+    lines = [f"{user_card(u).mention} (ROI {u.roi or 0:.1f}%)" for u in users[:MAX_LISTED_PREDICTORS]]
+    if len(users) > MAX_LISTED_PREDICTORS:
+        lines.append(f"... and {len(users) - MAX_LISTED_PREDICTORS} more")
+    return {
+        "title": f"🤝 CONSENSUS: {len(users)} predictors on {bet.choice_name}",
+        "color": COLOR_CONSENSUS,
+        "fields": [
+            {"name": "⚽️ Match", "value": f"[{bet.match_name}]({match_link(bet)})", "inline": False},
+            {"name": "🎯 Selection", "value": f"**{bet.market_name}**: {bet.choice_name} @ **{bet.odds}**",
+             "inline": True},
+            {"name": "📈 Confidence",
+             "value": f"**{consensus.confidence * 100:.0f}%** "
+                      f"(weight {consensus.support:.2f} vs {consensus.opposition:.2f})",
+             "inline": True},
+            {"name": "🔮 Predictors", "value": "\n".join(lines), "inline": False},
+        ],
+        "footer": CONSENSUS_FOOTER,
+        "timestamp": _timestamp(),
+    }
@@ -0,0 +1,218 @@
+"""
+Lightweight span tracing with OTLP/JSON export.
+
+Spans follow the OpenTelemetry data model (trace/span ids, parent ids, unix-nano
+timestamps, attributes, status) and are exported as OTLP/JSON `resourceSpans`,
+one trace per line, to a local file and/or an OTLP/HTTP collector
+(e.g. http://localhost:4318/v1/traces).
+
+Sampling is head-based: the decision is made once per root span (one monitor
+cycle) and inherited by every child through a ContextVar, which asyncio tasks
+and `asyncio.to_thread` copy automatically. Unsampled cycles cost one
+ContextVar lookup per span.
+
+Storage and HTTP spans are opened with `child_span`: they only exist inside
+a trace. Called outside one (a CLI command, the outbox relay) they are
+no-ops instead of a sampled root trace per query. Background passes that
+should be traced open a named root span of their own.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from .config import TRACE_SAMPLE_RATE, TRACE_EXPORT_PATH, TRACE_OTLP_ENDPOINT
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "sofascore-monitor"
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error", "_trace")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], trace: List["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self._trace = trace
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Returned for unsampled traces; accepts and discards everything."""
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Any] = ContextVar("sofascore_current_span", default=None)
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def to_otlp_payload(spans: List[Span]) -> dict:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{
+                "scope": {"name": "sofascore_monitor"},
+                "spans": [s.to_otlp() for s in spans],
+            }],
+        }]
+    }
+
+
+class SpanExporter:
+    """Ships finished traces from a daemon thread so export never blocks the loop."""
+
+    def __init__(self, path: Optional[str] = None, endpoint: Optional[str] = None, max_queue: int = 256):
+        self.path = path
+        self.endpoint = endpoint
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def export(self, spans: List[Span]):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name="span-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0):
+        """Block until queued traces are written (used on shutdown and in tests)."""
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _worker(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                self._write(spans)
+            except Exception as e:
+                logger.warning(f"Span export failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, spans: List[Span]):
+        body = json.dumps(to_otlp_payload(spans), separators=(",", ":"))
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(body + "\n")
+        if self.endpoint:
+            import urllib.request  # Only exporters that push over HTTP need it
+            request = urllib.request.Request(
+                self.endpoint, data=body.encode(), headers={"Content-Type": "application/json"}
+            )
+            urllib.request.urlopen(request, timeout=5).close()
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = 0.0, exporter: Optional[SpanExporter] = None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = _current_span.get()
+        if parent is NOOP_SPAN:
+            yield NOOP_SPAN
+            return
+
+        if parent is None:
+            # Root span: take the sampling decision for the whole trace
+            if not self.enabled or random.random() >= self.sample_rate:
+                token = _current_span.set(NOOP_SPAN)
+                try:
+                    yield NOOP_SPAN
+                finally:
+                    _current_span.reset(token)
+                return
+            span = Span(name, os.urandom(16).hex(), None, [], attributes)
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, parent._trace, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            span._trace.append(span)
+            if parent is None:
+                self.exporter.export(span._trace)
+
+    @contextmanager
+    def child_span(self, name: str, **attributes):
+        """Like `span`, but a no-op (for nested spans too) when there is no enclosing trace."""
+        if _current_span.get() is not None:
+            with self.span(name, **attributes) as span:
+                yield span
+            return
+        token = _current_span.set(NOOP_SPAN)
+        try:
+            yield NOOP_SPAN
+        finally:
+            _current_span.reset(token)
+
+
+def _build_tracer() -> Tracer:
+    if TRACE_SAMPLE_RATE <= 0 or not (TRACE_EXPORT_PATH or TRACE_OTLP_ENDPOINT):
+        return Tracer(0.0)
+    return Tracer(TRACE_SAMPLE_RATE, SpanExporter(TRACE_EXPORT_PATH or None, TRACE_OTLP_ENDPOINT or None))
+
+
+tracer = _build_tracer()
@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime
+
+from sofascore_monitor.alerts import MAX_MESSAGE_CHARS, Alert, AlertAggregator, embed_size, pack_messages
+from sofascore_monitor.models import Bet, User
+from sofascore_monitor import notifications
+from sofascore_monitor.outbox import OutboxRelay
+from sofascore_monitor.sinks import DiscordSink, SinkRegistry
+from sofascore_monitor.storage import MemoryStorage
+
+
+def make_alert(key, event_id=1, priority=1, summary=None, size=10):
+    return Alert(kind="bet", key=key, event_id=event_id, match=f"Match {event_id}", summary=summary or str(key),
+                 embed={"title": str(key), "fields": [{"name": "x", "value": "v" * size}]}, priority=priority)
+
+
+class FakeWebhook:
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.payloads = []
+
+    def __call__(self, payload):
+        self.payloads.append(payload)
+        return (self.statuses.pop(0) if self.statuses else 204), 0.0
+
+
+async def test_dedupes_merges_and_packs_ten_embeds_per_post():
+    webhook = FakeWebhook()
+    agg = AlertAggregator(webhook, digest_threshold=100)
+    for event_id in range(25):
+        agg.add(make_alert(("bet", event_id), event_id=event_id))
+    agg.add(make_alert(("line", 3), event_id=3, priority=2, summary="moved"))
+    agg.add(make_alert(("consensus", 3), event_id=3, priority=0, summary="agreed"))
+    agg.add(make_alert(("line", 3), event_id=3, priority=2, summary="moved again"))  # replaces "moved"
+
+    assert await agg.flush() == 3
+    assert [len(p["embeds"]) for p in webhook.payloads] == [10, 10, 5]
+    merged = webhook.payloads[0]["embeds"][3]
+    assert merged["title"] == "('consensus', 3)"
+    assert merged["fields"][-1]["value"] == "('bet', 3)\nmoved again"
+    assert await agg.flush() == 0
+
+
+def test_packing_respects_message_size():
+    embeds = [make_alert(i, size=2500).embed for i in range(5)]
+    messages = pack_messages(embeds)
+    assert [len(m["embeds"]) for m in messages] == [2, 2, 1]
+    assert all(sum(embed_size(e) for e in m["embeds"]) <= MAX_MESSAGE_CHARS for m in messages)
+
+
+async def test_digest_under_backpressure_and_after_rate_limit():
+    webhook = FakeWebhook()
+    agg = AlertAggregator(webhook, digest_threshold=5)
+    for event_id in range(40):
+        agg.add(make_alert(("bet", event_id), event_id=event_id, summary=f"pick {event_id}"))
+    assert await agg.flush() == 1
+    [digest] = webhook.payloads[0]["embeds"]
+    assert digest["title"].startswith("📬 Alert digest (40 alerts)")
+    assert "**Match 39**\npick 39" in digest["description"]
+
+    webhook = FakeWebhook(statuses=[429, 204])
+    agg = AlertAggregator(webhook, digest_threshold=5)
+    agg.add(make_alert("a"))
+    await agg.flush()
+    assert len(webhook.payloads) == 2 and "description" not in webhook.payloads[1]["embeds"][0]
+    agg.add(make_alert("b"))
+    await agg.flush()
+    assert webhook.payloads[2]["embeds"][0]["title"].startswith("📬 Alert digest")
+
+
+async def test_bet_alert_is_delivered_through_the_outbox():
+    user = User(id="1", name="Tipster", slug="tipster", roi=12.0)
+    bet = Bet(id="b1", user_id="1", event_id=5, event_slug="a-b", custom_id=None, sport="football",
+              match_name="A vs B", market_name="Match Winner", choice_name="1", odds=2.0, stake=None,
+              status="Not started", start_time=None, created_at=datetime.now())
+    webhook = FakeWebhook()
+    registry = SinkRegistry()
+    registry.register(DiscordSink("https://discord.test/hook", 10, post=lambda url, payload: webhook(payload)))
+    storage = MemoryStorage()
+    relay = OutboxRelay(storage, registry)
+    await relay.enqueue([notifications.bet_alert(user, [bet])])
+
+    stop = asyncio.Event()
+    task = asyncio.create_task(registry.run_forever(stop))
+    await asyncio.sleep(0)
+    assert await relay.run_once() == 1
+    stop.set()
+    await asyncio.wait_for(task, timeout=5)
+    assert webhook.payloads[0]["embeds"][0]["title"] == "⚽️ NEW BET ALERT"
+    assert [e["delivered_sinks"] for e in storage.outbox.values()] == ["discord"]
@@ -0,0 +1,105 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from sofascore_monitor import archive as archive_module
+from sofascore_monitor.archive import ResponseArchive, replay
+
+T0 = 1709290800.0  # 2024-03-01 11:00 UTC: long past, so only the virtual clock makes these matches upcoming
+USER = "5dadb1036996486450251cb6"
+PREDICTIONS = f"/user-account/{USER}/predictions?page=0"
+RANKING = "/user-account/vote-ranking"
+
+
+def prediction(i: int, start: float) -> dict:
+    return {
+        "id": f"bet-{i}", "eventId": 1000 + i, "eventSlug": f"home-away-{i}", "homeTeamName": "Home",
+        "awayTeamName": "Away", "sportSlug": "football", "vote": "1", "odds": {"decimalValue": "2.10"},
+        "status": {"description": "Not started", "type": "notstarted"}, "startDateTimestamp": int(start),
+    }
+
+
+def body(data) -> bytes:
+    return json.dumps(data).encode()
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = ResponseArchive(str(tmp_path / "responses.db"))
+    yield archive
+    archive.close()
+
+
+def test_repeated_responses_are_stored_once(archive):
+    same, other = body({"predictions": [prediction(1, T0)]}), body({"predictions": []})
+    with patch.object(archive_module, "compress", wraps=archive_module.compress) as compress:
+        for i in range(3):
+            archive.record(PREDICTIONS, same, T0 + 60 * i)
+        archive.record(PREDICTIONS, other, T0 + 180)
+        archive.record(RANKING, same, T0 + 181)  # Same content under another endpoint
+    assert compress.call_count == 2
+
+    stats = archive.stats()
+    assert (stats["responses"], stats["blobs"]) == (5, 2)
+    assert stats["raw_bytes"] == 4 * len(same) + len(other)
+    assert archive.latest(PREDICTIONS, T0 + 179) == same
+    assert archive.latest(PREDICTIONS, T0 + 180) == other
+    assert archive.latest(PREDICTIONS, T0 - 1) is None
+
+
+def test_cycles_and_prune(archive):
+    for cycle in range(3):
+        for i, endpoint in enumerate((PREDICTIONS, f"/user/{cycle}/predictions?page=0")):
+            archive.record(endpoint, body({"cycle": cycle}), T0 + cycle * 60 + i)
+    assert archive.cycles() == [T0 + 1, T0 + 61, T0 + 121]
+    assert list(archive.index(page_size=2)) == list(archive.index())
+
+    assert archive.prune(T0 + 60) == 2
+    stats = archive.stats()
+    assert (stats["responses"], stats["blobs"]) == (4, 2)
+
+
+async def test_client_records_successful_responses(archive):
+    from sofascore_monitor.bench import FakeSofascoreServer
+    from sofascore_monitor.client import SofascoreClient
+
+    server = FakeSofascoreServer(users=3).start()
+    try:
+        client = SofascoreClient(base_url=server.base_url)
+        client.archive = archive
+        first = await client.get_top_predictors()
+        await client.get_top_predictors()
+    finally:
+        server.stop()
+    stats = archive.stats()
+    assert (stats["responses"], stats["blobs"]) == (2, 1)
+    assert json.loads(archive.latest(RANKING, float("inf"))) == first
+
+
+async def test_replay_runs_monitor_on_archive_time(archive):
+    archive.record(RANKING, body({"ranking": [{"id": USER, "nickname": "Tipster", "slug": "tipster"}]}), T0 - 5)
+    # Cycle 1: one upcoming bet; cycle 2: the same plus a new one; cycle 3: nothing new
+    archive.record(PREDICTIONS, body({"predictions": [prediction(1, T0 + 3600)]}), T0)
+    new_bets = body({"predictions": [prediction(1, T0 + 3600), prediction(2, T0 + 7200)]})
+    archive.record(PREDICTIONS, new_bets, T0 + 60)
+    archive.record(PREDICTIONS, new_bets, T0 + 120)
+
+    result = await replay(archive)
+
+    assert (result.cycles, result.users, result.misses) == (3, 1, 0)
+    assert result.simulated_seconds == 120
+    assert [(a["kind"], a["replayed_at"]) for a in result.alerts] == [("bet", T0), ("bet", T0 + 60)]
+    assert "Tipster" in json.dumps(result.alerts)
+
+
+def test_replay_command(archive, capsys):
+    from sofascore_monitor.cli import main
+
+    archive.record(PREDICTIONS, body({"predictions": [prediction(1, T0 + 3600)]}), T0)
+    with patch("sofascore_monitor.cli.configure_logging"):
+        assert main(["replay", archive.path, "--json"]) == 0
+        assert json.loads(capsys.readouterr().out)["cycles"] == 1
+        assert main(["replay", archive.path, "--stats", "--json"]) == 0
+        assert json.loads(capsys.readouterr().out)["responses"] == 1
+        assert main(["replay", archive.path + ".missing"]) == 2
@@ -0,0 +1,123 @@
+import json
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from sofascore_monitor.archive import ResponseArchive
+from sofascore_monitor.backtest import Dataset, best, followed, parse_grid, run_backtest
+from sofascore_monitor.filters import passes_filters
+from sofascore_monitor.settings import Settings
+
+T0 = 1709290800.0
+HOUR = 3600
+A, B, C = "a" * 24, "b" * 24, "c" * 24
+
+
+def ranking_row(uid, total, profit, win_rate, avg_odds):
+    return {"id": uid, "nickname": uid[:1], "voteStatistics": {"allTime": {
+        "roi": profit, "total": total, "percentage": f"{win_rate}%", "avgCorrectOdds": {"decimalValue": str(avg_odds)},
+    }}}
+
+
+def prediction(pid, start_hours, odds, status="notstarted", correct=None):
+    return {"id": pid, "eventId": 1000 + ord(pid[0]) * 10 + int(pid[1:]), "vote": "1", "odds": {"decimalValue": f"{odds:.2f}"},
+            "status": {"type": status}, "correct": correct, "startDateTimestamp": int(T0 + start_hours * HOUR)}
+
+
+def a_predictions(h):
+    # a1 starts at +30h: 2.00, moves to 2.50 at +10h, wins. a2 starts at +2h and loses. a3 never settles.
+    a1 = prediction("a1", 30, 2.5 if h >= 10 else 2.0, *(("finished", 1) if h >= 32 else ()))
+    a2 = prediction("a2", 2, 1.8, *(("finished", -1) if h >= 4 else ()))
+    return [a1, a2, prediction("a3", 60, 1.9)]
+
+
+def b_predictions(h):
+    # b1 starts at +5h at 3.00 and wins; b2 only shows up at +20h, 10 hours after kick-off
+    items = [prediction("b1", 5, 3.0, *(("finished", 1) if h >= 7 else ()))]
+    if h >= 20:
+        items.append(prediction("b2", 10, 2.2, "finished", 1))
+    return items
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    archive = ResponseArchive(str(tmp_path_factory.mktemp("backtest") / "responses.db"))
+    ranking = {"ranking": [ranking_row(B, 50, -5, 45, 1.7), ranking_row(A, 100, 20, 60, 2.0),
+                           ranking_row(C, 10, 5, 70, 2.5)]}
+    archive.record("/user-account/vote-ranking", json.dumps(ranking).encode(), T0 - 60)
+    for h in range(40):
+        for uid, items in ((A, a_predictions(h)), (B, b_predictions(h))):
+            archive.record(f"/user-account/{uid}/predictions?page=0",
+                           json.dumps({"predictions": items}).encode(), T0 + h * HOUR + (uid == B))
+    yield Dataset.from_archive(archive), archive.path
+    archive.close()
+
+
+def run(ds, **changes):
+    return run_backtest(ds, [Settings().updated(changes)], workers=1)[0]
+
+
+def test_dataset_summary(dataset):
+    summary = dataset[0].summary()
+    assert (summary["users"], summary["ranked_without_predictions"]) == (3, 1)
+    assert (summary["polls"], summary["bets"], summary["settled"]) == (80, 5, 4)
+    assert summary["odds_changes"] == 6  # First sightings plus a1's move
+
+
+def test_default_settings(dataset):
+    result = run(dataset[0])
+    # B's ROI is negative: A and C (never polled) are followed. a1 at 2.00 wins (+1), a2 loses (-1)
+    assert (result.users, result.bets, result.wins, result.profit, result.roi) == (2, 2, 1, 0.0, 0.0)
+    # a1's 25% move inside its window is staked at the new odds
+    assert (result.line_alerts, result.line_profit) == (1, 1.5)
+
+
+def test_filters_limit_and_time_window(dataset):
+    ds = dataset[0]
+    assert (run(ds, min_roi=-20).bets, run(ds, min_roi=-20).profit) == (3, 2.0)  # b1 +2; b2 came too late
+    only_b = run(ds, min_roi=-20, top_predictors_limit=1)  # B ranks first
+    assert (only_b.users, only_b.bets, only_b.profit) == (1, 1, 2.0)
+    assert (run(ds, min_win_rate=65).users, run(ds, min_win_rate=65).bets) == (1, 0)  # Only C
+    # 4h lookahead: a1 is first alerted at +26h, after the move, at 2.50; no line alert outside the window
+    late = run(ds, time_lookahead_hours=4)
+    assert (late.bets, late.profit, late.line_alerts) == (2, 0.5, 0)
+    assert run(ds, line_movement_threshold=0.3).line_alerts == 0
+
+
+def test_vectorized_filters_match_monitor(dataset):
+    ds = dataset[0]
+    configs = parse_grid(["min_roi=-20:20:10", "min_avg_odds=1.5,1.8", "min_total_bets=0,60", "min_win_rate=0,50"])
+    mask = followed(ds, configs)
+    for config, row in zip(configs, mask):
+        expected = [passes_filters(ds.stats(u), config) for u in range(len(ds.user_ids))]
+        assert row.tolist() == expected
+
+
+def test_process_pool_matches_inline(dataset):
+    configs = parse_grid(["min_roi=-20,0", "time_lookahead_hours=4,24", "line_movement_threshold=0.1,0.3"])
+    assert len(configs) == 8
+    pooled = run_backtest(dataset[0], configs, workers=2)
+    assert pooled == run_backtest(dataset[0], configs, workers=1)
+    assert best(pooled, min_bets=3)[0].settings["min_roi"] == -20
+
+
+def test_parse_grid():
+    configs = parse_grid(["min_avg_odds=1.5:1.7:0.1", "top_predictors_limit=5:15:5"], Settings(min_roi=3))
+    assert [(c.min_avg_odds, c.top_predictors_limit) for c in configs][:4] == [(1.5, 5), (1.5, 10), (1.5, 15), (1.6, 5)]
+    assert len(configs) == 9 and all(c.min_roi == 3 for c in configs)
+    for bad in (["proxy_url=x"], ["min_roi"], ["line_movement_threshold=2"], ["min_roi=1:0"]):
+        with pytest.raises(ValueError):
+            parse_grid(bad)
+
+
+def test_backtest_command(dataset, capsys):
+    from sofascore_monitor.cli import main
+
+    with patch("sofascore_monitor.cli.configure_logging"), \
+         patch("sofascore_monitor.settings.Settings.load", return_value=Settings()):
+        assert main(["backtest", dataset[1], "--grid", "min_roi=-20,0", "--workers", "1", "--json"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["configs"] == 2
+    assert [r["settings"]["min_roi"] for r in report["results"]] == [-20.0, 0.0]
+    assert np.isclose(report["results"][0]["roi"], 2 / 3 * 100)
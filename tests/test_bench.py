@@ -0,0 +1,64 @@
+import pytest
+import sqlite3
+from sofascore_monitor.bench import run_benchmark, compare_seen_layouts
+
+@pytest.mark.asyncio
+async def test_benchmark_drives_real_monitor(tmp_path):
+    """End-to-end: fake API -> Monitor -> Storage -> fake webhook."""
+    db_path = str(tmp_path / "bench.db")
+    result = await run_benchmark(users=3, cycles=2, db_path=db_path)
+
+    assert result.users == 3
+    # 1 discovery request + one predictions request per user per cycle + resolution
+    assert result.status_counts[200] >= 1 + 3 * 2
+    assert result.webhook_posts > 0
+    assert len(result.cycle_seconds) == 2
+    assert result.requests_per_second > 0
+    assert result.peak_rss_mb > 0
+
+    with sqlite3.connect(db_path) as conn:
+        statuses = {row[0] for row in conn.execute("SELECT status FROM alerted_bets")}
+    assert statuses and "PENDING" not in statuses
+
+@pytest.mark.asyncio
+async def test_benchmark_survives_rate_limits(tmp_path):
+    result = await run_benchmark(users=4, cycles=2, rate_429=0.5, db_path=str(tmp_path / "bench.db"))
+    assert result.status_counts.get(429, 0) > 0
+
+@pytest.mark.asyncio
+async def test_benchmark_on_memory_storage():
+    result = await run_benchmark(users=2, cycles=2, storage_url="memory://")
+    assert result.webhook_posts > 0
+
+def test_compact_seen_layout_is_smaller(tmp_path):
+    layouts = compare_seen_layouts(rows=5000, lookups=500, workdir=str(tmp_path))
+    assert layouts["int_without_rowid"]["size_mb"] < layouts["text_rowid"]["size_mb"] / 2
+
+@pytest.mark.asyncio
+async def test_benchmark_reports_compressed_bytes():
+    result = await run_benchmark(users=2, cycles=1, storage_url="memory://")
+    assert 0 < result.wire_bytes < result.decoded_bytes / 2
+    plain = await run_benchmark(users=2, cycles=1, storage_url="memory://", compress=False)
+    assert plain.wire_bytes == plain.decoded_bytes
+
+@pytest.mark.asyncio
+async def test_client_counts_wire_and_decoded_bytes():
+    from sofascore_monitor.bench import FakeSofascoreServer
+    from sofascore_monitor.client import SofascoreClient
+    from sofascore_monitor.metrics import HTTP_DECODED_BYTES_TOTAL, HTTP_PARSE_SECONDS, HTTP_WIRE_BYTES_TOTAL
+
+    label = "/user-account/vote-ranking"
+    wire_before = HTTP_WIRE_BYTES_TOTAL.value(endpoint=label, encoding="gzip")
+    decoded_before = HTTP_DECODED_BYTES_TOTAL.value(endpoint=label)
+    parsed_before = HTTP_PARSE_SECONDS.count(endpoint=label)
+    server = FakeSofascoreServer(users=20).start()
+    try:
+        data = await SofascoreClient(base_url=server.base_url).get_top_predictors()
+    finally:
+        server.stop()
+
+    assert len(data["ranking"]) == 20
+    wire = HTTP_WIRE_BYTES_TOTAL.value(endpoint=label, encoding="gzip") - wire_before
+    decoded = HTTP_DECODED_BYTES_TOTAL.value(endpoint=label) - decoded_before
+    assert (wire, decoded) == (server.wire_bytes, server.decoded_bytes)
+    assert HTTP_PARSE_SECONDS.count(endpoint=label) == parsed_before + 1
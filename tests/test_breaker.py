@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+import pytest
+
+from sofascore_monitor.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from sofascore_monitor.client import SofascoreClient
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make(**kwargs):
+    clock = Clock()
+    changes = []
+    breaker = CircuitBreaker(3, 60, 600, jitter=0.0, clock=clock,
+                             on_change=lambda key, c: changes.append((key, c.open_until is not None)), **kwargs)
+    return breaker, clock, changes
+
+
+def test_trips_after_threshold_and_notifies_on_transitions_only():
+    breaker, clock, changes = make()
+    breaker.failure("u")
+    breaker.failure("u")
+    assert breaker.state("u") == CLOSED and changes == []
+    breaker.failure("u")
+    assert breaker.state("u") == OPEN and not breaker.allow("u")
+    assert changes == [("u", True)]
+
+
+def test_half_open_lets_one_probe_through():
+    breaker, clock, changes = make()
+    for _ in range(3):
+        breaker.failure("u")
+    clock.now += 60
+    assert breaker.state("u") == HALF_OPEN and breaker.ready("u")
+    assert breaker.allow("u")
+    assert not breaker.allow("u") and not breaker.ready("u")  # Probe in flight
+    breaker.release("u")
+    assert breaker.allow("u")
+    breaker.success("u")
+    assert breaker.state("u") == CLOSED and "u" not in breaker.circuits
+    assert changes == [("u", True), ("u", False)]
+
+
+def test_failed_probe_doubles_backoff_up_to_cap():
+    breaker, clock, _ = make()
+    for _ in range(3):
+        breaker.failure("u")
+    opened = []
+    for _ in range(6):
+        opened.append(breaker.circuits["u"].open_until - clock.now)
+        clock.now = breaker.circuits["u"].open_until
+        assert breaker.allow("u")
+        breaker.failure("u")
+    assert opened == [60, 120, 240, 480, 600, 600]
+
+
+def test_jitter_and_minimum_open_time():
+    breaker = CircuitBreaker(1, 100, 1000, jitter=0.2)
+    assert all(80 <= breaker.backoff(1) <= 120 for _ in range(50))
+    breaker.failure("u", min_seconds=1800)
+    assert breaker.circuits["u"].open_until - breaker.clock() >= 1799
+
+
+async def test_client_endpoint_circuit_stops_requests():
+    client = SofascoreClient(base_url="http://127.0.0.1:9")
+    client.breaker = CircuitBreaker(2, 60, 600)
+    with patch.object(client, "_fetch_sync", return_value=None) as fetch:
+        for _ in range(4):
+            assert await client.get_user_predictions("5dadb1036996486450251cb6") is None
+    assert fetch.call_count == 2
+    assert not client.available("/user-account/5dadb1036996486450251cb7/predictions?page=0")
+    assert client.available("/user-account/vote-ranking")  # Other endpoint classes are unaffected
+
+
+@pytest.mark.parametrize("status", ["ok", "404"])
+async def test_client_endpoint_success_resets(status):
+    from sofascore_monitor.client import UserNotFoundError
+    client = SofascoreClient(base_url="http://127.0.0.1:9")
+    client.breaker = CircuitBreaker(2, 60, 600)
+    with patch.object(client, "_fetch_sync", return_value=None):
+        await client.get_top_predictors()
+    result = {"ranking": []} if status == "ok" else UserNotFoundError("gone")
+    with patch.object(client, "_fetch_sync", side_effect=[result]):
+        try:
+            await client.get_top_predictors()
+        except UserNotFoundError:
+            pass
+    assert client.breaker.circuits == {}
@@ -1,6 +1,5 @@
 import pytest
-import pytz
-from datetime import datetime
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 from sofascore_monitor.monitor import Monitor
 
@@ -11,11 +10,11 @@ def monitor():
 def test_burst_mode_active(monitor):
     # Test cases: 9, 10, 11, 12, 13, 14 should return 60
     # Let's test :09
-    mock_now = datetime(2023, 10, 27, 12, 9, 30, tzinfo=pytz.utc)
+    mock_now = datetime(2023, 10, 27, 12, 9, 30, tzinfo=timezone.utc)
     
     with patch('sofascore_monitor.monitor.datetime') as mock_dt:
         mock_dt.now.return_value = mock_now
-        # We also need utcnow for fallback? logic prefers now(pytz.utc)
+        # We also need utcnow for fallback? logic prefers now(timezone.utc)
         
         interval = monitor.calculate_adaptive_interval(5)
         assert interval == 60, f"Expected 60s at :09, got {interval}"
@@ -26,7 +25,7 @@ def test_burst_mode_inactive(monitor):
     # Wait, requirement was "before the start". 
     # Logic: 9 <= rem <= 14. So :00 is rem=0 -> Normal.
     
-    mock_now = datetime(2023, 10, 27, 12, 0, 30, tzinfo=pytz.utc)
+    mock_now = datetime(2023, 10, 27, 12, 0, 30, tzinfo=timezone.utc)
     
     with patch('sofascore_monitor.monitor.datetime') as mock_dt:
         mock_dt.now.return_value = mock_now
@@ -39,7 +38,7 @@ def test_manual_check_minutes(monitor):
     print("\nMin | Interval | Mode")
     print("----|----------|-----")
     for m in range(16):
-        mock_now = datetime(2023, 10, 27, 12, m, 30, tzinfo=pytz.utc)
+        mock_now = datetime(2023, 10, 27, 12, m, 30, tzinfo=timezone.utc)
         with patch('sofascore_monitor.monitor.datetime') as mock_dt:
             mock_dt.now.return_value = mock_now
             interval = monitor.calculate_adaptive_interval(5)
@@ -0,0 +1,69 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+from sofascore_monitor.cli import Session, build_parser, cmd_inspect_user, cmd_search, main
+
+
+def test_no_command_runs_the_monitor():
+    with patch("sofascore_monitor.cli.cmd_run", return_value=0) as run, \
+         patch("sofascore_monitor.cli.configure_logging"):
+        assert main(["--storage", "memory://"]) == 0
+    args = run.call_args[0][0]
+    assert args.command == "run" and args.no_discovery is False
+
+
+def test_bench_options_pass_through():
+    with patch("sofascore_monitor.bench.main") as bench_main, patch("sofascore_monitor.cli.configure_logging"):
+        assert main(["bench", "--users", "2", "--json"]) == 0
+    bench_main.assert_called_once_with(["--users", "2", "--json"])
+
+
+def test_stats_json(capsys):
+    with patch("sofascore_monitor.cli.configure_logging"):
+        assert main(["--storage", "memory://", "stats", "--json"]) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert stats["total_bets"] == 0 and stats["pending"] == 0
+
+
+async def test_inspect_user_reports_rank_status_and_seen(capsys):
+    args = build_parser().parse_args(["inspect-user", "u1", "u2", "--bet", "b1", "--bet", "b2", "--json"])
+    session = Session("memory://")
+    session.client = AsyncMock()
+    session.client.get_top_predictors.return_value = {"ranking": [{"id": "u9"}, {"id": "u2", "nickname": "Two"}]}
+    session.client.get_user_predictions.side_effect = lambda uid: (
+        {"predictions": [{"startDateTimestamp": 4102444800}, {"startDateTimestamp": 1}]} if uid == "u2" else None
+    )
+    await session.storage.add_seen("b1", "u2")
+    await session.storage.save_user_statuses([("u1", 1, datetime.now() + timedelta(minutes=30))])
+
+    async with session:
+        assert await cmd_inspect_user(session, args) == 1  # u1's request failed
+
+    report = json.loads(capsys.readouterr().out)
+    u1, u2 = report["users"]
+    assert u1["fetched"] is False and u1["failures"] == 1 and u1["paused_until"]
+    assert (u2["rank"], u2["name"], u2["predictions"], u2["upcoming"]) == (2, "Two", 2, 1)
+    assert report["bets"] == {"b1": True, "b2": False}
+
+
+def test_run_uses_the_storage_option():
+    with patch("sofascore_monitor.monitor.Monitor") as monitor_cls, patch("asyncio.run"), \
+         patch("sofascore_monitor.cli.configure_logging"):
+        monitor_cls.return_value.run = lambda: None
+        assert main(["--storage", "memory://", "run", "--no-discovery"]) == 0
+    kwargs = monitor_cls.call_args.kwargs
+    assert kwargs["use_auto_discovery"] is False
+    assert type(kwargs["storage"]).__name__ == "MemoryStorage"
+
+
+async def test_search(capsys):
+    args = build_parser().parse_args(["search", "tips", "nothing", "--json"])
+    session = Session("memory://")
+    session.client = AsyncMock()
+    session.client.search.side_effect = lambda q: {"results": [
+        {"type": "user", "entity": {"id": 7, "name": "Tips"}}]} if q == "tips" else {"results": []}
+    async with session:
+        assert await cmd_search(session, args) == 0
+    assert json.loads(capsys.readouterr().out) == {
+        "tips": [{"type": "user", "id": 7, "name": "Tips"}], "nothing": []}
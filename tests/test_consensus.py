@@ -0,0 +1,78 @@
+import pytest
+from datetime import datetime, timedelta
+
+from sofascore_monitor.consensus import ConsensusIndex, user_weight
+from sofascore_monitor.models import Bet, User
+
+START = datetime.now() + timedelta(hours=2)
+
+def make_bet(user_id, event_id=1, vote="1", start=START):
+    return Bet(id=f"{user_id}-{event_id}", user_id=user_id, event_id=event_id, event_slug="a-b", custom_id=None,
+               sport="football", match_name="A vs B", market_name="Match Winner", choice_name=vote, odds=2.0,
+               stake=None, status="Not started", start_time=start, created_at=datetime.now())
+
+def make_user(uid, roi=None):
+    return User(id=uid, name=f"user {uid}", slug=uid, roi=roi)
+
+def test_alerts_once_when_threshold_is_crossed():
+    index = ConsensusIndex(min_users=3)
+    for uid in ("a", "b"):
+        index.add(make_bet(uid), make_user(uid))
+    index.add(make_bet("a"), make_user("a"))  # repeat poll: not a new vote
+    assert index.drain() == []
+
+    index.add(make_bet("c"), make_user("c"))
+    index.add(make_bet("d"), make_user("d"))
+    [found] = index.drain()
+    assert sorted(u.id for u in found.users) == ["a", "b", "c", "d"]
+
+    index.add(make_bet("e"), make_user("e"))
+    assert index.drain() == []
+
+def test_confidence_is_roi_weighted_against_other_side():
+    index = ConsensusIndex(min_users=2)
+    index.add(make_bet("a"), make_user("a", roi=50.0))
+    index.add(make_bet("b"), make_user("b", roi=-10.0))
+    index.add(make_bet("c", vote="2"), make_user("c", roi=0.0))
+
+    [found] = index.drain()
+    assert (found.bet.choice_name, found.support, found.opposition) == ("1", 2.5, 1.0)
+    assert found.confidence == pytest.approx(2.5 / 3.5)
+    assert [u.id for u in found.users] == ["a", "b"]
+    assert user_weight(make_user("x")) == 1.0
+
+def test_finished_events_expire_and_can_be_restored_as_alerted():
+    index = ConsensusIndex(min_users=2, ttl_seconds=300)
+    past = datetime.now() - timedelta(hours=1)
+    for uid in ("a", "b"):
+        index.add(make_bet(uid, event_id=7, start=past), make_user(uid))
+        index.add(make_bet(uid, event_id=8), make_user(uid))
+    assert len(index.drain()) == 2
+
+    assert index.expire() == 1
+    assert len(index) == 1 and index.alerted_state() == [[8, "1"]]
+
+    restored = ConsensusIndex(min_users=2)
+    restored.restore_alerted(index.alerted_state())
+    for uid in ("a", "b"):
+        restored.add(make_bet(uid, event_id=8), make_user(uid))
+    assert restored.drain() == []
+
+def test_disabled_index_stays_empty():
+    index = ConsensusIndex(min_users=0)
+    index.add(make_bet("a"), make_user("a"))
+    assert len(index) == 0 and index.drain() == []
+
+async def test_monitor_sends_consensus_after_cycle():
+    from sofascore_monitor.monitor import Monitor
+    from sofascore_monitor.storage import MemoryStorage
+
+    monitor = Monitor(use_auto_discovery=False, client=object(), storage=MemoryStorage())
+    monitor.consensus.min_users = 2
+    for uid in ("a", "b"):
+        monitor.consensus.add(make_bet(uid), make_user(uid))
+    await monitor.notify_consensus()
+    await monitor.notify_consensus()
+    [entry] = monitor.storage.outbox.values()
+    assert entry["idem_key"].startswith("consensus:")
+    assert monitor._state_snapshot()["consensus_alerted"] == [[1, "1"]]
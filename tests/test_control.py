@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import pytest
+
+from sofascore_monitor.admin import AdminRequest
+from sofascore_monitor.models import User
+from sofascore_monitor.monitor import Monitor
+from sofascore_monitor.settings import Settings
+from sofascore_monitor.storage import MemoryStorage
+
+
+class FakeClient:
+    def __init__(self):
+        self.proxy = None
+
+    def set_proxy(self, proxy_url):
+        self.proxy = proxy_url or None
+
+    async def get_top_predictors(self):
+        stats = {"roi": 50, "total": "100", "percentage": "60%", "avgCorrectOdds": {"decimalValue": "2.0"}}
+        return {"ranking": [{"id": str(i), "nickname": f"User {i}", "voteStatistics": {"allTime": stats}}
+                            for i in range(1, 9)]}
+
+
+@pytest.fixture
+def monitor():
+    monitor = Monitor(use_auto_discovery=False, client=FakeClient(), storage=MemoryStorage())
+    monitor.users = [User(id="1", name="One", slug="one")]
+    return monitor
+
+
+def call(monitor, method, path, body=None, **query):
+    request = AdminRequest(method, path, {k: str(v) for k, v in query.items()},
+                           json.dumps(body).encode() if body is not None else b"")
+    return monitor.admin._dispatch(request)
+
+
+def test_settings_validate_and_coerce():
+    settings = Settings().updated({"min_roi": "5", "top_predictors_limit": 20.0})
+    assert (settings.min_roi, settings.top_predictors_limit) == (5.0, 20)
+    for bad in ({"nope": 1}, {"top_predictors_limit": 2.5}, {"scan_interval_minutes": 0},
+                {"line_movement_threshold": 1.5}, {"min_roi": True}):
+        with pytest.raises(ValueError):
+            Settings().updated(bad)
+    assert Settings(proxy_url="http://u:pw@proxy:8080").to_dict()["proxy_url"] == "***@proxy:8080"
+
+
+async def test_settings_update_is_all_or_nothing(monitor):
+    before = monitor.settings
+    response = await call(monitor, "POST", "/control/settings", {"min_roi": 5, "scan_interval_minutes": -1})
+    assert response.status == 400 and monitor.settings is before
+
+    response = await call(monitor, "POST", "/control/settings", {"min_roi": 5, "proxy_url": "http://p:1"})
+    assert response.status == 200 and json.loads(response.body)["min_roi"] == 5.0
+    assert monitor.settings.min_roi == 5.0 and monitor.client.proxy == "http://p:1"
+
+
+async def test_add_and_remove_users(monitor):
+    cycle_users = monitor.users
+    response = await call(monitor, "POST", "/control/users", {"id": 2, "name": "Two"})
+    assert response.status == 200
+    assert [u.id for u in monitor.users] == ["1", "2"] and len(cycle_users) == 1  # Running cycle unaffected
+    assert (await call(monitor, "POST", "/control/users", {"id": "2"})).status == 400
+    assert (await call(monitor, "POST", "/control/users", {"id": "3", "bogus": 1})).status == 400
+
+    monitor.seen_cache["1"] = {"b1"}
+    assert (await call(monitor, "DELETE", "/control/users", id="1")).status == 200
+    assert [u.id for u in monitor.users] == ["2"] and "1" not in monitor.seen_cache
+    assert (await call(monitor, "DELETE", "/control/users", id="1")).status == 404
+    listed = json.loads((await call(monitor, "GET", "/control/users")).body)
+    assert listed[0]["name"] == "Two" and listed[0]["paused"] is False
+
+
+async def test_tasks_and_state(monitor):
+    assert (await call(monitor, "POST", "/control/discover", limit=3)).status == 202
+    await asyncio.gather(*monitor._background_tasks)
+    state = json.loads((await call(monitor, "GET", "/control/state")).body)
+    assert state["users"] == 4 and state["settings"]["min_avg_odds"] == monitor.settings.min_avg_odds
+
+
+async def test_discover_reranks_instead_of_growing(monitor):
+    for limit in (3, 3, 5, 2):
+        assert (await call(monitor, "POST", "/control/discover", limit=limit)).status == 202
+        await asyncio.gather(*monitor._background_tasks)
+        # "1" is pinned: it is in the ranking but never takes one of the `limit` slots
+        assert [u.id for u in monitor.users] == ["1"] + [str(i) for i in range(2, 2 + limit)]
+    for bad in ("0", "-1", "x"):
+        assert (await call(monitor, "POST", "/control/discover", limit=bad)).status == 400
+
+
+async def test_unix_socket(monitor, tmp_path):
+    monitor.admin.socket_path = str(tmp_path / "admin.sock")
+    await monitor.admin.start_unix()
+    try:
+        reader, writer = await asyncio.open_unix_connection(monitor.admin.socket_path)
+        writer.write(b"GET /control/settings HTTP/1.0\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+    finally:
+        await monitor.admin.stop()
+    assert response.startswith(b"HTTP/1.0 200 OK") and b'"min_roi"' in response
@@ -0,0 +1,39 @@
+import pytest
+
+from sofascore_monitor.filters import passes_filters, prediction_key, prediction_odds, predictor_stats, settle
+from sofascore_monitor.settings import Settings
+
+
+def test_predictor_stats_from_ranking_block():
+    stats = predictor_stats({"roi": 12.5, "total": "250", "percentage": "54.4%",
+                             "avgCorrectOdds": {"decimalValue": "2.05"}})
+    assert stats.roi == pytest.approx(5.0)
+    assert (stats.profit, stats.win_rate, stats.total_bets, stats.avg_odds) == (12.5, 54.4, 250, 2.05)
+    assert predictor_stats(None).total_bets == 0
+    assert predictor_stats({"percentage": "n/a", "total": "?", "avgCorrectOdds": {"decimalValue": "x"}}).roi == 0.0
+
+
+def test_all_filters_apply():
+    stats = predictor_stats({"roi": 10, "total": "100", "percentage": "50%", "avgCorrectOdds": {"decimalValue": "1.9"}})
+    assert passes_filters(stats, Settings(min_roi=10, min_total_bets=100, min_avg_odds=1.9, min_win_rate=50))
+    assert not passes_filters(stats, Settings(min_win_rate=51))
+    assert not passes_filters(stats, Settings(min_avg_odds=2.0))
+
+
+@pytest.mark.parametrize("status, correct, expected", [
+    ("finished", 1, ("WON", 1.5)),
+    ("finished", -1, ("LOST", -2.0)),
+    ("finished", 0, ("VOID", 0.0)),
+    ("canceled", 1, ("VOID", 0.0)),
+    ("finished", None, None),
+    ("inprogress", 1, None),
+])
+def test_settle(status, correct, expected):
+    assert settle(status, correct, odds=1.75, stake=2.0) == expected
+
+
+def test_prediction_key_and_odds():
+    assert prediction_key({"id": "abc", "eventId": 1, "vote": "X"}) == "abc"
+    assert prediction_key({"eventId": 1, "vote": "X"}) == "1_X"
+    assert prediction_odds({"odds": {"decimalValue": "2.10"}}) == 2.1
+    assert prediction_odds({"odds": None}) == prediction_odds({"odds": {"decimalValue": "-"}}) == 0.0
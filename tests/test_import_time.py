@@ -0,0 +1,47 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import sofascore_monitor
+
+SRC = str(Path(list(sofascore_monitor.__path__)[0]).resolve().parent)
+# Warm, cumulative import of sofascore_monitor.monitor measured at ~150-200ms; raise on slow CI machines
+BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "300"))
+HEAVY = ("curl_cffi", "requests", "pytz", "dotenv", "numpy", "asyncpg", "urllib.request")
+
+PROBE = """
+import json, os, sys
+created = []
+_mkdir = os.mkdir
+def mkdir(path, *args, **kwargs):
+    created.append(str(path))
+    return _mkdir(path, *args, **kwargs)
+os.mkdir = mkdir
+import sofascore_monitor.monitor
+print(json.dumps({"loaded": [m for m in %r if m in sys.modules], "created": created}))
+""" % (HEAVY,)
+
+
+def _import_monitor(tmp_path, *flags):
+    env = {**os.environ, "PYTHONPATH": SRC, "ENV_FILE": str(tmp_path / "missing.env")}
+    return subprocess.run(
+        [sys.executable, *flags, "-c", PROBE], cwd=tmp_path, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def test_import_has_no_heavy_modules_or_side_effects(tmp_path):
+    result = json.loads(_import_monitor(tmp_path).stdout)
+    assert result["loaded"] == []
+    assert result["created"] == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_import_time_budget(tmp_path):
+    _import_monitor(tmp_path)  # Compile bytecode first: the budget is for a warm start
+    stderr = _import_monitor(tmp_path, "-X", "importtime").stderr
+    match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| sofascore_monitor\.monitor$", stderr, re.MULTILINE)
+    assert match, stderr[-500:]
+    assert int(match.group(1)) / 1000 < BUDGET_MS
@@ -0,0 +1,83 @@
+import pytest
+import asyncio
+from sofascore_monitor.metrics import Registry, endpoint_label
+from sofascore_monitor.admin import MAX_BODY_BYTES, AdminServer, AdminResponse
+
+def test_endpoint_label_collapses_ids():
+    assert endpoint_label("/user-account/5dadb1036996486450251cb6/predictions?page=0") == "/user-account/{id}/predictions"
+    assert endpoint_label("/user/857093/predictions?page=1") == "/user/{id}/predictions"
+    assert endpoint_label("/user-account/vote-ranking") == "/user-account/vote-ranking"
+
+def test_counter_and_histogram_render():
+    registry = Registry()
+    responses = registry.counter("test_responses_total", "Responses.", ("status",))
+    latency = registry.histogram("test_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+    responses.inc(status="200")
+    responses.inc(status="200")
+    responses.inc(status="429")
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    text = registry.render()
+    assert '# TYPE test_responses_total counter' in text
+    assert 'test_responses_total{status="200"} 2' in text
+    assert 'test_responses_total{status="429"} 1' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 2' in text
+    assert 'test_latency_seconds_count 2' in text
+
+def test_labels_must_match():
+    registry = Registry()
+    counter = registry.counter("test_total", "Test.", ("status",))
+    with pytest.raises(ValueError):
+        counter.inc(code="200")
+
+@pytest.mark.asyncio
+async def test_admin_server_serves_routes():
+    registry = Registry()
+    registry.gauge("test_queue_depth", "Depth.").set(3)
+
+    async def handle_metrics(request):
+        return AdminResponse(body=registry.render().encode())
+
+    server = AdminServer("127.0.0.1", 0)
+    server.route("GET", "/metrics", handle_metrics)
+    port = await server.start()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.0\r\n\r\n")
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        assert raw.startswith(b"HTTP/1.0 200")
+        assert b"test_queue_depth 3" in raw
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /missing HTTP/1.0\r\n\r\n")
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        assert raw.startswith(b"HTTP/1.0 404")
+
+        # Malformed Content-Length or a short body: a 400, not a dropped connection
+        for head in (b"Content-Length: abc", b"Content-Length: -5", b"Content-Length: 10"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /metrics HTTP/1.0\r\n" + head + b"\r\n\r\n{}")
+            writer.write_eof()
+            await writer.drain()
+            raw = await reader.read()
+            writer.close()
+            assert raw.startswith(b"HTTP/1.0 400 Bad Request"), head
+
+        # Oversized body: rejected up front rather than truncated and handed to the handler
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST /metrics HTTP/1.0\r\nContent-Length: %d\r\n\r\n{}" % (MAX_BODY_BYTES + 1))
+        writer.write_eof()
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        assert raw.startswith(b"HTTP/1.0 413 Payload Too Large")
+    finally:
+        await server.stop()
@@ -1,13 +1,19 @@
 import pytest
 import asyncio
-from unittest.mock import AsyncMock, patch, MagicMock
+import time
+from unittest.mock import AsyncMock, patch, MagicMock, call
 from datetime import datetime, timedelta
+from sofascore_monitor.breaker import CLOSED, OPEN
+from sofascore_monitor.client import UserNotFoundError
+from sofascore_monitor.config import BREAKER_BASE_SECONDS
 from sofascore_monitor.monitor import Monitor
 from sofascore_monitor.models import User, Bet
+from sofascore_monitor.storage import MemoryStorage
 
 @pytest.fixture
 def mock_client():
     client = AsyncMock()
+    client.available = MagicMock(return_value=True)  # Endpoint circuit closed
     return client
 
 @pytest.fixture
@@ -18,18 +24,23 @@ def mock_storage():
 @pytest.fixture
 def monitor(mock_client, mock_storage):
     with patch('sofascore_monitor.monitor.SofascoreClient', return_value=mock_client), \
-         patch('sofascore_monitor.monitor.Storage', return_value=mock_storage):
+         patch('sofascore_monitor.monitor.create_storage', return_value=mock_storage):
         monitor = Monitor(use_auto_discovery=False)
         monitor.users = [User(id="123", name="Test User", slug="test-user")]
         return monitor
 
+def ranked(uid, nickname, **extra):
+    stats = {"roi": 12.0, "total": "100", "percentage": "55%", "avgCorrectOdds": {"decimalValue": "2.10"}}
+    return {"id": uid, "nickname": nickname, "voteStatistics": {"allTime": stats}, **extra}
+
 @pytest.mark.asyncio
 async def test_discover_users(monitor):
     """Test auto-discovery adds new users."""
     monitor.client.get_top_predictors.return_value = {
         "ranking": [
-            {"id": 456, "nickname": "New User", "slug": "new-user"},
-            {"id": 123, "nickname": "Test User", "slug": "test-user"} # Existing
+            ranked(456, "New User", slug="new-user"),
+            ranked(123, "Test User", slug="test-user"),  # Existing
+            {"id": 789, "nickname": "No Stats"},  # Fails the default avg odds filter
         ]
     }
     
@@ -38,62 +49,72 @@ async def test_discover_users(monitor):
     assert len(monitor.users) == 2
     assert monitor.users[1].id == "456"
     assert monitor.users[1].name == "New User"
+    assert monitor.users[1].roi == pytest.approx(12.0)
 
 @pytest.mark.asyncio
 async def test_discover_users_limit(monitor):
     """Test that auto-discovery respects the limit."""
     # Mock return with many users
     monitor.client.get_top_predictors.return_value = {
-        "ranking": [{"id": i, "nickname": f"User {i}"} for i in range(20)]
+        "ranking": [ranked(i, f"User {i}") for i in range(20)]
     }
     
-    # We need to patch config.TOP_PREDICTORS_LIMIT, but it's imported into monitor module
-    # So we patch monitor.TOP_PREDICTORS_LIMIT
-    with patch('sofascore_monitor.monitor.TOP_PREDICTORS_LIMIT', 5):
-        await monitor.discover_users()
+    monitor.apply_settings(monitor.settings.updated({"top_predictors_limit": 5}))
+    await monitor.discover_users()
         
     # Should only have 1 (from init) + 5 discovered
     assert len(monitor.users) == 1 + 5
 
 @pytest.mark.asyncio
 async def test_check_user_paused(monitor):
-    """Test that paused users are skipped."""
-    # Mock storage to return paused status
-    monitor.storage.get_user_status.return_value = (3, datetime.now() + timedelta(minutes=30))
+    """Users with an open circuit are skipped without any storage or API call."""
+    monitor.breaker.restore("123", 3, time.time() + 1800)
     
     await monitor.check_user(monitor.users[0])
     
-    # Verify client was NOT called
     monitor.client.get_user_predictions.assert_not_called()
+    monitor.storage.save_user_statuses.assert_not_called()
+    assert monitor.paused_users == {"123"}
 
 @pytest.mark.asyncio
 async def test_check_user_generic_failure(monitor):
-    """Test that generic API failure increments failure count but DOES NOT PAUSE."""
-    monitor.storage.get_user_status.return_value = (0, None)
+    """Generic API failures open the circuit after MAX_RETRIES, with exponential backoff."""
     monitor.client.get_user_predictions.return_value = None # Simulate generic failure
     
+    for _ in range(2):
+        await monitor.check_user(monitor.users[0])
+    assert monitor.breaker.state("123") == CLOSED
     await monitor.check_user(monitor.users[0])
-    
-    # Called with 0 minutes pause
-    monitor.storage.increment_failure.assert_called_with(str(monitor.users[0].id), 3, 0)
+    assert monitor.breaker.state("123") == OPEN
+    assert monitor.breaker.circuits["123"].open_until < time.time() + BREAKER_BASE_SECONDS * 1.25
+
+    # Open: the next cycle does not call the API
+    await monitor.check_user(monitor.users[0])
+    assert monitor.client.get_user_predictions.await_count == 3
 
 @pytest.mark.asyncio
 async def test_check_user_404_failure(monitor):
-    """Test that 404 failure increments failure count AND PAUSES."""
-    monitor.storage.get_user_status.return_value = (0, None)
-    # Simulate 404
-    from client import UserNotFoundError
+    """404s open the circuit for at least the long pause."""
     monitor.client.get_user_predictions.side_effect = UserNotFoundError("404")
     
-    await monitor.check_user(monitor.users[0])
+    for _ in range(3):
+        await monitor.check_user(monitor.users[0])
     
-    # Called with 30 minutes pause
-    monitor.storage.increment_failure.assert_called_with(str(monitor.users[0].id), 3, 30)
+    assert monitor.breaker.circuits["123"].open_until >= time.time() + 30 * 60 - 1
+
+@pytest.mark.asyncio
+async def test_check_user_skips_open_endpoint(monitor):
+    """An open endpoint circuit skips the fetch and does not count against the user."""
+    monitor.client.available.return_value = False
+
+    await monitor.check_user(monitor.users[0])
+
+    monitor.client.get_user_predictions.assert_not_called()
+    assert "123" not in monitor.breaker.circuits
 
 @pytest.mark.asyncio
 async def test_new_bet_alert(monitor):
-    """Test that a new bet triggers an alert."""
-    monitor.storage.get_user_status.return_value = (0, None)
+    """Test that a new bet is marked seen and its alert queued in one storage call."""
     monitor.client.get_user_predictions.return_value = {
         "predictions": [{
             "id": 999,
@@ -107,15 +128,195 @@ async def test_new_bet_alert(monitor):
         }]
     }
     # Simulate not seen in DB
-    monitor.storage.is_seen.return_value = False
+    monitor.storage.is_seen = AsyncMock(return_value=False)
+    monitor.storage.record_new_bets = AsyncMock(return_value=True)
     
-    with patch('sofascore_monitor.monitor.send_discord_alert') as mock_alert:
-        await monitor.check_user(monitor.users[0])
+    await monitor.check_user(monitor.users[0])
         
-        # Verify DB add
-        monitor.storage.add_seen.assert_called_once()
-        # Verify Alert
-        mock_alert.assert_called_once()
-        args, _ = mock_alert.call_args
-        assert args[0].id == "123"
-        assert args[1].id == "999"
+    monitor.storage.record_new_bets.assert_awaited_once()
+    seen, alerts, alerted = monitor.storage.record_new_bets.call_args[0]
+    assert seen == [("999", "123")]
+    assert len(alerts) == 1
+    assert alerted[0][:2] == ("999", "123")
+
+@pytest.mark.asyncio
+async def test_circuit_state_persisted_on_change_only(tmp_path):
+    """Transitions are saved to user_status in the background and restored on the next start."""
+    client = AsyncMock()
+    client.available = MagicMock(return_value=True)
+    client.get_user_predictions.return_value = None
+    storage = MemoryStorage()
+    monitor = Monitor(use_auto_discovery=False, client=client, storage=storage)
+    monitor.users = [User(id="123", name="Test User", slug="test-user")]
+
+    await monitor.check_all_users()  # One failure: below the threshold, nothing to write
+    assert storage.user_status == {}
+    for _ in range(2):
+        await monitor.check_all_users()
+    await asyncio.gather(*monitor._background_tasks)
+    failures, paused_until = storage.user_status["123"]
+    assert failures == 3 and paused_until > datetime.now()
+
+    restarted = Monitor(use_auto_discovery=False, client=client, storage=storage)
+    await restarted.restore_circuits()
+    assert restarted.breaker.state("123") == OPEN
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_cycle_and_checkpoints(monitor, tmp_path):
+    """SIGTERM mid-cycle lets in-flight checks finish, then checkpoints state."""
+    from sofascore_monitor.snapshot import load_snapshot
+    monitor.state_path = str(tmp_path / "state.json")
+    monitor.storage.get_roi_stats = AsyncMock(return_value={})
+    monitor.storage.checkpoint = AsyncMock()
+    monitor.storage.open = AsyncMock()
+    monitor.storage.load_user_statuses = AsyncMock(return_value={})
+    monitor.storage.save_user_statuses = AsyncMock()
+    monitor.storage.close = AsyncMock()
+
+    finished = []
+    async def slow_cycle():
+        await asyncio.sleep(0.1)
+        finished.append(True)
+    monitor.check_all_users = slow_cycle
+
+    with patch('sofascore_monitor.monitor.ADMIN_PORT', 0):
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.02)
+        monitor.request_shutdown()
+        await asyncio.wait_for(task, timeout=2)
+
+    assert finished == [True]
+    monitor.storage.checkpoint.assert_awaited_once()
+    state = load_snapshot(monitor.state_path)
+    assert state["cycles"] == 1
+
+@pytest.mark.asyncio
+async def test_restore_state_skips_recent_resolution(monitor, tmp_path):
+    """A restart right after a resolution pass must not run it again immediately."""
+    monitor.state_path = str(tmp_path / "state.json")
+    monitor.last_resolution_check = datetime.now() - timedelta(minutes=5)
+    monitor.checkpoint_state()
+
+    with patch('sofascore_monitor.monitor.SofascoreClient'), patch('sofascore_monitor.monitor.create_storage'):
+        restarted = Monitor(use_auto_discovery=False)
+    restarted.state_path = monitor.state_path
+    restarted.restore_state()
+
+    assert (datetime.now() - restarted.last_resolution_check).total_seconds() < 3600
+
+@pytest.mark.asyncio
+async def test_warm_start_polls_before_discovery(monitor, tmp_path):
+    """With a snapshot, the first cycle must not wait on the leaderboard round-trip."""
+    monitor.state_path = str(tmp_path / "state.json.gz")
+    monitor.odds_cache["bet-1"] = [1.8, 0, int(datetime.now().timestamp())]
+    monitor.checkpoint_state()
+
+    with patch('sofascore_monitor.monitor.SofascoreClient', return_value=AsyncMock()), \
+         patch('sofascore_monitor.monitor.create_storage', return_value=MagicMock()):
+        restarted = Monitor(use_auto_discovery=True)
+    restarted.state_path = monitor.state_path
+    restarted.storage.get_roi_stats = AsyncMock(return_value={})
+    restarted.storage.checkpoint = AsyncMock()
+    restarted.storage.open = AsyncMock()
+    restarted.storage.load_user_statuses = AsyncMock(return_value={})
+    restarted.storage.save_user_statuses = AsyncMock()
+    restarted.storage.close = AsyncMock()
+
+    async def never_returns():
+        await asyncio.Event().wait()
+    restarted.client.get_top_predictors.side_effect = never_returns
+
+    polled = []
+    async def cycle():
+        polled.append([u.id for u in restarted.users])
+        restarted.request_shutdown()
+    restarted.check_all_users = cycle
+
+    with patch('sofascore_monitor.monitor.ADMIN_PORT', 0), \
+         patch('sofascore_monitor.monitor.SHUTDOWN_GRACE_SECONDS', 0.1):
+        await asyncio.wait_for(restarted.run(), timeout=2)
+
+    assert polled == [["123"]]
+    assert restarted.odds_cache["bet-1"][0] == 1.8
+
+@pytest.mark.asyncio
+async def test_line_movement_uses_odds_cache(monitor):
+    """Cached odds skip the DB read, and unchanged odds skip the write."""
+    monitor.storage.get_odds_snapshots = AsyncMock(return_value={})
+    monitor.storage.record_line_movements = AsyncMock(return_value=True)
+    bet = Bet(id="b1", user_id="123", event_id=1, event_slug="a-b", custom_id=None, sport="football",
+              match_name="A vs B", market_name="Match Winner", choice_name="1", odds=2.0, stake=None,
+              status="Not started", start_time=None, created_at=datetime.now())
+
+    await monitor.check_line_movements([bet])
+    await monitor.check_line_movements([bet])
+
+    monitor.storage.get_odds_snapshots.assert_awaited_once_with(["b1"])
+    monitor.storage.record_line_movements.assert_has_awaits([call([("b1", 2.0, None)], [], []), call([], [], [])])
+
+@pytest.mark.asyncio
+async def test_line_movement_is_recorded_in_one_transaction(monitor):
+    """New price, queued alert and alert flag are written together; a failed write is retried next cycle."""
+    storage = MemoryStorage()
+    monitor.storage, monitor.outbox.storage = storage, storage
+    bet = Bet(id="b1", user_id="123", event_id=1, event_slug="a-b", custom_id=None, sport="football",
+              match_name="A vs B", market_name="Match Winner", choice_name="1", odds=2.0, stake=None,
+              status="Not started", start_time=None, created_at=datetime.now())
+    await monitor.check_line_movements([bet])
+    bet.odds = 2.6
+
+    with patch.object(storage, "record_line_movements", AsyncMock(return_value=False)) as failed:
+        await monitor.check_line_movements([bet])
+    failed.assert_awaited_once()
+    assert storage.outbox == {} and storage.latest_odds["b1"]["odds"] == 2.0
+
+    await monitor.check_line_movements([bet])
+    assert len(storage.outbox) == 1
+    assert (storage.latest_odds["b1"]["odds"], storage.latest_odds["b1"]["alert_sent"]) == (2.6, 1)
+    await monitor.check_line_movements([bet])  # Flagged: not queued again
+    assert len(storage.outbox) == 1
+
+    # The price drifts back (resetting the flag) and repeats the same 2.0 -> 2.6 move: a new alert,
+    # not a duplicate idempotency key silently dropped by the outbox
+    monitor.settings = monitor.settings.updated({"line_movement_threshold": 0.25})
+    for ts, odds in enumerate((2.3, 2.0, 2.6), start=1_000):
+        bet.odds = odds
+        with patch("sofascore_monitor.monitor.time.time", return_value=ts):
+            await monitor.check_line_movements([bet])
+    assert len(storage.outbox) == 2 and storage.latest_odds["b1"]["alert_sent"] == 1
+
+
+@pytest.mark.asyncio
+async def test_warm_restarts_do_not_grow_discovered_users(monitor, tmp_path):
+    """Discovery after a warm start refreshes the snapshot's discovered users instead of adding a new batch."""
+    state_path = str(tmp_path / "state.json.gz")
+    ranking = {"ranking": [ranked(i, f"User {i}") for i in range(30)]}
+    current = monitor
+    counts = []
+    for restart in range(3):
+        current.client.get_top_predictors.return_value = ranking
+        current.apply_settings(current.settings.updated({"top_predictors_limit": 10}))
+        await current.discover_users()
+        counts.append(len(current.users))
+        current.state_path = state_path
+        current.checkpoint_state()
+
+        with patch('sofascore_monitor.monitor.SofascoreClient', return_value=AsyncMock()), \
+             patch('sofascore_monitor.monitor.create_storage', return_value=MagicMock()):
+            current = Monitor(use_auto_discovery=True)
+        current.state_path = state_path
+        assert current.restore_state()
+
+    assert counts == [11, 11, 11]  # The pinned user plus the top 10
+    assert len(current.users) == 11 and current.discovered == {str(i) for i in range(10)}
+
+@pytest.mark.asyncio
+async def test_discovery_replaces_users_that_left_the_top(monitor):
+    monitor.client.get_top_predictors.return_value = {"ranking": [ranked(i, f"User {i}") for i in range(5)]}
+    await monitor.discover_users(3)
+    monitor.seen_cache["2"] = {"b1"}
+
+    monitor.client.get_top_predictors.return_value = {"ranking": [ranked(i, f"User {i}") for i in (4, 123, 0, 1)]}
+    await monitor.discover_users(2)
+    assert [u.id for u in monitor.users] == ["123", "4", "0"]  # Pinned "123" kept, not counted
+    assert monitor.discovered == {"4", "0"} and "2" not in monitor.seen_cache
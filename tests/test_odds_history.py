@@ -0,0 +1,114 @@
+import math
+import os
+import pytest
+
+from sofascore_monitor.odds_history import BLOCK_POINTS, OddsHistory, decode_blocks, line_moves
+from sofascore_monitor.storage import MemoryStorage, PostgresStorage, SqliteStorage
+
+T0 = 1_700_000_000
+POSTGRES_DSN = os.getenv("SOFASCORE_TEST_POSTGRES_DSN")
+
+@pytest.fixture(params=["sqlite", "memory", "postgres"])
+async def storage(request, tmp_path):
+    if request.param != "postgres":
+        yield SqliteStorage(str(tmp_path / "history.db")) if request.param == "sqlite" else MemoryStorage()
+        return
+    if not POSTGRES_DSN:
+        pytest.skip("SOFASCORE_TEST_POSTGRES_DSN not set")
+    pytest.importorskip("asyncpg")
+    storage = PostgresStorage(POSTGRES_DSN)
+    await storage.open()
+    await storage._pool.execute("TRUNCATE odds_history")
+    yield storage
+    await storage.close()
+
+async def test_history_statements_are_valid_postgres():
+    """append_odds_history swallows errors (default=None): catch a statement Postgres rejects here instead."""
+    from sofascore_monitor.storage.postgres import HISTORY_HEADS_SQL
+    sql = " ".join(HISTORY_HEADS_SQL.upper().split())
+    assert "FOR UPDATE" in sql and "DISTINCT" not in sql  # "FOR UPDATE is not allowed with DISTINCT clause"
+
+async def test_history_round_trip_skips_unchanged_and_rolls_blocks(storage):
+    observations = [("b1", T0, 2.0), ("b1", T0 + 60, 2.0), ("b1", T0 + 120, 1.85), ("b1", T0 + 180, 9.5)]
+    observations += [("b1", T0 + 240 + i, 2.0 + (i % 2) / 100) for i in range(BLOCK_POINTS)]
+    await storage.append_odds_history(observations)
+
+    blocks = (await storage.get_odds_history(["b1", "unknown"]))["b1"]
+    epochs, ticks = decode_blocks(blocks)
+
+    expected = [o for i, o in enumerate(observations) if i == 0 or o[2] != observations[i - 1][2]]
+    assert epochs.tolist() == [ts for _, ts, _ in expected]
+    assert ticks.tolist() == [round(odds * 100) for _, _, odds in expected]
+    # One block holds BLOCK_POINTS points, the rest spill into a second one
+    assert [b[0] for b in blocks] == [T0, expected[BLOCK_POINTS][1]]
+    assert sum(len(b[3]) for b in blocks) == 2 * (len(expected) - len(blocks))  # 2 bytes per odds delta
+
+async def test_expired_history_blocks_are_pruned(storage):
+    await storage.append_odds_history([("old", T0, 2.0), ("new", T0 + 10_000, 2.0)])
+    assert await storage.delete_expired_history_batch(T0 + 5_000, 10) == 1
+    assert list(await storage.get_odds_history(["old", "new"])) == ["new"]
+
+def test_signals_match_hand_computed_values():
+    history = OddsHistory(window_seconds=7200)
+    now = T0 + 7200
+    for ts, odds in [(T0 - 600, 2.0), (T0 + 3600, 2.5), (T0 + 5400, 2.0)]:
+        history.record("a", ts, odds)
+    history.record("b", T0 + 7000, 3.0)  # single point: no movement yet
+
+    signals = history.signals(["b", "a", "missing"], now)
+
+    assert signals.bet_ids == ["b", "a"]
+    a = signals.row(1)
+    assert a["move_pct"] == pytest.approx(-0.2)
+    # Held 2.0 for 1h, 2.5 for 30m, 2.0 for 30m of the 2h window
+    twap = (2.0 * 3600 + 2.5 * 1800 + 2.0 * 1800) / 7200
+    assert a["drift"] == pytest.approx((2.0 - twap) / twap)
+    assert a["velocity_per_hour"] == pytest.approx(0.0)
+    b = signals.row(0)
+    assert (b["move_pct"], b["drift"], b["points"]) == (0.0, 0.0, 1)
+    assert b["velocity_per_hour"] == pytest.approx(0.0)
+
+    history.record("b", now, 3.3)
+    velocity = history.signals(["b"], now).velocity[0]
+    assert velocity == pytest.approx(math.log(1.1) / (200 / 3600))
+
+def test_line_moves_alerts_once_and_resets():
+    nan = float("nan")
+    odds =     [2.40, 2.40, 2.10, 1.50, 2.00, 3.00]
+    previous = [2.00, 2.00, 2.00, 2.00, nan,  1.00]
+    sent =     [0,    1,    1,    0,    0,    0]
+    move_pct, alert, reset = line_moves(odds, previous, sent, 0.15)
+    assert move_pct.tolist() == pytest.approx([0.2, 0.2, 0.05, 0.25, 0.0, 0.0])
+    assert alert.tolist() == [True, False, False, True, False, False]
+    assert reset.tolist() == [False, False, True, False, False, False]
+
+def test_window_keeps_price_at_window_start():
+    history = OddsHistory(window_seconds=3600)
+    for i in range(10):
+        history.record("a", T0 + i * 1800, 2.0 + i / 10)
+    epochs, _ = history.paths["a"]
+    assert epochs[0] <= epochs[-1] - 3600 < epochs[1]
+    assert len(epochs) == 3
+
+async def test_monitor_records_history_and_threshold_is_configurable():
+    from sofascore_monitor.models import Bet
+    from sofascore_monitor.monitor import Monitor
+    from datetime import datetime
+
+    monitor = Monitor(use_auto_discovery=False, client=object(), storage=MemoryStorage())
+    bet = Bet(id="bet-1", user_id="u1", event_id=1, event_slug=None, custom_id=None, sport="football",
+              match_name="A vs B", market_name="Full time", choice_name="1", odds=2.0, stake=None,
+              status="notstarted", start_time=None, created_at=datetime.now())
+
+    monitor.apply_settings(monitor.settings.updated({"line_movement_threshold": 0.05}))
+    await monitor.check_line_movements([bet])
+    bet.odds = 2.16
+    await monitor.check_line_movements([bet])
+    [entry] = monitor.storage.outbox.values()
+    assert entry["idem_key"].startswith("line_movement:bet-1:2.0:2.16:")
+
+    await monitor.update_odds_history()
+    assert monitor.odds_signals.bet_ids == ["bet-1"]
+    assert monitor.odds_signals.move_pct[0] == pytest.approx(0.08)
+    epochs, ticks = decode_blocks((await monitor.storage.get_odds_history(["bet-1"]))["bet-1"])
+    assert ticks.tolist() == [200, 216]
@@ -0,0 +1,81 @@
+import asyncio
+
+from sofascore_monitor.alerts import Alert
+from sofascore_monitor.outbox import OutboxRelay, outbox_rows
+from sofascore_monitor.sinks import Sink, SinkError, SinkRegistry
+from sofascore_monitor.storage import MemoryStorage
+
+
+def make_alert(i):
+    return Alert(kind="bet", key=("bet", "u1", (f"b{i}",)), event_id=i, match=f"Match {i}",
+                 summary=f"pick {i}", embed={"title": f"alert {i}"})
+
+
+class RecordingSink(Sink):
+    def __init__(self, name, fail_times=0):
+        super().__init__(name, max_retries=1)
+        self.fail_times = fail_times
+        self.delivered = []
+
+    async def deliver(self, alerts):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise SinkError("boom")
+        self.delivered.extend(a.key for a in alerts)
+
+
+async def with_running(registry, coro):
+    stop = asyncio.Event()
+    task = asyncio.create_task(registry.run_forever(stop))
+    await asyncio.sleep(0)
+    try:
+        return await coro
+    finally:
+        stop.set()
+        await asyncio.wait_for(task, timeout=5)
+
+
+def test_alert_round_trips_with_stable_idempotency_key():
+    alert = make_alert(1)
+    assert make_alert(1).idempotency_key == alert.idempotency_key != make_alert(2).idempotency_key
+    restored = Alert.from_json(alert.to_json())
+    assert restored.key == restored.idempotency_key == alert.idempotency_key
+    assert (restored.embed, restored.match) == (alert.embed, alert.match)
+
+
+async def test_nothing_is_claimed_until_the_sinks_run():
+    storage = MemoryStorage()
+    relay = OutboxRelay(storage, SinkRegistry())
+    await relay.enqueue([make_alert(1)])
+    assert await relay.run_once() == 0
+    assert next(iter(storage.outbox.values()))["attempts"] == 0
+
+
+async def test_failed_sink_is_retried_alone():
+    storage = MemoryStorage()
+    registry = SinkRegistry()
+    good = registry.register(RecordingSink("good"))
+    flaky = registry.register(RecordingSink("flaky", fail_times=1))
+    relay = OutboxRelay(storage, registry, backoff_seconds=0)
+    await storage.record_new_bets([("b1", "u1")], outbox_rows([make_alert(1), make_alert(1)]), [])
+
+    assert await with_running(registry, relay.run_once()) == 0
+    [entry] = storage.outbox.values()
+    assert entry["delivered_sinks"] == "good" and entry["delivered_at"] is None
+
+    assert await with_running(registry, relay.drain()) == 1
+    assert len(good.delivered) == 1 and len(flaky.delivered) == 1  # Each sink got it exactly once
+    assert entry["delivered_at"] is not None
+
+
+async def test_gives_up_after_max_attempts():
+    storage = MemoryStorage()
+    registry = SinkRegistry()
+    registry.register(RecordingSink("down", fail_times=99))
+    relay = OutboxRelay(storage, registry, max_attempts=2, backoff_seconds=0)
+    await relay.enqueue([make_alert(1)])
+
+    assert await with_running(registry, relay.run_once()) == 0
+    assert await with_running(registry, relay.run_once()) == 1
+    [entry] = storage.outbox.values()
+    assert entry["attempts"] == 2 and entry["delivered_sinks"] == "" and entry["delivered_at"] is not None
@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+import pstats
+import time
+from sofascore_monitor.profiler import ProfilerHook
+
+def busy_parse(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+def test_sampling_session_writes_folded_stacks_tagged_by_phase(tmp_path):
+    profiler = ProfilerHook(tmp_path, interval=0.002)
+    profiler.request("sample", cycles=1)
+    assert profiler.active
+
+    with profiler.phase("check_all_users"):
+        busy_parse(0.2)
+    profiler.cycle_done()
+
+    assert not profiler.active
+    [output] = profiler.last_outputs
+    lines = open(output).read().splitlines()
+    assert lines
+    tagged = [l for l in lines if l.startswith("phase:check_all_users;") and "busy_parse" in l]
+    assert tagged
+    # Folded format: "<frame;frame;...> <count>"
+    assert all(l.rsplit(" ", 1)[1].isdigit() for l in lines)
+
+def test_cprofile_session_writes_one_file_per_phase(tmp_path):
+    profiler = ProfilerHook(tmp_path)
+    profiler.request("cprofile", cycles=2)
+
+    for _ in range(2):
+        with profiler.phase("check_all_users"):
+            busy_parse(0.01)
+        with profiler.phase("resolve_pending_bets"):
+            busy_parse(0.01)
+        profiler.cycle_done()
+
+    outputs = sorted(profiler.last_outputs)
+    assert len(outputs) == 2
+    assert outputs[0].endswith("-check_all_users.prof")
+    stats = pstats.Stats(outputs[0])
+    assert any(func[2] == "busy_parse" for func in stats.stats)
+
+def test_sample_falls_back_to_cprofile_without_cpython_internals(tmp_path, monkeypatch):
+    monkeypatch.setattr("sofascore_monitor.profiler._HANDLE_RUN", None)
+    profiler = ProfilerHook(tmp_path)
+    assert profiler.request("sample", cycles=1)["mode"] == "cprofile"
+    with profiler.phase("check_all_users"):
+        busy_parse(0.01)
+    profiler.cycle_done()
+    assert [p.rsplit("-", 1)[1] for p in profiler.last_outputs] == ["check_all_users.prof"]
+
+def test_request_rejects_unknown_mode(tmp_path):
+    profiler = ProfilerHook(tmp_path)
+    with pytest.raises(ValueError):
+        profiler.request("perf")
+    assert not profiler.active
+
+async def _overlapping_phases(profiler, seen):
+    async def resolve():
+        with profiler.phase("resolve_pending_bets"):
+            await asyncio.sleep(0.01)
+            busy_parse(0.01)
+            seen.append(profiler.current_phase)
+
+    with profiler.phase("check_all_users"):
+        task = asyncio.create_task(resolve())  # Overlaps the cycle, as a spawned resolution pass does
+        await asyncio.sleep(0)
+        busy_parse(0.01)
+        seen.append(profiler.current_phase)
+        child = asyncio.create_task(asyncio.sleep(0, result=profiler.current_phase))
+        await task
+        seen.append(await child)
+    seen.append(profiler.current_phase)
+
+async def test_overlapping_phases_in_cprofile_mode(tmp_path):
+    profiler = ProfilerHook(tmp_path)
+    profiler.request("cprofile", cycles=1)
+    seen = []
+    await _overlapping_phases(profiler, seen)
+    # Each coroutine keeps its own phase; no "Another profiling tool is already active"
+    assert seen == ["check_all_users", "resolve_pending_bets", "check_all_users", "idle"]
+    assert profiler.status()["skipped"] == {"resolve_pending_bets": 1}
+
+    profiler.cycle_done()
+    [output] = profiler.last_outputs
+    assert output.endswith("-check_all_users.prof")
+
+    # The next session starts clean: the phase that owned the profiler released it
+    profiler.request("cprofile", cycles=1)
+    with profiler.phase("resolve_pending_bets"):
+        busy_parse(0.01)
+    profiler.cycle_done()
+    assert profiler.last_outputs[0].endswith("-resolve_pending_bets.prof")
+
+async def test_sampler_tags_stacks_with_the_running_task_phase(tmp_path):
+    profiler = ProfilerHook(tmp_path, interval=0.002)
+    profiler.request("sample", cycles=1)
+
+    async def phase(name):
+        with profiler.phase(name):
+            for _ in range(10):
+                busy_parse(0.01)
+                await asyncio.sleep(0)
+
+    async def storage_call():
+        with profiler.phase("resolve_pending_bets"):
+            await asyncio.to_thread(busy_parse, 0.1)
+
+    await asyncio.gather(phase("check_all_users"), phase("resolve_pending_bets"))
+    await storage_call()
+    profiler.cycle_done()
+    lines = open(profiler.last_outputs[0]).read().splitlines()
+    for name in ("check_all_users", "resolve_pending_bets"):
+        assert any(l.startswith(f"phase:{name};thread:MainThread") and "busy_parse" in l for l in lines)
+    # Worker threads are tagged with the phase of the coroutine that handed them the call
+    assert any(l.startswith("phase:resolve_pending_bets;thread:asyncio_") and "busy_parse" in l for l in lines)
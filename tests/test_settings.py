@@ -0,0 +1,54 @@
+import asyncio
+import os
+
+import pytest
+
+from sofascore_monitor.monitor import Monitor
+from sofascore_monitor.settings import Settings, SettingsWatcher
+from sofascore_monitor.storage import MemoryStorage
+
+
+def test_from_env_parses_and_rejects_bad_values():
+    settings = Settings.from_env({"MIN_ROI": "7.5", "SCAN_INTERVAL_MINUTES": "2", "PROXY_URL": "", "OTHER": "x"})
+    assert (settings.min_roi, settings.scan_interval_minutes, settings.proxy_url) == (7.5, 2, "")
+    with pytest.raises(ValueError, match="scan_interval_minutes"):
+        Settings.from_env({"SCAN_INTERVAL_MINUTES": "five"})
+
+
+def test_watcher_pushes_valid_edits_only(tmp_path):
+    env = tmp_path / ".env"
+    env.write_text("MIN_ROI=1\n")
+    watcher = SettingsWatcher(str(env), Settings.from_env({"MIN_ROI": "1"}))
+    pushed = []
+    watcher.subscribe(pushed.append)
+    assert not watcher.check()
+
+    env.write_text("MIN_ROI=4\nTOP_PREDICTORS_LIMIT=30\n")
+    os.utime(env, ns=(1, 10**18))
+    assert watcher.check()
+    assert (pushed[-1].min_roi, pushed[-1].top_predictors_limit) == (4.0, 30)
+
+    env.write_text("MIN_ROI=4\nLINE_MOVEMENT_THRESHOLD=2\n")
+    os.utime(env, ns=(1, 2 * 10**18))
+    assert not watcher.check() and len(pushed) == 1  # Invalid: previous snapshot kept
+
+
+def test_key_removed_from_env_file_falls_back_to_default(tmp_path, monkeypatch):
+    env = tmp_path / ".env"
+    env.write_text("MIN_ROI=3\nMIN_AVG_ODDS=2.5\n")
+    monkeypatch.setenv("MIN_ROI", "3")  # What load_dotenv left in the environment at startup
+    monkeypatch.setenv("MIN_AVG_ODDS", "2.5")
+    watcher = SettingsWatcher(str(env), Settings.from_env(os.environ))
+
+    env.write_text("MIN_AVG_ODDS=2.5\n")
+    os.utime(env, ns=(1, 10**18))
+    assert watcher.check()
+    assert (watcher.current.min_roi, watcher.current.min_avg_odds) == (Settings().min_roi, 2.5)
+
+
+async def test_interval_change_wakes_the_scheduler():
+    monitor = Monitor(use_auto_discovery=False, client=object(), storage=MemoryStorage())
+    sleeper = asyncio.create_task(monitor._sleep(60, monitor._reschedule))
+    await asyncio.sleep(0)
+    monitor.apply_settings(monitor.settings.updated({"scan_interval_minutes": monitor.settings.scan_interval_minutes + 1}))
+    assert await asyncio.wait_for(sleeper, timeout=1) is True
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import time
+
+from sofascore_monitor.alerts import Alert
+from sofascore_monitor.bench import FakeSofascoreServer
+from sofascore_monitor.metrics import NOTIFICATION_QUEUE_DEPTH
+from sofascore_monitor.sinks import (
+    DesktopSink, DiscordSink, FileSink, RateLimiter, Sink, SinkError, SinkRegistry, WebhookSink, plain_text
+)
+
+
+def make_alert(i, event_id=None):
+    return Alert(kind="bet", key=("bet", i), event_id=event_id if event_id is not None else i, match=f"Match {i}",
+                 summary=f"🔮 [tipster](https://x.test/u) pick **{i}**", embed={"title": f"alert {i}"})
+
+
+class RecordingSink(Sink):
+    def __init__(self, name="recording", fail_times=0, delay=0.0, **kwargs):
+        super().__init__(name, **kwargs)
+        self.fail_times = fail_times
+        self.delay = delay
+        self.batches = []
+
+    async def deliver(self, alerts):
+        await asyncio.sleep(self.delay)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise SinkError("boom")
+        self.batches.append([a.key for a in alerts])
+
+
+async def run_until_drained(registry, *, settle=0.05):
+    stop = asyncio.Event()
+    task = asyncio.create_task(registry.run_forever(stop))
+    await asyncio.sleep(settle)
+    stop.set()
+    await asyncio.wait_for(task, timeout=5)
+
+
+async def test_slow_sink_does_not_delay_the_others(tmp_path):
+    registry = SinkRegistry()
+    slow = registry.register(RecordingSink("slow", delay=30, timeout_seconds=0.3, max_retries=1))
+    log = registry.register(FileSink(str(tmp_path / "alerts.jsonl")))
+    stop = asyncio.Event()
+    task = asyncio.create_task(registry.run_forever(stop))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    for i in range(3):
+        registry.publish(make_alert(i))
+    assert time.perf_counter() - start < 0.05  # publish never awaits a sink
+
+    await asyncio.sleep(0.1)
+    lines = (tmp_path / "alerts.jsonl").read_text().splitlines()
+    assert [json.loads(l)["summary"] for l in lines] == [f"🔮 tipster pick {i}" for i in range(3)]
+    assert slow.batches == []
+
+    stop.set()
+    await asyncio.wait_for(task, timeout=5)
+    assert not registry.running and slow.batches == []
+
+
+async def test_batches_retries_and_full_queue_drops_oldest():
+    registry = SinkRegistry()
+    flaky = registry.register(RecordingSink(fail_times=1, backoff_seconds=0.01, batch_window=0.02, queue_size=3))
+    for i in range(5):
+        registry.publish(make_alert(i))
+    assert NOTIFICATION_QUEUE_DEPTH.value() == 3
+    await run_until_drained(registry)
+    assert flaky.batches == [[("bet", 2), ("bet", 3), ("bet", 4)]]
+    assert NOTIFICATION_QUEUE_DEPTH.value() == 0  # Falls as the worker takes the batch
+
+
+async def test_rate_limiter_spaces_out_bursts():
+    limiter = RateLimiter(rate=50, burst=2)
+    start = time.perf_counter()
+    for _ in range(6):
+        await limiter.acquire()
+    assert time.perf_counter() - start >= 4 / 50 * 0.9
+
+
+async def test_webhook_and_discord_sinks_post_to_local_stand_in():
+    server = FakeSofascoreServer(users=1).start()
+    try:
+        registry = SinkRegistry()
+        registry.register(WebhookSink(server.webhook_url, batch_window=0.02))
+        registry.register(DiscordSink(server.webhook_url, digest_threshold=30, batch_window=0.02))
+        for i in range(12):
+            registry.publish(make_alert(i, event_id=i % 11))
+        await run_until_drained(registry, settle=0.3)
+    finally:
+        server.stop()
+    # One generic webhook post for the batch; Discord merges event 0 and packs 11 embeds into 2 posts
+    assert server.webhook_posts == 3
+
+
+def test_plain_text_strips_markdown():
+    assert plain_text("**bold** [name](https://x.test)") == "bold name"
+
+
+def test_desktop_sink_needs_a_display(monkeypatch):
+    monkeypatch.setattr("sofascore_monitor.sinks.shutil.which", lambda cmd: "/usr/bin/notify-send" if cmd == "notify-send" else None)
+    monkeypatch.delenv("DISPLAY", raising=False)
+    monkeypatch.delenv("WAYLAND_DISPLAY", raising=False)
+    assert DesktopSink.available() is None
+    monkeypatch.setenv("DISPLAY", ":0")
+    assert DesktopSink.available()[0] == "notify-send"
@@ -1,12 +1,13 @@
+import asyncio
 import pytest
 import os
 import sqlite3
 import uuid
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from sofascore_monitor.keys import seen_key
 from sofascore_monitor.storage import Storage
 
-@pytest.fixture
 @pytest.fixture
 def db_path(tmp_path):
     # Create a temp file in the pytest temp directory
@@ -54,39 +55,6 @@ async def test_add_and_check_seen(storage):
     await storage.add_seen(bet_id, user_id)
     assert await storage.is_seen(bet_id)
 
-@pytest.mark.asyncio
-async def test_user_failures(storage):
-    """Test failure tracking and pausing logic."""
-    user_id = "failed_user"
-    max_retries = 3
-    pause_minutes = 30
-    
-    # Initial state
-    failures, paused_until = await storage.get_user_status(user_id)
-    assert failures == 0
-    assert paused_until is None
-    
-    # Increment failure 1
-    await storage.increment_failure(user_id, max_retries, pause_minutes)
-    failures, paused_until = await storage.get_user_status(user_id)
-    assert failures == 1
-    assert paused_until is None
-    
-    # Increment to max
-    await storage.increment_failure(user_id, max_retries, pause_minutes) # 2
-    await storage.increment_failure(user_id, max_retries, pause_minutes) # 3
-    
-    failures, paused_until = await storage.get_user_status(user_id)
-    assert failures == 3
-    assert paused_until is not None
-    assert paused_until > datetime.now()
-
-    # Reset
-    await storage.reset_failure(user_id)
-    failures, paused_until = await storage.get_user_status(user_id)
-    assert failures == 0
-    assert paused_until is None
-
 # Cleanup old data is synchronous in source code (it calls sync internally or is sync wrapper?)
 # Let's check storage.py source again for cleanup_old_data signature.
 # Line 136: def cleanup_old_data(self, days: int):
@@ -97,8 +65,8 @@ def test_cleanup_old_data(storage, db_path):
     old_date = datetime.now() - timedelta(days=60)
     with sqlite3.connect(db_path) as conn:
         conn.execute(
-            "INSERT INTO seen_bets (id, user_id, created_at) VALUES (?, ?, ?)",
-            ("old_bet", "user_1", old_date)
+            "INSERT INTO seen_bets (key, created_at) VALUES (?, ?)",
+            (seen_key("old_bet"), int(old_date.timestamp()))
         )
         conn.commit()
         
@@ -114,8 +82,8 @@ async def test_cleanup_old_data_async(storage, db_path):
     old_date = datetime.now() - timedelta(days=60)
     with sqlite3.connect(db_path) as conn:
         conn.execute(
-            "INSERT INTO seen_bets (id, user_id, created_at) VALUES (?, ?, ?)",
-            ("old_bet", "user_1", old_date)
+            "INSERT INTO seen_bets (key, created_at) VALUES (?, ?)",
+            (seen_key("old_bet"), int(old_date.timestamp()))
         )
         conn.commit()
         
@@ -124,3 +92,150 @@ async def test_cleanup_old_data_async(storage, db_path):
     storage.cleanup_old_data(days=30)
     
     assert not await storage.is_seen("old_bet")
+
+@pytest.mark.asyncio
+async def test_compactor_prunes_in_batches(storage, db_path):
+    """Old rows go in several small transactions; fresh rows survive."""
+    from sofascore_monitor.compaction import Compactor
+    old_date = datetime.now() - timedelta(days=60)
+    old_ts = int(old_date.timestamp())
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO seen_bets (key, created_at) VALUES (?, ?)",
+            [(seen_key(f"old_{i}"), old_ts) for i in range(250)]
+        )
+        conn.executemany(
+            "INSERT INTO latest_odds (bet_id, odds, updated_at) VALUES (?, ?, ?)",
+            [(f"odds_{i:03d}", 2.0, old_ts if i % 2 else int(time.time())) for i in range(230)]
+        )
+        conn.commit()
+    await storage.add_seen("fresh_bet", "user_1")
+
+    stats = await Compactor(storage, retention_days=30, archive_after_days=90, batch_size=100, pause_seconds=0).run_once()
+
+    assert stats["seen_bets"] == 250
+    assert stats["latest_odds"] == 115
+    assert await storage.is_seen("fresh_bet")
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM latest_odds").fetchone()[0] == 115
+
+@pytest.mark.asyncio
+async def test_archive_settled_bets_keeps_roi(storage, db_path):
+    """Archived bets leave the hot table but still count towards ROI stats."""
+    from sofascore_monitor.compaction import Compactor
+    for i, status in enumerate(["WON", "LOST", "WON", "PENDING"]):
+        await storage.store_alerted_bet(f"bet_{i}", "user_1", 100 + i, "Match Winner", "1", 2.0)
+        if status != "PENDING":
+            await storage.update_bet_outcome(f"bet_{i}", status, 1.0 if status == "WON" else -1.0)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE alerted_bets SET alerted_at = ?", (int(datetime(2020, 1, 1).timestamp()),))
+        conn.commit()
+    before = await storage.get_roi_stats()
+
+    stats = await Compactor(storage, retention_days=30, archive_after_days=90, batch_size=2, pause_seconds=0).run_once()
+
+    assert stats["archived"] == 3
+    assert [b["id"] for b in await storage.get_pending_bets()] == ["bet_3"]
+    assert sorted(b["id"] for b in await storage.load_archived_bets()) == ["bet_0", "bet_1", "bet_2"]
+    assert await storage.get_roi_stats() == before
+
+def test_fresh_db_uses_incremental_vacuum(storage, db_path):
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+def _plan(db_path, sql, params):
+    with sqlite3.connect(db_path) as conn:
+        return " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+def test_migrations_reach_latest_version(storage, db_path):
+    from sofascore_monitor.migrations import LATEST_VERSION
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == LATEST_VERSION
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert {"idx_odds_updated", "idx_alerted_bets_pending", "idx_alerted_bets_settled"} <= indexes
+    assert "idx_seen_bets_user" not in indexes
+    # Re-opening an up-to-date DB is a no-op
+    Storage(db_path)
+
+def test_migrations_cli_defaults_to_the_configured_db(tmp_path, monkeypatch, capsys):
+    from sofascore_monitor import config
+    from sofascore_monitor.migrations import LATEST_VERSION, __main__ as migrations_cli
+    assert migrations_cli.DB_PATH == config.DB_PATH
+
+    path = str(tmp_path / "configured" / "monitor.db")
+    monkeypatch.setattr(migrations_cli, "DB_PATH", path)
+    monkeypatch.chdir(tmp_path / "..")  # Not the directory the DB lives under
+    migrations_cli.main([])
+    assert capsys.readouterr().out.strip() == f"{path}: schema v0 -> v{LATEST_VERSION}"
+
+def test_legacy_db_is_migrated_to_epoch_timestamps(tmp_path):
+    """A DB created by the pre-versioning _init_db keeps its rows, with TEXT timestamps converted."""
+    from sofascore_monitor.migrations import MIGRATIONS
+    path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(path) as conn:
+        MIGRATIONS[0][2](conn)  # v1 baseline == the old schema, but user_version stays 0
+        conn.execute("INSERT INTO seen_bets (id, user_id, created_at) VALUES ('b1', 'u1', '2024-05-01 12:00:00')")
+        conn.execute("INSERT INTO seen_bets (id, user_id, created_at) VALUES ('b2', 'u1', ?)", (datetime(2024, 5, 1, 12, 0, 0, 500),))
+        conn.execute("INSERT INTO alerted_bets (id, user_id, alerted_at) VALUES ('a1', 'u1', '2024-05-01 12:00:00')")
+        conn.execute("INSERT INTO user_status (user_id, failures, paused_until) VALUES ('u1', 3, '2024-05-01 12:30:00')")
+        conn.commit()
+
+    storage = Storage(path)
+    # user_status keeps its TIMESTAMP text: it still loads as the datetime the breaker expects
+    assert asyncio.run(storage.load_user_statuses()) == {"u1": (3, datetime(2024, 5, 1, 12, 30))}
+
+    expected = int(datetime(2024, 5, 1, 12, 0, 0, tzinfo=timezone.utc).timestamp())
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT created_at FROM seen_bets").fetchall() == [(expected,), (expected,)]
+        assert conn.execute("SELECT alerted_at FROM alerted_bets").fetchone()[0] == expected
+        assert conn.execute("SELECT typeof(created_at) FROM seen_bets LIMIT 1").fetchone()[0] == "integer"
+
+@pytest.mark.asyncio
+async def test_new_rows_use_epoch_timestamps(storage, db_path):
+    await storage.add_seen("bet_1", "user_1")
+    await storage.store_alerted_bet("bet_1", "user_1", 1, "Match Winner", "1", 2.0)
+    now = time.time()
+    with sqlite3.connect(db_path) as conn:
+        created_at = conn.execute("SELECT created_at FROM seen_bets").fetchone()[0]
+        alerted_at = conn.execute("SELECT alerted_at FROM alerted_bets").fetchone()[0]
+    assert isinstance(created_at, int) and abs(created_at - now) < 5
+    assert isinstance(alerted_at, int) and abs(alerted_at - now) < 5
+
+def test_hot_queries_use_their_indexes(storage, db_path):
+    from sofascore_monitor import storage as storage_module
+    seen_plan = _plan(db_path, storage_module.SEEN_LOOKUP_SQL, ("x",))
+    assert "USING PRIMARY KEY" in seen_plan or "sqlite_autoindex_seen_bets" in seen_plan
+    assert "idx_alerted_bets_pending" in _plan(db_path, storage_module.PENDING_BETS_SQL, ())
+    assert "idx_seen_bets_created" in _plan(db_path, storage_module.EXPIRED_SEEN_DELETE_SQL, (0, 10))
+    assert "idx_odds_updated" in _plan(db_path, storage_module.EXPIRED_ODDS_DELETE_SQL, (0, 10))
+    assert "idx_alerted_bets_settled" in _plan(db_path, storage_module.SETTLED_FOR_ARCHIVE_SQL, (0, 10))
+
+def test_seen_bets_is_compact_without_rowid(storage, db_path):
+    with sqlite3.connect(db_path) as conn:
+        sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'seen_bets'").fetchone()[0]
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(seen_bets)")]
+    assert "WITHOUT ROWID" in sql
+    assert columns == ["key", "created_at"]
+
+@pytest.mark.asyncio
+async def test_v3_seen_bets_survive_compaction_migration(tmp_path):
+    """Bets marked seen under the TEXT-keyed schema are still seen after v4."""
+    from sofascore_monitor.migrations import MIGRATIONS
+    path = str(tmp_path / "v3.db")
+    with sqlite3.connect(path) as conn:
+        for version, _, migrate in MIGRATIONS[:3]:
+            migrate(conn)
+        conn.execute("PRAGMA user_version = 3")
+        conn.executemany(
+            "INSERT INTO seen_bets (id, user_id, created_at) VALUES (?, ?, ?)",
+            [("12345_1", "u1", 1700000000), ("65f0c0ffee1234567890abcd", "u2", 1700000001)]
+        )
+        conn.commit()
+
+    storage = Storage(path)
+
+    assert await storage.is_seen("12345_1")
+    assert await storage.is_seen("65f0c0ffee1234567890abcd")
+    assert not await storage.is_seen("12345_2")
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT MIN(created_at) FROM seen_bets").fetchone()[0] == 1700000000
@@ -0,0 +1,178 @@
+"""
+Conformance suite: every storage backend must behave the same.
+
+PostgreSQL runs only when SOFASCORE_TEST_POSTGRES_DSN points at a scratch
+database (e.g. `docker run -e POSTGRES_PASSWORD=pw -p 5432:5432 postgres:16`
+and `postgresql://postgres:pw@localhost/postgres`); its tables are truncated.
+"""
+import os
+import time
+import pytest
+from datetime import datetime, timedelta
+
+from sofascore_monitor.storage import (
+    MemoryStorage,
+    PostgresStorage,
+    SqliteStorage,
+    StorageBackend,
+    create_storage,
+)
+
+POSTGRES_DSN = os.getenv("SOFASCORE_TEST_POSTGRES_DSN")
+
+
+@pytest.fixture(params=["sqlite", "memory", "postgres"])
+async def backend(request, tmp_path):
+    if request.param == "sqlite":
+        storage = SqliteStorage(str(tmp_path / "conformance.db"))
+    elif request.param == "memory":
+        storage = MemoryStorage()
+    else:
+        if not POSTGRES_DSN:
+            pytest.skip("SOFASCORE_TEST_POSTGRES_DSN not set")
+        pytest.importorskip("asyncpg")
+        storage = PostgresStorage(POSTGRES_DSN)
+    await storage.open()
+    if request.param == "postgres":
+        await storage._pool.execute(
+            "TRUNCATE seen_bets, user_status, latest_odds, odds_history, alerted_bets, alerted_bets_archive, alert_outbox"
+        )
+    yield storage
+    await storage.close()
+
+
+def test_create_storage_picks_backend(tmp_path):
+    assert isinstance(create_storage("memory://"), MemoryStorage)
+    assert isinstance(create_storage("postgresql://u:p@localhost/db"), PostgresStorage)
+    assert isinstance(create_storage(f"sqlite:///{tmp_path / 'a.db'}"), SqliteStorage)
+    assert isinstance(create_storage(str(tmp_path / "b.db")), SqliteStorage)
+    assert isinstance(MemoryStorage(), StorageBackend)
+
+
+async def test_seen_bets(backend):
+    assert not await backend.is_seen("123_1")
+    await backend.add_seen("123_1", "user_1")
+    await backend.add_seen("123_1", "user_1")
+    assert await backend.is_seen("123_1")
+    assert not await backend.is_seen("123_2")
+
+
+async def test_circuit_states_round_trip(backend):
+    until = datetime.now().replace(microsecond=0) + timedelta(minutes=5)
+    await backend.save_user_statuses([("u1", 3, until), ("u2", 4, until)])
+    await backend.save_user_statuses([("u2", 0, None)])  # Closed again
+    assert await backend.load_user_statuses() == {"u1": (3, until)}
+
+
+async def test_odds_upserts_keep_alert_flag(backend):
+    assert await backend.get_odds_snapshot("b1") is None
+    await backend.upsert_odds_snapshots([("b1", 2.0, None)])
+    await backend.set_alert_flags(["b1"], 1)
+    await backend.upsert_odds_snapshots([("b1", 1.6, 2.0), ("b2", 3.0, None), ("b1", 1.5, 2.0)])
+
+    b1 = await backend.get_odds_snapshot("b1")
+    assert (b1["odds"], b1["previous_odds"], b1["alert_sent"]) == (1.5, 2.0, 1)
+    assert abs(b1["updated_at"] - time.time()) < 5
+    assert (await backend.get_odds_snapshot("b2"))["alert_sent"] == 0
+
+    await backend.set_alert_flags(["b1"], 0)
+    assert (await backend.get_odds_snapshot("b1"))["alert_sent"] == 0
+
+
+async def test_bulk_snapshot_lookup_and_flags(backend):
+    await backend.upsert_odds_snapshots([(f"b{i}", 2.0 + i, None) for i in range(3)])
+    await backend.set_alert_flags(["b0", "b2", "missing"], 1)
+
+    snapshots = await backend.get_odds_snapshots(["b0", "b1", "b2", "missing"])
+    assert sorted(snapshots) == ["b0", "b1", "b2"]
+    assert [snapshots[b]["alert_sent"] for b in ("b0", "b1", "b2")] == [1, 0, 1]
+    assert snapshots["b2"]["odds"] == 4.0
+    assert await backend.get_odds_snapshots([]) == {}
+
+
+async def test_alerted_bets_and_roi(backend):
+    for i in range(3):
+        await backend.store_alerted_bet(f"bet_{i}", "u1", 100 + i, "Match Winner", "1", 2.0)
+    await backend.store_alerted_bet("bet_0", "u1", 100, "Match Winner", "2", 9.9)  # ignored
+
+    pending = {b["id"]: b for b in await backend.get_pending_bets()}
+    assert set(pending) == {"bet_0", "bet_1", "bet_2"}
+    assert pending["bet_0"]["odds"] == 2.0 and pending["bet_0"]["stake"] == 1.0
+
+    await backend.update_bet_outcome("bet_0", "WON", 1.0)
+    await backend.update_bet_outcome("bet_1", "LOST", -1.0)
+    assert [b["id"] for b in await backend.get_pending_bets()] == ["bet_2"]
+
+    stats = await backend.get_roi_stats()
+    assert stats["total_bets"] == 2 and stats["wins"] == 1
+    assert stats["profit"] == 0.0 and stats["win_rate"] == 50.0
+
+
+async def test_compaction_batches(backend):
+    for i in range(5):
+        await backend.add_seen(f"seen_{i}", "u1")
+        await backend.upsert_odds_snapshots([(f"odds_{i}", 2.0, None)])
+    future = int(time.time()) + 60
+
+    assert await backend.delete_expired_seen_batch(int(time.time()) - 60, 10) == 0
+    assert await backend.delete_expired_seen_batch(future, 3) == 3
+    assert await backend.delete_expired_seen_batch(future, 3) == 2
+    assert not await backend.is_seen("seen_0")
+    assert await backend.delete_expired_odds_batch(future, 10) == 5
+    assert await backend.get_odds_snapshot("odds_0") is None
+
+
+async def test_archive_keeps_roi(backend):
+    for i, status in enumerate(["WON", "LOST", "PENDING"]):
+        await backend.store_alerted_bet(f"bet_{i}", "u1", i, "Match Winner", "1", 2.0)
+        if status != "PENDING":
+            await backend.update_bet_outcome(f"bet_{i}", status, 1.0 if status == "WON" else -1.0)
+    before = await backend.get_roi_stats()
+
+    assert await backend.archive_settled_batch(int(time.time()) + 60, 10) == 2
+
+    assert [b["id"] for b in await backend.get_pending_bets()] == ["bet_2"]
+    assert sorted(b["id"] for b in await backend.load_archived_bets()) == ["bet_0", "bet_1"]
+    assert await backend.get_roi_stats() == before
+    assert await backend.incremental_vacuum(10) >= 0
+    await backend.checkpoint()
+
+
+async def test_line_movements_recorded_together(backend):
+    await backend.upsert_odds_snapshots([("b1", 2.0, None), ("b2", 1.5, None)])
+    await backend.set_alert_flags(["b2"], 1)
+    assert await backend.record_line_movements(
+        [("b1", 2.5, 2.0), ("b2", 1.5, None), ("b3", 3.0, None)], [("odds:b1", "{}")], [("b1", 1), ("b2", 0)],
+    )
+    snapshots = await backend.get_odds_snapshots(["b1", "b2", "b3"])
+    assert {b: (s["odds"], s["alert_sent"]) for b, s in snapshots.items()} == {
+        "b1": (2.5, 1), "b2": (1.5, 0), "b3": (3.0, 0)}
+    [entry] = await backend.claim_outbox(10, lease_seconds=60)
+    assert entry["idem_key"] == "odds:b1"
+    assert await backend.record_line_movements([], [], [])
+
+
+async def test_outbox_is_transactional_idempotent_and_leased(backend):
+    assert await backend.record_new_bets(
+        [("bet_1", "u1"), ("bet_2", "u1")],
+        [("bet:a", '{"n": 1}'), ("bet:a", '{"n": 2}')],
+        [("bet_1", "u1", 7, "Match Winner", "1", 2.0)],
+    )
+    await backend.enqueue_alerts([("bet:a", '{"n": 3}'), ("odds:b", "{}")])
+    assert await backend.is_seen("bet_2")
+    assert [b["id"] for b in await backend.get_pending_bets()] == ["bet_1"]
+
+    claimed = {e["idem_key"]: e for e in await backend.claim_outbox(10, lease_seconds=60)}
+    assert sorted(claimed) == ["bet:a", "odds:b"]
+    assert claimed["bet:a"]["payload"] == '{"n": 1}' and claimed["bet:a"]["attempts"] == 1
+    assert await backend.claim_outbox(10, lease_seconds=60) == []  # Leased
+
+    now = int(time.time())
+    await backend.ack_outbox([(claimed["bet:a"]["id"], "discord", True, now),
+                              (claimed["odds:b"]["id"], "discord", False, now)])
+    [retry] = await backend.claim_outbox(10, lease_seconds=60)
+    assert (retry["idem_key"], retry["delivered_sinks"], retry["attempts"]) == ("odds:b", "discord", 2)
+
+    await backend.enqueue_alerts([("bet:a", "{}")])  # Delivered keys stay deduplicated
+    assert await backend.claim_outbox(10, lease_seconds=0) == []
+    assert await backend.delete_delivered_outbox_batch(now + 60, 10) == 1
@@ -0,0 +1,41 @@
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+from sofascore_monitor import templates
+from sofascore_monitor.models import Bet, User
+from sofascore_monitor.notifications import bet_alert
+from sofascore_monitor.templates import Payload, encode, user_card
+
+
+def make_bet(i, custom_id="XyZ"):
+    return Bet(id=f"b{i}", user_id="1", event_id=5, event_slug="a-b", custom_id=custom_id, sport="football",
+               match_name="A vs B", market_name="Match Winner", choice_name=str(i), odds=2.0 + i, stake=None,
+               status="Not started", start_time=None, created_at=datetime.now())
+
+
+def test_user_card_is_cached_until_stats_change():
+    user = User(id="card-1", name="Tipster", slug="tipster", roi=12.0, current_roi=15.0)
+    assert user_card(user) is user_card(User(**vars(user)))
+    user.roi = 13.0
+    card = user_card(user)
+    assert "ROI: **13.0%**" in card.performance["value"] and "🟢" in card.performance["value"]
+    assert card.color == templates.COLOR_PROFITABLE
+
+
+def test_bet_embed_renders_every_bet_and_links():
+    user = User(id="7", name="Tipster", slug="tipster", roi=-3.0)
+    alert = bet_alert(user, [make_bet(1), make_bet(2)])
+    fields = {f["name"]: f["value"] for f in alert.embed["fields"]}
+    assert fields["🔮 Predictor"] == "[Tipster](https://www.sofascore.com/user/profile/7)"
+    assert fields["⚽️ Match"] == "[A vs B](https://www.sofascore.com/football/match/a-b/XyZ#id:5)"
+    assert fields["🎯 Bets (2)"] == "**1.** Match Winner: 1 @ **3.0** 🎯\n**2.** Match Winner: 2 @ **4.0** 🎯"
+    assert alert.embed["color"] == templates.COLOR_DEFAULT
+
+
+def test_payload_is_encoded_once():
+    payload = Payload(embeds=[{"title": "⚽️ NEW BET ALERT"}])
+    with patch.object(templates, "dumps", wraps=templates.dumps) as dumps:
+        assert encode(payload) is encode(payload)
+    dumps.assert_called_once()
+    assert json.loads(encode(payload)) == {"embeds": [{"title": "⚽️ NEW BET ALERT"}]}
@@ -0,0 +1,110 @@
+import pytest
+import asyncio
+import json
+from sofascore_monitor.tracing import Tracer, SpanExporter, NOOP_SPAN
+
+@pytest.mark.asyncio
+async def test_sampled_trace_nests_and_exports(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = SpanExporter(path=str(path))
+    tracer = Tracer(sample_rate=1.0, exporter=exporter)
+
+    def is_seen_sync():
+        with tracer.span("db.is_seen"):
+            pass
+
+    async def check_user(uid):
+        with tracer.span("check_user", user_id=uid):
+            await asyncio.to_thread(is_seen_sync)
+            with tracer.span("http.fetch"):
+                await asyncio.sleep(0)
+
+    with tracer.span("check_all_users"):
+        await asyncio.gather(check_user("1"), check_user("2"))
+    exporter.flush()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1  # one trace per cycle
+    spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_name = {}
+    for s in spans:
+        by_name.setdefault(s["name"], []).append(s)
+
+    root = by_name["check_all_users"][0]
+    assert "parentSpanId" not in root
+    assert len(by_name["check_user"]) == 2
+    assert all(s["parentSpanId"] == root["spanId"] for s in by_name["check_user"])
+    user_span_ids = {s["spanId"] for s in by_name["check_user"]}
+    assert all(s["parentSpanId"] in user_span_ids for s in by_name["http.fetch"])
+    # Context follows work into to_thread workers
+    assert all(s["parentSpanId"] in user_span_ids for s in by_name["db.is_seen"])
+    assert len({s["traceId"] for s in spans}) == 1
+
+def test_unsampled_trace_is_noop(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = SpanExporter(path=str(path))
+    tracer = Tracer(sample_rate=0.0, exporter=exporter)
+
+    with tracer.span("check_all_users") as root:
+        with tracer.span("check_user") as child:
+            assert root is NOOP_SPAN
+            assert child is NOOP_SPAN
+    exporter.flush()
+    assert not path.exists()
+
+async def test_child_spans_only_exist_inside_a_trace(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = SpanExporter(path=str(path))
+    tracer = Tracer(sample_rate=1.0, exporter=exporter)
+
+    # A storage call from a CLI command or the outbox relay: no trace of its own, nor for what it nests
+    with tracer.child_span("db.claim_outbox") as span:
+        with tracer.span("parse_json") as nested:
+            assert span is NOOP_SPAN and nested is NOOP_SPAN
+    with tracer.span("resolve_pending_bets"):
+        with tracer.child_span("db.get_pending_bets"):
+            await asyncio.sleep(0)
+    exporter.flush()
+
+    [line] = path.read_text().splitlines()
+    spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root, = (s for s in spans if s["name"] == "resolve_pending_bets")
+    assert [(s["name"], s["parentSpanId"]) for s in spans if s is not root] == [("db.get_pending_bets", root["spanId"])]
+
+def test_error_sets_status(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = SpanExporter(path=str(path))
+    tracer = Tracer(sample_rate=1.0, exporter=exporter)
+
+    with pytest.raises(ValueError):
+        with tracer.span("check_all_users"):
+            raise ValueError("boom")
+    exporter.flush()
+
+    span = json.loads(path.read_text())["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert span["status"]["code"] == 2
+    assert "boom" in span["status"]["message"]
+
+async def test_monitor_cycle_is_one_trace(tmp_path):
+    from datetime import datetime
+    from unittest.mock import patch
+    from sofascore_monitor.models import Bet
+    from sofascore_monitor.monitor import Monitor
+    from sofascore_monitor.storage import MemoryStorage
+
+    path = tmp_path / "traces.jsonl"
+    exporter = SpanExporter(path=str(path))
+    monitor = Monitor(use_auto_discovery=False, client=object(), storage=MemoryStorage())
+    monitor.users = []
+    monitor._line_batch = [Bet(id="b1", user_id="1", event_id=1, event_slug="a-b", custom_id=None, sport="football",
+                               match_name="A vs B", market_name="Match Winner", choice_name="1", odds=2.0, stake=None,
+                               status="Not started", start_time=None, created_at=datetime.now())]
+    with patch("sofascore_monitor.monitor.tracer", Tracer(sample_rate=1.0, exporter=exporter)):
+        await monitor.check_all_users()
+    exporter.flush()
+
+    [line] = path.read_text().splitlines()
+    spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    names = {s["name"] for s in spans}
+    assert {"check_all_users", "check_users", "check_line_movements", "odds_history", "notify"} <= names
+    assert len({s["traceId"] for s in spans}) == 1